@@ -0,0 +1,75 @@
+import os
+import hashlib
+
+# Job artifacts served by /jobs/{job_id}/artifacts/{name}, with strong ETags from the file
+# contents. /status only lists their URLs with ?v=<version>; a URL with the current version
+# never changes, so browsers cache it for good and never ask again.
+ARTIFACTS = {
+    "script": ("script.txt", "text/plain; charset=utf-8"),
+    "bible": ("bible.json", "application/json"),
+    "character": (os.path.join("assets", "character.png"), "image/png"),
+    # Written by the worker next to character.png
+    "character_thumb": (os.path.join("assets", "character_thumb.png"), "image/png"),
+}
+VERSION_CHARS = 16
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+MAX_MEMOIZED = 4096
+
+_versions = {}
+
+
+def artifact_path(job_dir: str, name: str) -> str:
+    return os.path.join(job_dir, ARTIFACTS[name][0])
+
+
+def version(path: str) -> str:
+    """Content hash of the file, memoized per (path, inode, mtime, size); None if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    value = _versions.get(key)
+    if value is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        value = h.hexdigest()[:VERSION_CHARS]
+        if len(_versions) >= MAX_MEMOIZED:
+            _versions.clear()
+        _versions[key] = value
+    return value
+
+
+def etag(version_value: str) -> str:
+    return f'"{version_value}"'
+
+
+def not_modified(if_none_match: str, etag_value: str) -> bool:
+    """If-None-Match matching (weak comparison, as RFC 9110 requires for this header)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag_value in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def cache_control(requested_version: str, current_version: str) -> str:
+    # A stale or missing ?v= gets the current bytes, but must be revalidated next time
+    return IMMUTABLE if requested_version == current_version else REVALIDATE
+
+
+def job_artifacts(job_id: str, job_dir: str) -> dict:
+    """URLs and versions of the artifacts that exist so far, for /status."""
+    artifacts, versions = {}, {}
+    for name in ARTIFACTS:
+        value = version(artifact_path(job_dir, name))
+        if value:
+            versions[name] = value
+            artifacts[f"{name}_url"] = f"/jobs/{job_id}/artifacts/{name}?v={value}"
+    if versions:
+        artifacts["versions"] = versions
+    return artifacts
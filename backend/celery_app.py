@@ -1,5 +1,7 @@
 import os
+import time
 from celery import Celery
+from celery.signals import before_task_publish
 
 broker_url = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 result_backend = os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/0")
@@ -18,3 +20,10 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
 )
+
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    # Workers measure queue wait from this (worker/metrics.py SENT_AT_HEADER)
+    if headers is not None:
+        headers.setdefault("sent_at", time.time())
@@ -2,11 +2,19 @@ import os
 import json
 import uuid
 import shutil
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException
+import time
+import asyncio
+import redis
+import redis.asyncio
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from shared.schemas.schemas import JobRequest, JobResponse, JobStatus, CharacterRequest
+from fastapi.responses import StreamingResponse
+from shared import job_status
+from shared.schemas.schemas import JobRequest, JobResponse, JobStatus, CharacterRequest, SceneLayout, SceneLayoutPatch
 from celery_app import celery_app
+import artifact_store
+from prometheus_client import Counter, Histogram, CollectorRegistry, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
 import logging
 
 app = FastAPI(title="Story-to-Cartoon API")
@@ -29,9 +37,54 @@ if not os.path.isabs(JOBS_DIR):
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# /jobs/{id}/events: a comment line this often keeps proxies from closing an idle stream
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# How often the stream re-reads status.json while Redis is unreachable
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "2"))
+_status_redis = None
+
+def status_redis():
+    """Async client for status reads and event subscriptions (the worker writes via shared.job_status)."""
+    global _status_redis
+    if _status_redis is None:
+        _status_redis = redis.asyncio.Redis.from_url(job_status.JOB_STATUS_REDIS_URL, socket_timeout=EVENTS_KEEPALIVE_SECONDS + 5)
+    return _status_redis
+
+async def read_status(job_id: str, job_dir: str) -> dict:
+    try:
+        fields = await status_redis().hgetall(job_status.status_key(job_id))
+        if fields:
+            return job_status.decode(fields)
+    except redis.RedisError:
+        pass
+    return job_status.read_snapshot(job_dir)
+
 # Ensure jobs directory exists
 os.makedirs(JOBS_DIR, exist_ok=True)
 
+# Worker metric files (the worker's PROMETHEUS_MULTIPROC_DIR); /metrics merges them in when readable
+WORKER_METRICS_DIR = os.getenv("WORKER_METRICS_DIR")
+HTTP_SECONDS = Histogram("http_request_seconds", "API request latency", ["method", "route", "status"])
+JOBS_SUBMITTED = Counter("jobs_submitted_total", "Jobs accepted by the API", ["kind"])
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Route templates, not raw paths, so job ids don't explode label cardinality
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_SECONDS.labels(request.method, route, str(response.status_code)).observe(time.perf_counter() - start)
+    return response
+
+@app.get("/metrics")
+def get_metrics():
+    output = generate_latest(REGISTRY)
+    if WORKER_METRICS_DIR and os.path.isdir(WORKER_METRICS_DIR):
+        worker_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(worker_registry, path=WORKER_METRICS_DIR)
+        output += generate_latest(worker_registry)
+    return Response(output, media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/generate", response_model=JobResponse)
 async def generate_video(request: JobRequest):
     job_id = str(uuid.uuid4())
@@ -47,6 +100,9 @@ async def generate_video(request: JobRequest):
         dst_char_path = os.path.join(job_dir, "assets", "character.png")
         if os.path.exists(src_char_path):
             shutil.copy(src_char_path, dst_char_path)
+            src_thumb_path = artifact_store.artifact_path(os.path.join(JOBS_DIR, request.character_job_id), "character_thumb")
+            if os.path.exists(src_thumb_path):
+                shutil.copy(src_thumb_path, artifact_store.artifact_path(job_dir, "character_thumb"))
             logger.info(f"Copied character asset from {request.character_job_id} to {job_id}")
         else:
             logger.warning(f"Linked character job {request.character_job_id} not found or has no asset.")
@@ -60,6 +116,7 @@ async def generate_video(request: JobRequest):
 
     # Trigger Celery Task
     task = celery_app.send_task("tasks.process_story", args=[job_id, request.model_dump()])
+    JOBS_SUBMITTED.labels("story").inc()
     
     return {"job_id": job_id, "status": "queued"}
 
@@ -76,9 +133,20 @@ async def generate_character(request: CharacterRequest):
 
     # Trigger Task
     task = celery_app.send_task("tasks.generate_character_only", args=[job_id, request.prompt])
+    JOBS_SUBMITTED.labels("character").inc()
     
     return {"job_id": job_id, "status": "queued"}
 
+def job_artifacts(job_id: str, job_dir: str) -> dict:
+    # URLs and versions only; the files themselves come from /jobs/{job_id}/artifacts/{name}
+    artifacts = artifact_store.job_artifacts(job_id, job_dir)
+
+    # Progressive HLS stream, playable while later scenes are still rendering
+    if os.path.exists(os.path.join(job_dir, "final", "index.m3u8")):
+        artifacts["stream_url"] = f"/hls/{job_id}/index.m3u8"
+
+    return artifacts
+
 @app.get("/status/{job_id}", response_model=JobStatus)
 async def get_status(job_id: str):
     # Check if job exists on disk
@@ -86,43 +154,158 @@ async def get_status(job_id: str):
     if not os.path.exists(job_dir):
          raise HTTPException(status_code=404, detail="Job not found")
 
-    # In a real app we'd check DB/Redis. For MVP, we might infer or retrieve from a status file.
-    # For now, let's just return a placeholder. We will implement status tracking via Redis/File later.
-    status_file = os.path.join(job_dir, "status.json")
-    if os.path.exists(status_file):
-        with open(status_file, "r") as f:
-             data = json.load(f)
-             
+    data = await read_status(job_id, job_dir)
+    if data:
         # Enhance with artifacts if available
-        artifacts = {}
-        
-        script_path = os.path.join(job_dir, "script.txt")
-        if os.path.exists(script_path):
-            with open(script_path, "r") as f:
-                artifacts["script"] = f.read()
-                
-        bible_path = os.path.join(job_dir, "bible.json")
-        if os.path.exists(bible_path):
-            with open(bible_path, "r") as f:
-                try:
-                    artifacts["bible"] = json.load(f)
-                except:
-                    pass
-        
-        character_path = os.path.join(job_dir, "assets", "character.png")
-        if os.path.exists(character_path):
-            import base64
-            with open(character_path, "rb") as img_f:
-                b64_str = base64.b64encode(img_f.read()).decode("utf-8")
-                artifacts["character_image"] = f"data:image/png;base64,{b64_str}"
-        
+        artifacts = job_artifacts(job_id, job_dir)
         if artifacts:
             data["artifacts"] = artifacts
-            
+
         return data
              
     return {"job_id": job_id, "status": "queued", "progress_current": 0, "progress_total": 0, "message": "Job queued"}
 
+async def status_events(job_id: str, job_dir: str, last_version=None):
+    """Server-sent status events: the current status, then each change, until a terminal status."""
+    pubsub = status_redis().pubsub()
+    try:
+        # Subscribe before the first read so no change can slip in between
+        await pubsub.subscribe(job_status.events_channel(job_id))
+    except redis.RedisError as e:
+        logger.warning(f"Job events Redis unavailable ({e}); polling {job_id} status.json")
+        pubsub = None
+    last_sent = time.monotonic()
+    try:
+        while True:
+            data = await read_status(job_id, job_dir)
+            if data and str(data.get("version")) != str(last_version):
+                last_version = data.get("version")
+                last_sent = time.monotonic()
+                # Same shape as /status
+                artifacts = job_artifacts(job_id, job_dir)
+                if artifacts:
+                    data["artifacts"] = artifacts
+                yield f"id: {last_version}\nevent: status\ndata: {json.dumps(data)}\n\n"
+                if data.get("status") in job_status.TERMINAL_STATUSES:
+                    return
+            elif time.monotonic() - last_sent >= EVENTS_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+            if pubsub is None:
+                await asyncio.sleep(EVENTS_POLL_SECONDS)
+                continue
+            try:
+                # Any message means a new version; the loop re-reads the hash, so bursts coalesce
+                await pubsub.get_message(ignore_subscribe_messages=True, timeout=EVENTS_KEEPALIVE_SECONDS)
+            except redis.RedisError as e:
+                logger.warning(f"Job events Redis unavailable ({e}); polling {job_id} status.json")
+                pubsub = None
+    finally:
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except redis.RedisError:
+                pass
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    if not os.path.exists(job_dir):
+        raise HTTPException(status_code=404, detail="Job not found")
+    # EventSource resends the last id it saw when it reconnects; don't repeat that status
+    events = status_events(job_id, job_dir, last_version=request.headers.get("last-event-id"))
+    # no-transform: gzip in a proxy (e.g. the Next.js rewrite) would buffer the stream
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"})
+
+@app.post("/jobs/{job_id}/promote", response_model=JobResponse)
+async def promote_job(job_id: str):
+    # Re-render an approved preview at final quality, reusing its scene layouts
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    if not os.path.exists(job_dir):
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not os.path.exists(os.path.join(job_dir, "render_plan.json")):
+        raise HTTPException(status_code=409, detail="Job has no approved scene layouts yet")
+
+    # Leave preview_ready now, so a client watching /events doesn't stop at the old status
+    job_status.write(job_id, job_dir, {"job_id": job_id, "status": "queued", "progress_current": 0, "progress_total": 100, "message": "Final render queued"})
+    celery_app.send_task("tasks.promote_job", args=[job_id])
+    
+    return {"job_id": job_id, "status": "queued"}
+
+@app.patch("/jobs/{job_id}/scenes/{scene_id}", response_model=SceneLayout)
+async def edit_scene(job_id: str, scene_id: int, patch: SceneLayoutPatch):
+    # Edit one approved scene and re-render just that scene; no agents are re-run
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    if not os.path.exists(job_dir):
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not os.path.exists(os.path.join(job_dir, "render_plan.json")):
+        raise HTTPException(status_code=409, detail="Job has no approved scene layouts yet")
+    scene_path = os.path.join(job_dir, "scenes", f"{scene_id:03d}.json")
+    if not os.path.exists(scene_path):
+        raise HTTPException(status_code=404, detail="Scene not found")
+
+    with open(scene_path, "r") as f:
+        scene = SceneLayout.model_validate_json(f.read())
+    scene = scene.model_copy(update=patch.model_dump(exclude_unset=True, exclude_none=True))
+    
+    # The worker reads this file; replace it whole so it never sees a partial write
+    tmp_path = f"{scene_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(scene.model_dump_json(indent=2))
+    os.replace(tmp_path, scene_path)
+
+    celery_app.send_task("tasks.rerender_scene", args=[job_id, scene_id])
+    
+    return scene
+
+@app.get("/jobs/{job_id}/artifacts/{name}")
+async def get_artifact(job_id: str, name: str, request: Request, v: str = None):
+    if name not in artifact_store.ARTIFACTS:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    path = artifact_store.artifact_path(os.path.join(JOBS_DIR, job_id), name)
+    version = artifact_store.version(path)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Artifact not ready")
+
+    etag = artifact_store.etag(version)
+    headers = {"ETag": etag, "Cache-Control": artifact_store.cache_control(v, version)}
+    if artifact_store.not_modified(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    from fastapi.responses import FileResponse
+    return FileResponse(path, media_type=artifact_store.ARTIFACTS[name][1], headers=headers)
+
+@app.get("/preview/{job_id}")
+async def download_preview(job_id: str):
+    preview_path = os.path.join(JOBS_DIR, job_id, "final", "preview.mp4")
+    if not os.path.exists(preview_path):
+        raise HTTPException(status_code=404, detail="Preview not ready")
+        
+    from fastapi.responses import FileResponse
+    return FileResponse(preview_path, media_type="video/mp4", filename=f"cartoon_{job_id}_preview.mp4")
+
+@app.get("/hls/{job_id}/index.m3u8")
+async def stream_playlist(job_id: str):
+    playlist_path = os.path.join(JOBS_DIR, job_id, "final", "index.m3u8")
+    if not os.path.exists(playlist_path):
+        raise HTTPException(status_code=404, detail="Stream not started")
+    
+    from fastapi.responses import FileResponse
+    # Grows as scenes finish (and is rewritten after an edit), so players must always revalidate
+    return FileResponse(playlist_path, media_type="application/vnd.apple.mpegurl", headers={"Cache-Control": "no-cache"})
+
+@app.get("/hls/{job_id}/segments/{segment}")
+async def stream_segment(job_id: str, segment: str):
+    if os.path.basename(segment) != segment or not segment.endswith(".ts"):
+        raise HTTPException(status_code=404, detail="Segment not found")
+    segment_path = os.path.join(JOBS_DIR, job_id, "final", "segments", segment)
+    if not os.path.exists(segment_path):
+        raise HTTPException(status_code=404, detail="Segment not found")
+    
+    from fastapi.responses import FileResponse
+    # Segment names include the render cache key, so their content never changes
+    return FileResponse(segment_path, media_type="video/mp2t", headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
 @app.get("/download/{job_id}")
 async def download_video(job_id: str):
     final_path = os.path.join(JOBS_DIR, job_id, "final", "final.mp4")
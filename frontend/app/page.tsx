@@ -1,7 +1,7 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { submitJob, getJobStatus, getDownloadUrl, submitCharacterGen } from '@/lib/api';
+import { submitJob, watchJobStatus, getArtifactText, getDownloadUrl, getPreviewUrl, promoteJob, submitCharacterGen } from '@/lib/api';
 
 export default function Home() {
     // Workflow State
@@ -12,11 +12,14 @@ export default function Home() {
     const [charJobId, setCharJobId] = useState<string | null>(null);
     const [charStatus, setCharStatus] = useState<any>(null);
     const [charImage, setCharImage] = useState<string | null>(null);
+    const [charThumb, setCharThumb] = useState<string | null>(null);
 
     // Story Step State
     const [story, setStory] = useState('');
     const [jobId, setJobId] = useState<string | null>(null);
     const [status, setStatus] = useState<any>(null);
+    const [script, setScript] = useState<string | null>(null);
+    const [pollKey, setPollKey] = useState(0);
 
     // UI Loading States
     const [loading, setLoading] = useState(false);
@@ -37,31 +40,27 @@ export default function Home() {
         }
     };
 
-    // Poll for Character Status
+    // Watch Character Status
     useEffect(() => {
         if (!charJobId) return;
 
-        const interval = setInterval(async () => {
-            try {
-                const res = await getJobStatus(charJobId);
-                setCharStatus(res);
+        const stop = watchJobStatus(charJobId, (res) => {
+            setCharStatus(res);
 
-                // Check if image is ready in artifacts
-                if (res.artifacts?.character_image) {
-                    setCharImage(res.artifacts.character_image);
-                    setLoading(false);
-                    clearInterval(interval);
-                } else if (res.status === 'failed') {
-                    setError("Character generation failed. Please try again.");
-                    setLoading(false);
-                    clearInterval(interval);
-                }
-            } catch (err) {
-                console.error(err);
+            // Check if image is ready in artifacts
+            if (res.artifacts?.character_url) {
+                setCharImage(res.artifacts.character_url);
+                setCharThumb(res.artifacts.character_thumb_url ?? res.artifacts.character_url);
+                setLoading(false);
+                stop();
+            } else if (res.status === 'failed') {
+                setError("Character generation failed. Please try again.");
+                setLoading(false);
+                stop();
             }
-        }, 1500);
+        });
 
-        return () => clearInterval(interval);
+        return stop;
     }, [charJobId]);
 
     // --- STEP 2: Story Generation ---
@@ -78,25 +77,40 @@ export default function Home() {
         }
     };
 
-    // Poll for Video Status
+    // Watch Video Status
     useEffect(() => {
         if (!jobId) return;
 
-        const interval = setInterval(async () => {
-            try {
-                const res = await getJobStatus(jobId);
-                setStatus(res);
-                if (["completed", "failed"].includes(res.status)) {
-                    clearInterval(interval);
-                    setLoading(false);
-                }
-            } catch (err) {
-                console.error(err);
+        const stop = watchJobStatus(jobId, (res) => {
+            setStatus(res);
+            if (["completed", "failed", "preview_ready"].includes(res.status)) {
+                stop();
+                setLoading(false);
             }
-        }, 2000);
+        });
 
-        return () => clearInterval(interval);
-    }, [jobId]);
+        return stop;
+    }, [jobId, pollKey]);
+
+    // The script is fetched once per version, not re-sent with every status
+    const scriptUrl = status?.artifacts?.script_url;
+    useEffect(() => {
+        if (!scriptUrl) return;
+        getArtifactText(scriptUrl).then(setScript).catch((err) => console.error(err));
+    }, [scriptUrl]);
+
+    const handlePromote = async () => {
+        if (!jobId) return;
+        setLoading(true);
+        setError(null);
+        try {
+            await promoteJob(jobId);
+            setPollKey((k) => k + 1); // Watch again for the final render
+        } catch (err: any) {
+            setError(err.message);
+            setLoading(false);
+        }
+    };
 
     return (
         <main className="min-h-screen bg-neutral-900 text-white flex flex-col items-center justify-center p-8 font-sans">
@@ -171,7 +185,7 @@ export default function Home() {
                 {step === 'story' && !jobId && (
                     <div className="space-y-6 animate-in fade-in slide-in-from-right-8">
                         <div className="flex items-center gap-4 bg-neutral-900/50 p-4 rounded-xl border border-neutral-700">
-                            <img src={charImage!} className="w-16 h-16 rounded object-cover border border-neutral-600" />
+                            <img src={charThumb!} className="w-16 h-16 rounded object-cover border border-neutral-600" />
                             <div>
                                 <p className="text-sm text-neutral-400 uppercase font-bold">Locked Character</p>
                                 <p className="text-neutral-200 text-sm line-clamp-1">{charPrompt}</p>
@@ -230,17 +244,47 @@ export default function Home() {
                         {/* Agent Outputs - Restored for transparency */}
                         {status.artifacts && (
                             <div className="space-y-4">
-                                {status.artifacts.script && (
+                                {script && (
                                     <div className="bg-neutral-900/50 rounded-xl p-4 border border-neutral-700">
                                         <h3 className="text-sm font-bold text-neutral-400 uppercase mb-2">📜 Generated Script</h3>
                                         <div className="max-h-40 overflow-y-auto text-xs font-mono text-neutral-300 whitespace-pre-wrap bg-black/20 p-2 rounded">
-                                            {status.artifacts.script}
+                                            {script}
                                         </div>
                                     </div>
                                 )}
                             </div>
                         )}
 
+                        {status.artifacts?.stream_url && ['rendering', 'assembling'].includes(status.status) && (
+                            <div className="mt-8 p-4 bg-neutral-900/50 border border-neutral-700 rounded-xl flex flex-col items-center">
+                                <p className="mb-4 text-neutral-300 font-bold">📺 Watch while it renders</p>
+                                {/* HLS plays natively in Safari; other browsers wait for the finished MP4 */}
+                                <video
+                                    controls
+                                    className="w-full rounded-lg shadow-lg border border-neutral-700"
+                                    src={status.artifacts.stream_url}
+                                />
+                            </div>
+                        )}
+
+                        {status.status === 'preview_ready' && (
+                            <div className="mt-8 p-4 bg-blue-900/30 border border-blue-500/50 rounded-xl flex flex-col items-center animate-in zoom-in duration-300">
+                                <p className="mb-4 text-blue-300 font-bold">👀 Draft preview ready</p>
+                                <video
+                                    controls
+                                    className="w-full rounded-lg shadow-lg mb-4 border border-neutral-700"
+                                    src={getPreviewUrl(jobId)}
+                                />
+                                <button
+                                    onClick={handlePromote}
+                                    disabled={loading}
+                                    className="px-8 py-3 bg-blue-600 hover:bg-blue-500 rounded-lg font-bold shadow-lg transition-colors disabled:opacity-50"
+                                >
+                                    Looks good, render final quality
+                                </button>
+                            </div>
+                        )}
+
                         {status.status === 'completed' && (
                             <div className="mt-8 p-4 bg-green-900/30 border border-green-500/50 rounded-xl flex flex-col items-center animate-in zoom-in duration-300">
                                 <p className="mb-4 text-green-300 font-bold">🎉 Your video is ready!</p>
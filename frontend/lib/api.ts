@@ -1,8 +1,8 @@
 // Since we are using Next.js rewrites, we can simply call the relative path.
 // This works because the Next.js server (frontend) will proxy the request to the backend.
 
-export async function submitJob(story: string, characterJobId?: string | null) {
-    const body: any = { story };
+export async function submitJob(story: string, characterJobId?: string | null, renderMode: 'preview' | 'final' = 'preview') {
+    const body: any = { story, render_mode: renderMode };
     if (characterJobId) body.character_job_id = characterJobId;
 
     const res = await fetch(`/generate`, {
@@ -30,6 +30,41 @@ export async function getJobStatus(jobId: string) {
     return res.json();
 }
 
+// Pushes every status change of a job (server-sent events) until the returned function is called.
+// EventSource reconnects on its own after network errors and resumes from the last status it saw.
+export function watchJobStatus(jobId: string, onStatus: (status: any) => void) {
+    const events = new EventSource(`/jobs/${jobId}/events`);
+    events.addEventListener("status", (e) => onStatus(JSON.parse((e as MessageEvent).data)));
+    return () => events.close();
+}
+
+// Artifact URLs from the status carry ?v=<version>, so the browser caches each version for good
+export async function getArtifactText(url: string) {
+    const res = await fetch(url);
+    if (!res.ok) throw new Error("Failed to get artifact");
+    return res.text();
+}
+
+export async function promoteJob(jobId: string) {
+    const res = await fetch(`/jobs/${jobId}/promote`, { method: "POST" });
+    if (!res.ok) throw new Error("Failed to start final render");
+    return res.json();
+}
+
+export async function editScene(jobId: string, sceneId: number, changes: Record<string, any>) {
+    const res = await fetch(`/jobs/${jobId}/scenes/${sceneId}`, {
+        method: "PATCH",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(changes),
+    });
+    if (!res.ok) throw new Error("Failed to edit scene");
+    return res.json();
+}
+
 export function getDownloadUrl(jobId: string) {
     return `/download/${jobId}`;
 }
+
+export function getPreviewUrl(jobId: string) {
+    return `/preview/${jobId}`;
+}
@@ -20,6 +20,18 @@ const nextConfig: NextConfig = {
         source: '/download/:path*',
         destination: 'http://127.0.0.1:8000/download/:path*',
       },
+      {
+        source: '/preview/:path*',
+        destination: 'http://127.0.0.1:8000/preview/:path*',
+      },
+      {
+        source: '/hls/:path*',
+        destination: 'http://127.0.0.1:8000/hls/:path*',
+      },
+      {
+        source: '/jobs/:path*',
+        destination: 'http://127.0.0.1:8000/jobs/:path*',
+      },
     ];
   },
 };
@@ -0,0 +1,143 @@
+import os
+import json
+import fcntl
+import logging
+import tempfile
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Job status shared by the worker (writer) and the API (readers). Redis holds the live
+# copy: one hash per job, replaced atomically together with a version bump and a pub/sub
+# notification, so /status and /jobs/{id}/events never touch the disk. status.json is
+# written after Redis as a snapshot, and is read only when Redis has no entry for the job
+# (expired, flushed, or unreachable).
+JOB_STATUS_REDIS_URL = os.getenv("JOB_STATUS_REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0"))
+JOB_STATUS_TTL_SECONDS = int(os.getenv("JOB_STATUS_TTL_SECONDS", str(7 * 24 * 3600)))
+KEY_PREFIX = "job:"
+STATUS_FILE = "status.json"
+LOCK_NAME = ".status.lock"
+# Statuses after which a job changes no further unless resubmitted (e.g. promoted)
+TERMINAL_STATUSES = ("completed", "failed", "preview_ready")
+
+# Replaces the job's fields, bumps its version and notifies subscribers with the version.
+# ARGV: ttl, then field/value pairs (values JSON-encoded).
+WRITE_SCRIPT = """
+local key, channel = KEYS[1], KEYS[2]
+local version = tonumber(redis.call('HGET', key, 'version') or '0') + 1
+redis.call('DEL', key)
+redis.call('HSET', key, 'version', version, unpack(ARGV, 2))
+redis.call('EXPIRE', key, tonumber(ARGV[1]))
+redis.call('PUBLISH', channel, version)
+return version
+"""
+
+_client = None
+_write_script = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(JOB_STATUS_REDIS_URL, socket_timeout=2)
+    return _client
+
+
+def set_client(client):
+    """Points the store at another Redis (tests use fakeredis)."""
+    global _client, _write_script
+    _client = client
+    _write_script = None
+
+
+def status_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}{job_id}:status"
+
+
+def events_channel(job_id: str) -> str:
+    return f"{KEY_PREFIX}{job_id}:events"
+
+
+def _locked(job_dir: str):
+    f = open(os.path.join(job_dir, LOCK_NAME), "a")
+    fcntl.flock(f, fcntl.LOCK_EX)
+    return f
+
+
+def _write_snapshot(job_dir: str, data: dict):
+    path = os.path.join(job_dir, STATUS_FILE)
+    # Readers may fall back to this file at any moment; never let them see half of it
+    fd, tmp_path = tempfile.mkstemp(dir=job_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_snapshot(job_dir: str) -> dict:
+    try:
+        with open(os.path.join(job_dir, STATUS_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def decode(fields: dict) -> dict:
+    """A job status from its Redis hash (bytes keys, JSON-encoded values)."""
+    data = {}
+    for key, value in fields.items():
+        key = key.decode() if isinstance(key, bytes) else key
+        data[key] = json.loads(value)
+    return data
+
+
+def _write_locked(job_id: str, job_dir: str, data: dict) -> dict:
+    global _write_script
+    data = {key: value for key, value in data.items() if key != "version"}
+    try:
+        if _write_script is None:
+            _write_script = get_client().register_script(WRITE_SCRIPT)
+        args = [JOB_STATUS_TTL_SECONDS]
+        for key, value in data.items():
+            args += [key, json.dumps(value)]
+        data["version"] = int(_write_script(keys=[status_key(job_id), events_channel(job_id)], args=args))
+    except redis.RedisError as e:
+        logger.warning(f"Job status Redis unavailable ({e}); {job_id} status written to disk only")
+        data["version"] = read_snapshot(job_dir).get("version", 0) + 1
+    _write_snapshot(job_dir, data)
+    return data
+
+
+def write(job_id: str, job_dir: str, data: dict) -> dict:
+    """Publishes a new status for the job, then snapshots it to disk. Returns it with its version."""
+    # Stages of one job write concurrently from separate processes; holding the job's lock
+    # across both writes keeps the snapshot in the same order as the Redis versions
+    with _locked(job_dir):
+        return _write_locked(job_id, job_dir, data)
+
+
+def update(job_id: str, job_dir: str, change) -> dict:
+    """
+    Read-modify-write under the job's lock: change(current status) returns the new status,
+    or None to leave it as it is. Returns what was written (or None).
+    """
+    with _locked(job_dir):
+        data = change(read(job_id, job_dir))
+        return _write_locked(job_id, job_dir, data) if data is not None else None
+
+
+def read(job_id: str, job_dir: str) -> dict:
+    """The job's current status: Redis, else the status.json snapshot, else {}."""
+    try:
+        fields = get_client().hgetall(status_key(job_id))
+        if fields:
+            return decode(fields)
+    except redis.RedisError as e:
+        logger.warning(f"Job status Redis unavailable ({e}); reading {job_id} from disk")
+    return read_snapshot(job_dir)
@@ -15,6 +15,9 @@ class JobRequest(BaseModel):
     subtitles: bool = True
     voice: VoiceConfig = Field(default_factory=VoiceConfig)
     character_job_id: Optional[str] = None # Link to pre-generated character
+    render_profile: Optional[Literal["draft", "standard", "hd"]] = None # Overrides the editor plan
+    render_mode: Literal["preview", "final"] = "final" # "preview" renders a fast low-res draft first
+    bypass_llm_cache: bool = False # Force fresh agent calls instead of cached responses
 
 class CharacterRequest(BaseModel):
     prompt: str = "A friendly robot"
@@ -30,6 +33,8 @@ class JobStatus(BaseModel):
     progress_total: int
     message: Optional[str] = None
     artifacts: Optional[dict] = None
+    dirty_scenes: Optional[List[int]] = None # Edited scenes still re-rendering
+    version: Optional[int] = None # Bumped on every status change
 
 # --- Agent Output Schemas ---
 
@@ -71,10 +76,34 @@ class SceneLayout(BaseModel):
     sfx: List[str] = []
     music_mood: str
 
+class SceneLayoutBatch(BaseModel):
+    # Batched layout response; items are validated one by one so a bad scene doesn't sink the batch
+    scenes: List[dict]
+
+class SceneLayoutPatch(BaseModel):
+    # Partial SceneLayout for PATCH /jobs/{job_id}/scenes/{scene_id}; unset fields keep their value
+    duration: Optional[int] = Field(default=None, gt=0)
+    location: Optional[str] = None
+    camera: Optional[str] = None
+    action: Optional[str] = None
+    emotion: Optional[str] = None
+    dialogue: Optional[str] = None
+    sfx: Optional[List[str]] = None
+    music_mood: Optional[str] = None
+
 class SceneLayoutValidation(BaseModel):
     issues_found: List[str]
     fixed_scenes: List[SceneLayout]
 
+class RenderProfile(BaseModel):
+    name: str = "standard"
+    width: int = 1280
+    height: int = 720
+    fps: int = 24
+    preset: str = "ultrafast" # x264 preset
+    crf: int = 23
+    pix_fmt: str = "yuv420p"
+
 class EditorPlan(BaseModel):
     resolution: str = "1920x1080"
     fps: int = 30
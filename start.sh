@@ -19,6 +19,8 @@ cd backend
 # Run with uvicorn in background, logging to file
 # Run with uvicorn in background, but log to stdout for debugging
 # Run with uvicorn in background, with unbuffered output
+# /metrics also reports the worker's multiprocess metric files
+export WORKER_METRICS_DIR=${WORKER_METRICS_DIR:-/tmp/metrics/worker}
 PYTHONUNBUFFERED=1 uvicorn main:app --host 127.0.0.1 --port 8000 >&2 &
 cd ..
 
@@ -27,7 +29,11 @@ echo "👷 Starting Worker..."
 cd worker
 # Run celery in background
 # Run celery in background, logging to stderr (unbuffered)
-PYTHONUNBUFFERED=1 celery -A tasks worker --loglevel=info --concurrency=2 >&2 &
+# One process per core (at least 2 so agent calls aren't starved); renders are admitted
+# against RENDER_MEMORY_BUDGET_MB and pick x264 threads from the free cores (admission.py)
+CORES=$(nproc)
+WORKER_CONCURRENCY=${WORKER_CONCURRENCY:-$(( CORES > 2 ? CORES : 2 ))}
+PROMETHEUS_MULTIPROC_DIR=$WORKER_METRICS_DIR PYTHONUNBUFFERED=1 celery -A tasks worker --loglevel=info --concurrency=$WORKER_CONCURRENCY -O fair >&2 &
 cd ..
 
 # 5. Start Frontend (Next.js) in foreground (this keeps container alive)
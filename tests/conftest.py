@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Worker modules import their siblings as top-level modules (the worker
+# container runs from inside worker/), so make that directory importable.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "worker"))
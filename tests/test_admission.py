@@ -0,0 +1,66 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from worker import admission
+from shared.schemas.schemas import SceneLayout, RenderProfile
+
+
+def _scene(duration=10, dialogue="Hello!"):
+    return SceneLayout(scene_id=1, duration=duration, location="park", camera="wide", action="idle",
+                       emotion="happy", dialogue=dialogue, music_mood="calm")
+
+
+class TestAdmission(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.ledger = os.path.join(self.tmp.name, "admission.json")
+        for name, value in (("ADMISSION_FILE", self.ledger), ("MEMORY_BUDGET_MB", 512)):
+            patcher = patch.object(admission, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cost = admission.estimate_render([_scene()], RenderProfile(), 500)
+
+    def _seed(self, pid, memory, threads):
+        with open(self.ledger, "w") as f:
+            json.dump({"other": {"pid": pid, "memory": memory, "threads": threads, "label": "other"}}, f)
+
+    def test_estimate_scales_with_resolution_duration_and_layers(self):
+        hd = admission.estimate_render([_scene()], RenderProfile(width=1920, height=1080), 500)
+        self.assertGreater(hd["frame_memory"], self.cost["frame_memory"])
+        self.assertGreater(admission.memory_for_threads(self.cost, 4), admission.memory_for_threads(self.cost, 1))
+
+        longer = admission.estimate_render([_scene(duration=20)], RenderProfile(), 500)
+        self.assertAlmostEqual(longer["cpu_seconds"], 2 * self.cost["cpu_seconds"])
+        silent = admission.estimate_render([_scene(dialogue="")], RenderProfile(), 500)
+        self.assertLess(silent["cpu_seconds"], self.cost["cpu_seconds"])
+
+    @patch.object(admission, "host_cores", return_value=8)
+    def test_threads_come_from_free_cores(self, _):
+        self._seed(os.getpid(), 0, 6)
+        with admission.admit(self.cost) as threads:
+            self.assertEqual(threads, 2)
+        with open(self.ledger) as f:
+            self.assertEqual(list(json.load(f)), ["other"])
+
+    @patch.object(admission, "host_cores", return_value=4)
+    def test_full_host_waits_and_dead_reservations_are_dropped(self, _):
+        self._seed(os.getpid(), 512 * 1024 ** 2, 1)
+        self.assertIsNone(admission.try_acquire(self.cost))
+
+        # A reservation left behind by a killed worker doesn't block the host
+        dead = os.fork()
+        if dead == 0:
+            os._exit(0)
+        os.waitpid(dead, 0)
+        self._seed(dead, 512 * 1024 ** 2, 1)
+        reservation = admission.try_acquire(self.cost)
+        self.assertIsNotNone(reservation)
+        admission.release(reservation["token"])
+
+
+if __name__ == "__main__":
+    unittest.main()
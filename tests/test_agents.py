@@ -0,0 +1,149 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from worker import agents
+from shared.schemas.schemas import SeriesBible, SceneLayout, SceneLayoutBatch
+
+
+def make_bible():
+    return SeriesBible(
+        character={"name": "Bolt", "outfit": "red scarf", "appearance_rules": ["round head"]},
+        style={"rules": ["flat colors"]},
+        locations=["home", "street"],
+        props=["box"],
+        motion_library=["idle", "walk_in"],
+        camera_styles=["wide"],
+    )
+
+
+def layout(scene_id, **overrides):
+    data = dict(scene_id=scene_id, duration=5, location="home", camera="wide", action="idle",
+                emotion="happy", dialogue="Hi!", music_mood="calm")
+    data.update(overrides)
+    return data
+
+
+class TestSceneLayoutBatch(unittest.TestCase):
+    @patch.object(agents, "scene_layout_agent")
+    @patch.object(agents, "call_gemini_json")
+    def test_one_call_for_all_scenes_and_fallback_for_bad_items(self, mock_call, mock_single):
+        items = [{"scene_id": i, "duration": 5, "location": "home", "beats": "beat"} for i in (1, 2, 3)]
+        # Scene 2 comes back without required fields, scene 3 with a renumbered id
+        mock_call.return_value = SceneLayoutBatch(scenes=[layout(1), {"scene_id": 2, "dialogue": "?"}, layout(9)])
+        mock_single.return_value = SceneLayout(**layout(2, dialogue="fixed"))
+
+        layouts = agents.scene_layout_batch_agent(items, make_bible(), "SCRIPT")
+
+        self.assertEqual(mock_call.call_count, 1)
+        mock_single.assert_called_once()
+        self.assertEqual(mock_single.call_args[0][0]["scene_id"], 2)
+        self.assertEqual([l.scene_id for l in layouts], [1, 2, 3])
+        self.assertEqual(layouts[1].dialogue, "fixed")
+
+    @patch.object(agents, "scene_layout_agent")
+    @patch.object(agents, "call_gemini_json")
+    def test_failed_batch_falls_back_per_scene(self, mock_call, mock_single):
+        items = [{"scene_id": i, "duration": 5, "location": "home", "beats": "beat"} for i in (1, 2)]
+        mock_call.side_effect = agents.AgentError("bad json")
+        mock_single.side_effect = lambda item, bible, script: SceneLayout(**layout(item["scene_id"]))
+
+        layouts = agents.scene_layout_batch_agent(items, make_bible(), "SCRIPT")
+
+        self.assertEqual([l.scene_id for l in layouts], [1, 2])
+        self.assertEqual(mock_single.call_count, 2)
+
+    @patch.object(agents, "call_gemini_json")
+    def test_fallback_keeps_manifest_ids_when_model_repeats_one(self, mock_call):
+        items = [{"scene_id": i, "duration": 5, "location": "home", "beats": "beat"} for i in (1, 2)]
+
+        def respond(prompt, schema_cls):
+            if schema_cls is SceneLayoutBatch:
+                raise agents.AgentError("bad json")
+            # Every single-scene answer claims to be scene 1
+            return SceneLayout(**layout(1))
+        mock_call.side_effect = respond
+
+        layouts = agents.scene_layout_batch_agent(items, make_bible(), "SCRIPT")
+
+        self.assertEqual([l.scene_id for l in layouts], [1, 2])
+
+
+class TestPromptContext(unittest.TestCase):
+    def test_bible_context_keeps_only_agent_fields(self):
+        ctx = json.loads(agents.bible_context(make_bible(), "continuity_supervisor"))
+
+        self.assertEqual(set(ctx), {"locations", "motion_library", "camera_styles"})
+        self.assertNotIn(" ", agents.bible_context(make_bible(), "scene_layout"))
+
+    def test_schema_text_built_once_per_class(self):
+        with patch.object(SceneLayout, "model_json_schema", wraps=SceneLayout.model_json_schema) as mock_schema:
+            agents.schema_prompt.cache_clear()
+            first = agents.json_prompt("A", SceneLayout)
+            second = agents.json_prompt("B", SceneLayout)
+
+        self.assertEqual(mock_schema.call_count, 1)
+        self.assertEqual(first[1:], second[1:])
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+def streamed(text, size=5):
+    for i in range(0, len(text), size):
+        yield Chunk(text[i:i + size])
+
+
+MANIFEST = '{"total_duration": 10, "scenes": [{"scene_id": 1, "duration": 5, "location": "home", "beats": "a"}, ' \
+           '{"scene_id": 2, "duration": 5, "location": "street", "beats": "b"}]}'
+
+
+class TestStreamedDirector(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(agents.llm_cache, "get", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(agents.llm_cache, "put")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch.object(agents, "generate_content")
+    def test_scenes_handed_over_before_stream_ends(self, mock_generate):
+        consumed = []
+
+        def chunks():
+            for chunk in streamed(MANIFEST):
+                consumed.append(chunk.text)
+                yield chunk
+        mock_generate.return_value = chunks()
+        seen = []
+
+        manifest = agents.episode_director_agent("SCRIPT", make_bible(),
+                                                 on_scene=lambda item: seen.append((item.scene_id, len("".join(consumed)))))
+
+        self.assertTrue(mock_generate.call_args[1]["stream"])
+        self.assertEqual([scene_id for scene_id, _ in seen], [1, 2])
+        self.assertLess(seen[0][1], len(MANIFEST))
+        self.assertEqual([s.scene_id for s in manifest.scenes], [1, 2])
+
+    @patch.object(agents, "call_gemini_json")
+    @patch.object(agents, "generate_content")
+    def test_broken_stream_keeps_handed_over_scenes(self, mock_generate, mock_call):
+        def chunks():
+            yield from streamed(MANIFEST[:MANIFEST.index(", {\"scene_id\": 2")])
+            raise RuntimeError("connection reset")
+        mock_generate.return_value = chunks()
+        mock_call.return_value = agents.SceneManifest.model_validate_json(MANIFEST.replace('"a"', '"other"'))
+        seen = []
+
+        manifest = agents.episode_director_agent("SCRIPT", make_bible(), on_scene=seen.append)
+
+        self.assertEqual([s.scene_id for s in seen], [1, 2])
+        self.assertEqual(manifest.scenes[0].beats, "a")
+        self.assertEqual(manifest.scenes, seen)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+from backend import artifact_store
+
+
+def test_status_lists_versioned_urls_for_existing_artifacts():
+    with tempfile.TemporaryDirectory() as job_dir:
+        with open(os.path.join(job_dir, "script.txt"), "w") as f:
+            f.write("INT. KITCHEN - DAY")
+        artifacts = artifact_store.job_artifacts("j1", job_dir)
+
+        version = artifacts["versions"]["script"]
+        assert artifacts == {"script_url": f"/jobs/j1/artifacts/script?v={version}", "versions": {"script": version}}
+
+        # New content, new version (and so a new URL)
+        with open(os.path.join(job_dir, "script.txt"), "w") as f:
+            f.write("INT. GARDEN - NIGHT")
+        assert artifact_store.job_artifacts("j1", job_dir)["versions"]["script"] != version
+
+
+def test_if_none_match():
+    etag = artifact_store.etag("abc")
+    assert artifact_store.not_modified('"abc"', etag)
+    assert artifact_store.not_modified('"old", W/"abc"', etag)
+    assert artifact_store.not_modified("*", etag)
+    assert not artifact_store.not_modified('"old"', etag)
+    assert not artifact_store.not_modified(None, etag)
+
+
+def test_only_the_current_version_is_cached_for_good():
+    assert artifact_store.cache_control("abc", "abc") == artifact_store.IMMUTABLE
+    assert artifact_store.cache_control("old", "abc") == artifact_store.REVALIDATE
+    assert artifact_store.cache_control(None, "abc") == artifact_store.REVALIDATE
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+from worker import asset_store
+
+
+class TestAssetStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "character.png")
+        img = Image.new("RGBA", (200, 400), (200, 100, 50, 128))
+        img.save(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_image_is_premultiplied_memmap(self):
+        arr = asset_store.load_image(self.path, height=100)
+
+        self.assertIsInstance(arr, np.memmap)
+        self.assertEqual(arr.shape, (100, 50, 4))
+        self.assertFalse(arr.flags.writeable)
+        self.assertEqual(arr[50, 25].tolist(), [100, 50, 25, 128])
+
+    def test_second_load_maps_without_decoding(self):
+        asset_store.load_image(self.path, size=(64, 64))
+        asset_store._open.cache_clear()
+
+        with patch("worker.asset_store._decode") as mock_decode:
+            arr = asset_store.load_image(self.path, size=(64, 64))
+
+        mock_decode.assert_not_called()
+        self.assertEqual(arr.shape, (64, 64, 4))
+
+    def test_changed_asset_replaces_stale_cache(self):
+        asset_store.load_image(self.path, height=100)
+        Image.new("RGBA", (200, 400), (0, 0, 255, 255)).save(self.path)
+        os.utime(self.path, ns=(0, 0))
+
+        arr = asset_store.load_image(self.path, height=100)
+
+        self.assertEqual(arr[0, 0].tolist(), [0, 0, 255, 255])
+        cache_dir = os.path.join(self.tmp.name, asset_store.CACHE_DIRNAME)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_thumbnail_keeps_aspect_ratio(self):
+        self.assertTrue(asset_store.write_thumbnail(self.path, max_side=64))
+
+        with Image.open(os.path.join(self.tmp.name, "character_thumb.png")) as thumb:
+            self.assertEqual(thumb.size, (32, 64))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["character.png", "character_thumb.png"])
+
+    def test_cache_cleanup_spares_assets_with_a_longer_name(self):
+        other = os.path.join(self.tmp.name, "character-alt.png")
+        Image.new("RGBA", (200, 400), (0, 255, 0, 255)).save(other)
+        asset_store.load_image(other, height=100)
+        asset_store.load_image(self.path, height=100)
+
+        cache_dir = os.path.join(self.tmp.name, asset_store.CACHE_DIRNAME)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
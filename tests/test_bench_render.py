@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from worker import bench_render
+
+
+def _results(fps, rss, size=1000):
+    return {"meta": {}, "cases": {"idle_silent": {"fps": fps, "peak_rss_mb": rss, "output_bytes": size}}}
+
+
+def test_cases_cover_every_action_with_and_without_dialogue():
+    cases = bench_render.make_cases(duration=2)
+    assert len(cases) == len(bench_render.ACTIONS) * 2
+    assert {scene.action for scene in cases.values()} == set(bench_render.ACTIONS)
+    assert sum(1 for scene in cases.values() if scene.dialogue) == len(bench_render.ACTIONS)
+
+
+def test_compare_flags_only_regressions_over_threshold():
+    baseline = _results(fps=100, rss=100)
+    assert bench_render.compare(baseline, _results(fps=95, rss=105), threshold=10) == []
+    # Faster and smaller is never a regression
+    assert bench_render.compare(baseline, _results(fps=200, rss=50), threshold=10) == []
+
+    regressions = bench_render.compare(baseline, _results(fps=80, rss=130), threshold=10)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("idle_silent: fps")
+
+    assert bench_render.compare(baseline, {"meta": {}, "cases": {}}, threshold=10) == ["idle_silent: missing from current results"]
+
+
+def test_crashed_case_fails_instead_of_hanging(monkeypatch, tmp_path):
+    def crash(*args):
+        os._exit(3)
+
+    monkeypatch.setattr(bench_render, "_run_case", crash)
+    scene = bench_render.make_cases(duration=1)["idle_silent"]
+    with pytest.raises(RuntimeError, match="exit code 3"):
+        bench_render.run_case(scene, bench_render.renderer.get_profile("standard"), str(tmp_path))
@@ -0,0 +1,78 @@
+from worker import continuity
+from shared.schemas.schemas import SeriesBible, SceneLayout
+
+
+def make_bible():
+    return SeriesBible(
+        character={"name": "Bolt", "outfit": "red scarf", "appearance_rules": []},
+        style={"rules": []},
+        locations=["home", "street", "office", "warehouse"],
+        props=[],
+        motion_library=["idle", "idle_talk", "walk_in", "walk_out", "happy_jump"],
+        camera_styles=["wide", "medium", "close"],
+    )
+
+
+def scene(scene_id, **overrides):
+    data = dict(scene_id=scene_id, duration=5, location="home", camera="wide", action="idle",
+                emotion="happy", dialogue="Hi!", music_mood="calm")
+    data.update(overrides)
+    return SceneLayout(**data)
+
+
+def test_valid_scenes_pass_unchanged():
+    scenes = [scene(1), scene(2, location="street"), scene(3, action="walk_in")]
+
+    validation, unresolved = continuity.validate(scenes, make_bible())
+
+    assert validation.issues_found == []
+    assert unresolved == []
+    assert validation.fixed_scenes == scenes
+
+
+def test_unambiguous_values_fixed_locally():
+    scenes = [
+        scene(1, location="Home", camera="Close-Up", action="idle talk"),
+        scene(2, location="warehose", action="jump"),
+        scene(3, dialogue="We made it. The flower is safe now. Let's plant it by the window before the rain."),
+    ]
+
+    validation, unresolved = continuity.validate(scenes, make_bible())
+    fixed = validation.fixed_scenes
+
+    assert unresolved == []
+    assert (fixed[0].location, fixed[0].action, fixed[0].camera) == ("home", "idle_talk", "close")
+    assert (fixed[1].location, fixed[1].action) == ("warehouse", "happy_jump")
+    assert fixed[2].dialogue == "We made it. The flower is safe now."
+    assert len(validation.issues_found) == 6
+
+
+def test_ambiguous_or_unknown_values_left_for_the_supervisor():
+    # "walk" could be walk_in or walk_out; a kitchen could be any location
+    validation, unresolved = continuity.validate([scene(1, location="kitchen", action="walk")], make_bible())
+
+    assert len(unresolved) == 2
+    assert validation.fixed_scenes[0].location == "kitchen"
+
+
+def test_total_duration_rescaled_to_target():
+    scenes = [scene(1, duration=10), scene(2, duration=10), scene(3, duration=5)]
+
+    validation, _ = continuity.validate(scenes, make_bible(), target_duration=15)
+
+    assert [s.duration for s in validation.fixed_scenes] == [6, 6, 3]
+    assert validation.issues_found == ["Total duration 25s rescaled to 15s"]
+
+
+def test_long_first_sentence_is_cut():
+    short = continuity.shorten_dialogue(" ".join(["word"] * 30))
+
+    assert short == " ".join(["word"] * continuity.DIALOGUE_MAX_WORDS) + "..."
+
+
+def test_all_zero_durations_split_evenly():
+    scenes = [scene(i, duration=0) for i in (1, 2, 3)]
+
+    validation, _ = continuity.validate(scenes, make_bible(), target_duration=15)
+
+    assert [s.duration for s in validation.fixed_scenes] == [5, 5, 5]
@@ -0,0 +1,67 @@
+import os
+import json
+import tempfile
+import unittest
+
+from worker import hls
+
+
+class TestHls(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.job_dir = self.tmp.name
+        self.segments = [
+            {"id": "001", "key": "a" * 64, "duration": 5.0},
+            {"id": "002.part000", "key": "b" * 64, "duration": 8.0},
+            {"id": "002.part001", "key": "c" * 64, "duration": 2.5},
+        ]
+        hls.start(self.job_dir, [dict(s) for s in self.segments])
+
+    def _published(self, segment):
+        # Stands in for the ffmpeg remux in hls.publish
+        path = os.path.join(self.job_dir, "final", "segments", hls.segment_file(segment["id"], segment["key"]))
+        open(path, "wb").close()
+
+    def _playlist(self):
+        with open(os.path.join(self.job_dir, "final", "index.m3u8")) as f:
+            return f.read()
+
+    def test_playlist_lists_finished_prefix_in_order(self):
+        with open(os.path.join(self.job_dir, "final", "segments.json")) as f:
+            starts = [s["start"] for s in json.load(f)["segments"]]
+        self.assertEqual(starts, [0.0, 5.0, 13.0])
+
+        # Scene 2 finishing first can't be listed before scene 1
+        self._published(self.segments[1])
+        hls.start(self.job_dir, [dict(s) for s in self.segments])  # rewrites the playlist
+        self.assertNotIn(".ts", self._playlist())
+
+        self._published(self.segments[0])
+        hls.finish(self.job_dir)
+        playlist = self._playlist()
+        self.assertIn("#EXT-X-TARGETDURATION:8", playlist)
+        self.assertEqual([l for l in playlist.splitlines() if l.endswith(".ts")], [
+            "segments/001-aaaaaaaaaaaa.ts",
+            "segments/002.part000-bbbbbbbbbbbb.ts",
+        ])
+        self.assertTrue(playlist.rstrip().endswith("#EXT-X-ENDLIST"))
+
+    def test_edit_drops_stale_segments_and_reopens_playlist(self):
+        for segment in self.segments:
+            self._published(segment)
+        hls.finish(self.job_dir)
+
+        edited = [dict(s) for s in self.segments]
+        edited[0]["key"] = "d" * 64
+        hls.start(self.job_dir, edited)
+
+        names = os.listdir(os.path.join(self.job_dir, "final", "segments"))
+        self.assertNotIn(hls.segment_file("001", "a" * 64), names)
+        self.assertIn(hls.segment_file("002.part000", "b" * 64), names)
+        self.assertNotIn("#EXT-X-ENDLIST", self._playlist())
+        self.assertNotIn(".ts", self._playlist())
+
+
+if __name__ == "__main__":
+    unittest.main()
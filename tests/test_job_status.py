@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import threading
+
+import pytest
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+from shared import job_status
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def job_dir():
+    job_status.set_client(fakeredis.FakeRedis())
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+    job_status.set_client(None)
+
+
+def test_write_replaces_status_and_notifies_subscribers(job_dir):
+    pubsub = job_status.get_client().pubsub()
+    pubsub.subscribe(job_status.events_channel("j1"))
+    pubsub.get_message(timeout=1)  # subscribe confirmation
+
+    job_status.write("j1", job_dir, {"job_id": "j1", "status": "rendering", "dirty_scenes": [2]})
+    written = job_status.write("j1", job_dir, {"job_id": "j1", "status": "completed", "progress_current": 100})
+
+    assert written["version"] == 2
+    # Fields of the previous status don't linger
+    assert job_status.read("j1", job_dir) == {"version": 2, "job_id": "j1", "status": "completed", "progress_current": 100}
+    assert [pubsub.get_message(timeout=1)["data"] for _ in range(2)] == [b"1", b"2"]
+    with open(os.path.join(job_dir, "status.json")) as f:
+        assert json.load(f)["status"] == "completed"
+
+
+def test_status_json_is_read_when_redis_has_no_entry(job_dir):
+    with open(os.path.join(job_dir, "status.json"), "w") as f:
+        json.dump({"job_id": "j1", "status": "planning", "version": 4}, f)
+    assert job_status.read("j1", job_dir)["status"] == "planning"
+
+
+def test_falls_back_to_disk_when_redis_is_down(job_dir):
+    job_status.set_client(redis.Redis(host="127.0.0.1", port=1, retry=Retry(NoBackoff(), 0)))
+    job_status.write("j1", job_dir, {"job_id": "j1", "status": "planning"})
+    written = job_status.write("j1", job_dir, {"job_id": "j1", "status": "rendering"})
+    assert written["version"] == 2
+    assert job_status.read("j1", job_dir)["status"] == "rendering"
+
+
+def test_concurrent_writers_keep_a_whole_snapshot(job_dir):
+    # design_character and plan_scenes update the same job from separate processes
+    def writer(stage):
+        for i in range(50):
+            job_status.write("j1", job_dir, {"job_id": "j1", "status": "planning", "message": stage, "progress_current": i})
+
+    threads = [threading.Thread(target=writer, args=(stage,)) for stage in ("character", "scenes")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with open(os.path.join(job_dir, "status.json")) as f:
+        assert json.load(f)["version"] == 100
+    assert sorted(os.listdir(job_dir)) == [".status.lock", "status.json"]
+
+
+def test_concurrent_scene_edits_all_stay_dirty(job_dir, monkeypatch):
+    from worker import tasks
+
+    monkeypatch.setattr(tasks, "JOBS_DIR", os.path.dirname(job_dir))
+    job_id = os.path.basename(job_dir)
+    threads = [threading.Thread(target=tasks.mark_scene_dirty, args=(job_id, scene_id, "edit")) for scene_id in range(1, 11)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert tasks.read_job_status(job_id)["dirty_scenes"] == list(range(1, 11))
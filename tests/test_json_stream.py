@@ -0,0 +1,34 @@
+from worker.json_stream import ArrayItemParser
+
+RESPONSE = '```json\n{"total_duration": 15, "note": "a \\"quoted\\" {brace}", "scenes": [' \
+           '{"scene_id": 1, "beats": "Bolt says \\"hi\\" [waves]"}, {"scene_id": 2, "beats": "}{", "tags": {"a": [1]}}' \
+           ']}\n```'
+
+
+def feed_in_chunks(text, size):
+    parser = ArrayItemParser("scenes")
+    per_chunk = [parser.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return per_chunk
+
+
+def test_items_parsed_across_any_chunking():
+    for size in (1, 3, 7, len(RESPONSE)):
+        items = [item for chunk in feed_in_chunks(RESPONSE, size) for item in chunk]
+        assert items == [
+            {"scene_id": 1, "beats": 'Bolt says "hi" [waves]'},
+            {"scene_id": 2, "beats": "}{", "tags": {"a": [1]}},
+        ]
+
+
+def test_item_returned_as_soon_as_it_closes():
+    first_end = RESPONSE.index('}, {"scene_id": 2') + 1
+    parser = ArrayItemParser("scenes")
+
+    assert parser.feed(RESPONSE[:first_end - 1]) == []
+    assert parser.feed(RESPONSE[first_end - 1:first_end]) == [{"scene_id": 1, "beats": 'Bolt says "hi" [waves]'}]
+
+
+def test_other_arrays_ignored():
+    parser = ArrayItemParser("scenes")
+
+    assert parser.feed('{"extra": [{"scene_id": 9}], "scenes": [{"scene_id": 1}]}') == [{"scene_id": 1}]
@@ -0,0 +1,73 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from worker import llm_cache
+
+
+class TestLlmCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.object(llm_cache, "LLM_CACHE_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(llm_cache.set_bypass, False)
+
+    def test_key_covers_model_prompt_config_and_schema(self):
+        key = llm_cache.make_key("m", "prompt", {"response_mime_type": "application/json"}, {"title": "A"})
+        self.assertEqual(key, llm_cache.make_key("m", "prompt", {"response_mime_type": "application/json"}, {"title": "A"}))
+        self.assertNotEqual(key, llm_cache.make_key("other", "prompt", {"response_mime_type": "application/json"}, {"title": "A"}))
+        self.assertNotEqual(key, llm_cache.make_key("m", "prompt!", {"response_mime_type": "application/json"}, {"title": "A"}))
+        self.assertNotEqual(key, llm_cache.make_key("m", "prompt", None, {"title": "A"}))
+        self.assertNotEqual(key, llm_cache.make_key("m", "prompt", {"response_mime_type": "application/json"}, {"title": "B"}))
+
+    def test_round_trip_bypass_and_ttl(self):
+        key = llm_cache.make_key("m", "prompt")
+        self.assertIsNone(llm_cache.get(key))
+        llm_cache.put(key, '{"a": 1}', "m")
+        self.assertEqual(llm_cache.get(key), '{"a": 1}')
+
+        llm_cache.set_bypass(True)
+        self.assertIsNone(llm_cache.get(key))
+        llm_cache.set_bypass(False)
+
+        with patch.object(llm_cache.time, "time", return_value=time.time() + llm_cache.LLM_CACHE_TTL_SECONDS + 1):
+            self.assertIsNone(llm_cache.get(key))
+        self.assertFalse(os.path.exists(llm_cache._entry_path(key)))
+
+    def test_evicts_least_recently_used_over_cap(self):
+        keys = [llm_cache.make_key("m", f"prompt {i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            llm_cache.put(key, "x" * 1000)
+            os.utime(llm_cache._entry_path(key), (i, i))
+        llm_cache.get(keys[0])  # touching an entry makes it most recent
+
+        llm_cache.evict(max_bytes=2500)
+
+        self.assertIsNotNone(llm_cache.get(keys[0]))
+        self.assertIsNone(llm_cache.get(keys[1]))
+        self.assertIsNotNone(llm_cache.get(keys[2]))
+
+    def test_store_scans_the_cache_only_when_over_cap(self):
+        llm_cache.put(llm_cache.make_key("m", "first"), "x" * 1000)  # no counter yet: one scan
+        with patch.object(llm_cache, "LLM_CACHE_MAX_BYTES", 3500), \
+                patch.object(llm_cache, "_entries", wraps=llm_cache._entries) as scans:
+            keys = [llm_cache.make_key("m", f"prompt {i}") for i in range(3)]
+            for key in keys[:2]:
+                llm_cache.put(key, "x" * 1000)
+            self.assertEqual(scans.call_count, 0)
+
+            os.utime(llm_cache._entry_path(llm_cache.make_key("m", "first")), (1, 1))
+            llm_cache.put(keys[2], "x" * 1000)
+            self.assertEqual(scans.call_count, 1)
+
+        self.assertIsNone(llm_cache.get(llm_cache.make_key("m", "first")))
+        on_disk = sum(size for _, size, _ in llm_cache._entries())
+        self.assertEqual(llm_cache._update_total(lambda total: total), on_disk)
+
+
+if __name__ == "__main__":
+    unittest.main()
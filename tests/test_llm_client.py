@@ -0,0 +1,69 @@
+import os
+import tempfile
+
+import pytest
+
+from worker import llm_client
+from worker.agents import json_prompt, parse_json_response
+from shared.schemas.schemas import SceneManifest, SeriesBible
+
+
+class FakeGemini:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def generate_content(self, model_name, prompt, generation_config=None, stream=False):
+        response = self.responses.pop(0)
+        return iter([llm_client.Response(response.text[:5]), llm_client.Response(response.text[5:])]) if stream else response
+
+
+def test_recorded_responses_replay_exactly():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fixtures.jsonl")
+        recorder = llm_client.RecordingClient(FakeGemini([
+            llm_client.Response("a screenplay"),
+            llm_client.Response("", images=[b"\x89PNG..."]),
+            llm_client.Response('{"streamed": true}'),
+        ]), path)
+        recorder.generate_content("text-model", "Write it")
+        recorder.generate_content("image-model", "Draw it")
+        list(recorder.generate_content("text-model", "Stream it", {"response_mime_type": "application/json"}, stream=True))
+
+        replay = llm_client.ReplayClient(path)
+
+        assert replay.generate_content("text-model", "Write it").text == "a screenplay"
+        assert replay.generate_content("image-model", "Draw it").parts[0].inline_data.data == b"\x89PNG..."
+        chunks = replay.generate_content("text-model", "Stream it", {"response_mime_type": "application/json"}, stream=True)
+        assert "".join(chunk.text for chunk in chunks) == '{"streamed": true}'
+
+
+def test_same_template_serves_other_stories():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fixtures.jsonl")
+        recorded = '{"total_duration": 15, "scenes": []}'
+        llm_client.RecordingClient(FakeGemini([llm_client.Response(recorded)]), path).generate_content(
+            "m", json_prompt("Direct this.\nSCRIPT: robot story", SceneManifest))
+
+        replay = llm_client.ReplayClient(path)
+
+        assert replay.generate_content("m", json_prompt("Direct this.\nSCRIPT: cat story", SceneManifest)).text == recorded
+
+
+def test_synthesized_responses_validate():
+    replay = llm_client.ReplayClient()
+
+    for schema_cls in (SeriesBible, SceneManifest):
+        text = replay.generate_content("m", json_prompt("Do it.", schema_cls)).text
+        parse_json_response(text, schema_cls)
+    manifest = parse_json_response(replay.generate_content("m", json_prompt("Do it.", SceneManifest)).text, SceneManifest)
+    assert [s.scene_id for s in manifest.scenes] == [1, 2, 3]
+    assert replay.generate_content("gemini-2.5-flash-image", "Draw").parts[0].inline_data.data.startswith(b"\x89PNG")
+
+
+def test_injected_errors_look_like_rate_limits():
+    from worker import rate_limiter
+    replay = llm_client.ReplayClient(error_rate=1.0, error_kind="429")
+
+    with pytest.raises(llm_client.InjectedError) as exc:
+        replay.generate_content("m", "prompt")
+    assert rate_limiter.is_rate_limit_error(exc.value)
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+from prometheus_client import REGISTRY
+
+# Imported the way the worker modules import it: a second copy as worker.metrics
+# would register every metric twice in the default registry
+import metrics
+
+WORKER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "worker")
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_agent_call_records_time_retries_and_sizes():
+    before = _sample("agent_call_seconds_count", {"agent": "test_agent", "outcome": "ok"})
+    metrics.observe_agent_call("test_agent", 1.5, attempts=3, prompt_chars=2000, response_chars=500)
+    assert _sample("agent_call_seconds_count", {"agent": "test_agent", "outcome": "ok"}) == before + 1
+    assert _sample("agent_call_retries_sum", {"agent": "test_agent"}) >= 2
+    assert _sample("agent_prompt_chars_bucket", {"agent": "test_agent", "le": "4096.0"}) >= 1
+
+
+def test_render_records_fps_and_output_size():
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as f:
+        f.write(b"x" * 3000)
+        f.flush()
+        metrics.observe_render("test_kind", {"seconds": 2.0, "fps": 45.0}, f.name)
+    assert _sample("render_fps_sum", {"kind": "test_kind"}) >= 45.0
+    assert _sample("render_output_bytes_sum", {"kind": "test_kind"}) >= 3000
+
+
+def test_queue_wait_ignores_missing_header():
+    metrics.observe_queue_wait("test_task", None)
+    assert _sample("celery_task_queue_wait_seconds_count", {"task": "test_task"}) == 0
+    metrics.observe_queue_wait("test_task", time.time() - 2)
+    assert _sample("celery_task_queue_wait_seconds_sum", {"task": "test_task"}) >= 2
+
+
+def test_multiprocess_registry_sums_forked_children():
+    # Multiprocess mode is fixed at import, so this runs in a fresh interpreter
+    script = (
+        "import os, metrics\n"
+        "for i in range(3):\n"
+        "    pid = os.fork()\n"
+        "    if pid == 0:\n"
+        "        metrics.JOB_OUTCOMES.labels('completed').inc()\n"
+        "        os._exit(0)\n"
+        "    os.waitpid(pid, 0)\n"
+        "    metrics.process_exited(pid)\n"
+        "print(metrics.registry().get_sample_value('job_outcomes_total', {'outcome': 'completed'}))\n"
+    )
+    with tempfile.TemporaryDirectory() as multiproc_dir:
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=multiproc_dir)
+        result = subprocess.run([sys.executable, "-c", script], cwd=WORKER_DIR, env=env, capture_output=True, text=True, check=True)
+    assert float(result.stdout.strip()) == 3.0
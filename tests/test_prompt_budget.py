@@ -0,0 +1,21 @@
+from worker import prompt_budget
+
+
+def test_estimate_tokens_rounds_up():
+    assert prompt_budget.estimate_tokens("") == 0
+    assert prompt_budget.estimate_tokens("abcde") == 2
+
+
+def test_chunks_respect_input_and_output_budgets():
+    items = list(range(10))
+    # Input: 100 fixed + 50 per item within 400 -> 6 items per chunk
+    chunks = prompt_budget.chunk_by_budget(items, [50] * 10, 100, input_budget=400, output_budget=10_000, output_tokens_per_item=10)
+    assert chunks == [[0, 1, 2, 3, 4, 5], [6, 7, 8, 9]]
+    # Output: 200 per item within 500 -> 2 items per chunk
+    chunks = prompt_budget.chunk_by_budget(items, [1] * 10, 0, input_budget=10_000, output_budget=500, output_tokens_per_item=200)
+    assert [len(c) for c in chunks] == [2, 2, 2, 2, 2]
+
+
+def test_oversized_item_gets_its_own_chunk():
+    chunks = prompt_budget.chunk_by_budget(["a", "huge", "b"], [10, 1000, 10], 0, input_budget=100, output_budget=10_000, output_tokens_per_item=1)
+    assert chunks == [["a"], ["huge"], ["b"]]
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+# The token bucket is a Lua script; fakeredis runs it through lupa (pip install "fakeredis[lua]")
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from worker import rate_limiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        rate_limiter.set_client(fakeredis.FakeRedis(server=self.server))
+        self.addCleanup(rate_limiter.set_client, None)
+        patcher = patch.dict(rate_limiter.RPM_OVERRIDES, {"test-model": 60})  # 1/s, burst of 15
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_goes_out_immediately_then_waits(self):
+        waits = [rate_limiter.try_acquire("test-model") for _ in range(15)]
+        self.assertEqual(waits, [0.0] * 15)
+        wait = rate_limiter.try_acquire("test-model")
+        self.assertGreater(wait, 0.5)
+        self.assertLessEqual(wait, 1.0)
+        # Other models have their own bucket
+        self.assertEqual(rate_limiter.try_acquire("other-model"), 0.0)
+
+    def test_budget_is_shared_across_processes(self):
+        other_worker = fakeredis.FakeRedis(server=self.server)
+        for _ in range(15):
+            self.assertEqual(rate_limiter.try_acquire("test-model"), 0.0)
+        rate_limiter.set_client(other_worker)
+        self.assertGreater(rate_limiter.try_acquire("test-model"), 0.0)
+
+    def test_429_honours_retry_after_then_backs_off_exponentially(self):
+        self.assertEqual(rate_limiter.penalize("test-model", retry_after=30), 30)
+        self.assertGreater(rate_limiter.try_acquire("test-model"), 29)
+
+        self.assertEqual(rate_limiter.penalize("other-model"), rate_limiter.BACKOFF_BASE_SECONDS)
+        self.assertEqual(rate_limiter.penalize("other-model"), rate_limiter.BACKOFF_BASE_SECONDS * 2)
+        rate_limiter.record_success("other-model")
+        self.assertEqual(rate_limiter.penalize("other-model"), rate_limiter.BACKOFF_BASE_SECONDS)
+
+    def test_retry_after_parsing(self):
+        class ResourceExhausted(Exception):
+            code = 429
+
+        exc = ResourceExhausted("429 Resource has been exhausted. retry_delay {\n  seconds: 17\n}")
+        self.assertTrue(rate_limiter.is_rate_limit_error(exc))
+        self.assertEqual(rate_limiter.retry_after_seconds(exc), 17)
+        self.assertIsNone(rate_limiter.retry_after_seconds(ResourceExhausted("quota")))
+        self.assertFalse(rate_limiter.is_rate_limit_error(ValueError("bad json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from worker import render_cache
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        patcher = patch.object(render_cache, "RENDER_CACHE_DIR", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name, size):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_key_is_canonical(self):
+        a = render_cache.make_key({"scene": {"a": 1, "b": 2}, "profile": "hd"})
+        b = render_cache.make_key({"profile": "hd", "scene": {"b": 2, "a": 1}})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, render_cache.make_key({"scene": {"a": 1, "b": 3}, "profile": "hd"}))
+
+    def test_miss_then_hit_links_file(self):
+        key = render_cache.make_key({"scene": 1})
+        out = os.path.join(self.tmp.name, "job", "scenes", "001.mp4")
+
+        self.assertFalse(render_cache.fetch(key, out))
+        render_cache.store(key, self._write("rendered.mp4", 10))
+        self.assertTrue(render_cache.fetch(key, out))
+
+        with open(out, "rb") as f:
+            self.assertEqual(f.read(), b"x" * 10)
+        self.assertEqual(os.stat(out).st_ino, os.stat(render_cache._entry_path(key)).st_ino)
+        stats = render_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_evicts_least_recently_used(self):
+        old, new = render_cache.make_key({"scene": "old"}), render_cache.make_key({"scene": "new"})
+        render_cache.store(old, self._write("old.mp4", 60))
+        os.utime(render_cache._entry_path(old), (1, 1))
+        render_cache.store(new, self._write("new.mp4", 60))
+
+        render_cache.evict(max_bytes=100)
+
+        self.assertFalse(render_cache.contains(old))
+        self.assertTrue(render_cache.contains(new))
@@ -1,65 +1,178 @@
-
+import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 import sys
 
+import numpy as np
+from PIL import Image
+
 # Mock moviepy before importing renderer
 sys.modules["moviepy.editor"] = MagicMock()
 sys.modules["moviepy.editor"].ColorClip = MagicMock()
-sys.modules["moviepy.editor"].TextClip = MagicMock()
-sys.modules["moviepy.editor"].CompositeVideoClip = MagicMock()
-sys.modules["moviepy.editor"].ImageClip = MagicMock()
+sys.modules["moviepy.editor"].VideoClip = MagicMock()
+
+from worker.renderer import (
+    render_scene, render_episode, make_frame_source, make_sprite, blend_sprite, encode_frames,
+    encode_segments, EncoderError, profile_from_editor_plan, get_profile, plan_slices
+)
+from shared.schemas.schemas import SceneLayout, EditorPlan
+
+
+def make_scene(**overrides):
+    data = dict(
+        scene_id="1",
+        location="home",
+        action="sitting",
+        dialogue="",
+        camera="wide",
+        duration=5.0,
+        emotion="happy",
+        music_mood="calm"
+    )
+    data.update(overrides)
+    return SceneLayout(**data)
 
-from worker.renderer import render_scene
-from shared.schemas.schemas import SceneLayout
 
 class TestRenderer(unittest.TestCase):
     @patch("worker.renderer.os.path.exists")
-    @patch("worker.renderer.CompositeVideoClip")
-    @patch("worker.renderer.ColorClip")
-    def test_render_scene_fallback(self, mock_color_clip, mock_composite, mock_exists):
+    @patch("worker.renderer.encode_frames")
+    def test_render_scene_fallback(self, mock_encode, mock_exists):
         # Setup
         mock_exists.return_value = False # Force fallback
-        
-        scene = SceneLayout(
-             scene_id="1", 
-             location="home", 
-             action="sitting", 
-             dialogue="hello", 
-             camera="wide",
-             duration=5.0,
-             emotion="happy",
-             music_mood="calm"
-        )
-        
+        mock_encode.return_value = {"frames": 120, "seconds": 1.0, "fps": 120.0}
+
         # Execute
-        render_scene(scene, "output.mp4")
-        
+        make_frame = make_frame_source(make_scene())
+        render_scene(make_scene(), "output.mp4")
+
         # Assertions
-        # Should create a ColorClip because assets are missing
-        mock_color_clip.assert_called() 
-        
+        # Background should be the flat location color because assets are missing
+        frame = make_frame(0)
+        self.assertEqual(frame.shape, (720, 1280, 3))
+        self.assertTrue((frame == (200, 200, 220)).all())
+        mock_encode.assert_called_once()
+
+    def test_render_scene_with_assets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "backgrounds"))
+            Image.new("RGB", (1920, 1080), (10, 20, 30)).save(os.path.join(tmp, "backgrounds", "home.png"))
+            char_path = os.path.join(tmp, "character.png")
+            Image.new("RGBA", (200, 400), (255, 0, 0, 255)).save(char_path)
+
+            with patch("worker.renderer.ASSETS_DIR", tmp):
+                make_frame = make_frame_source(make_scene(action="walk_in"), char_path)
+                start = make_frame(0.5).copy()
+                end = make_frame(3.0)
+
+        # Character slides in from the left and settles at the center bottom
+        self.assertTrue((start[-1, 100] == (255, 0, 0)).all())
+        self.assertTrue((start[-1, 640] == (10, 20, 30)).all())
+        self.assertTrue((end[-1, 500] == (255, 0, 0)).all())
+        self.assertTrue((end[-1, 0] == (10, 20, 30)).all())
+
+    def test_blend_sprite_clips_and_blends(self):
+        frame = np.zeros((10, 10, 3), dtype=np.uint8)
+        # Premultiplied white at 50% alpha
+        rgba = np.full((4, 4, 4), 128, dtype=np.uint8)
+        sprite = make_sprite(rgba)
+
+        blend_sprite(frame, sprite, -2, 8)
+
+        self.assertEqual(frame[8:, :2].tolist(), [[[128] * 3] * 2] * 2)
+        self.assertEqual(int(frame[:8].sum() + frame[:, 2:].sum()), 0)
+
+    @patch("worker.renderer.subprocess.Popen")
+    def test_ffmpeg_pipe_stops_on_broken_pipe(self, mock_popen):
+        proc = mock_popen.return_value
+        proc.stdin.write.side_effect = [None, None, BrokenPipeError()]
+        proc.wait.return_value = 1
+        make_frame = MagicMock(return_value=np.zeros((720, 1280, 3), dtype=np.uint8))
+
+        with self.assertRaises(EncoderError):
+            encode_frames(make_frame, 5, "output.mp4", encoder="ffmpeg")
+
+        # No frames are produced after ffmpeg goes away
+        self.assertEqual(make_frame.call_count, 3)
+        self.assertEqual(mock_popen.call_args[0][0][mock_popen.call_args[0][0].index("-pix_fmt") + 1], "rgb24")
+
+    @patch("worker.renderer.moviepy_video_clip")
+    def test_moviepy_encoder_fallback(self, mock_loader):
+        mock_video_clip = mock_loader.return_value
+        stats = encode_frames(lambda t: None, 2, "output.mp4", encoder="moviepy")
+
+        mock_video_clip.return_value.write_videofile.assert_called_once()
+        self.assertEqual(stats["frames"], 48)
+
+    @patch("worker.renderer.moviepy_video_clip")
+    def test_segments_share_one_encoder(self, mock_loader):
+        mock_video_clip = mock_loader.return_value
+        first = MagicMock(side_effect=lambda t: ("first", t))
+        second = MagicMock(side_effect=lambda t: ("second", t))
+
+        stats = encode_segments([(2, lambda: first), (3, lambda: second)], "output.mp4", encoder="moviepy")
+
+        mock_video_clip.assert_called_once()
+        make_frame = mock_video_clip.call_args[0][0]
+        self.assertEqual(mock_video_clip.call_args[1]["duration"], 5)
+        self.assertEqual(make_frame(1.5), ("first", 1.5))
+        self.assertEqual(make_frame(2.5), ("second", 0.5))
+        self.assertEqual(stats["frames"], 120)
+
+    @patch("worker.renderer.make_frame_source")
+    @patch("worker.renderer.encode_segments")
+    def test_render_episode_builds_scenes_lazily(self, mock_encode, mock_source):
+        mock_encode.return_value = {"frames": 240, "seconds": 1.0, "fps": 240.0}
+        mock_source.side_effect = [MagicMock(), RuntimeError("bad asset")]
+
+        render_episode([make_scene(scene_id=1), make_scene(scene_id=2)], "final.mp4")
+
+        segments = mock_encode.call_args[0][0]
+        mock_source.assert_not_called()
+        self.assertEqual([duration for duration, _ in segments], [5, 5])
+        segments[0][1]()
+        # A scene that can't be prepared becomes red error frames instead of failing the episode
+        error_frame = segments[1][1]()(0)
+        self.assertTrue((error_frame == (255, 0, 0)).all())
+
+    def test_profile_from_editor_plan(self):
+        planned = profile_from_editor_plan(EditorPlan(resolution="1920x1080", fps=30))
+        self.assertEqual(planned.name, "hd")
+        # The plan doesn't pick the encoder cost; only a named override does
+        self.assertEqual((planned.preset, planned.crf), (get_profile().preset, get_profile().crf))
+        self.assertEqual(profile_from_editor_plan(EditorPlan(), override="hd").preset, "veryfast")
+        self.assertEqual(profile_from_editor_plan(EditorPlan(), override="draft").name, "draft")
+
+        custom = profile_from_editor_plan(EditorPlan(resolution="1001x561", fps=25))
+        self.assertEqual((custom.width, custom.height, custom.fps), (1000, 560, 25))
+
     @patch("worker.renderer.os.path.exists")
-    @patch("worker.renderer.ImageClip")
-    @patch("worker.renderer.CompositeVideoClip")
-    def test_render_scene_with_assets(self, mock_composite, mock_image_clip, mock_exists):
-        # Setup
-        mock_exists.return_value = True # Assets exist
-        
-        scene = SceneLayout(
-             scene_id="2", 
-             location="home", 
-             action="sitting", 
-             dialogue="hello", 
-             camera="wide",
-             duration=5.0,
-             emotion="happy",
-             music_mood="calm"
-        )
-        
-        # Execute
-        render_scene(scene, "output.mp4")
-        
-        # Assertions
-        # Should create ImageClip
-        mock_image_clip.assert_called()
+    def test_geometry_follows_profile(self, mock_exists):
+        mock_exists.return_value = False
+        profile = get_profile("draft")
+
+        frame = make_frame_source(make_scene(dialogue="hi"), profile=profile)(0)
+
+        self.assertEqual(frame.shape, (profile.height, profile.width, 3))
+
+    def test_plan_slices_are_gop_aligned(self):
+        profile = get_profile("standard")  # 24 fps, 48-frame GOP
+        slices = plan_slices(25, profile, 9)  # 216 frames rounds down to 4 GOPs
+        self.assertEqual(slices, [(0, 192), (192, 192), (384, 192), (576, 24)])
+        self.assertEqual(plan_slices(5, profile, 10), [(0, 120)])
+
+    @patch("worker.renderer.encode_frames")
+    def test_slice_renders_at_absolute_time(self, mock_encode):
+        mock_encode.return_value = {"frames": 48, "seconds": 1.0, "fps": 48.0}
+        with tempfile.TemporaryDirectory() as tmp:
+            char_path = os.path.join(tmp, "character.png")
+            Image.new("RGBA", (100, 200), (255, 0, 0, 255)).save(char_path)
+            scene = make_scene(action="walk_in", duration=4)
+
+            render_scene(scene, "slice.mp4", character_path=char_path, frame_range=(24, 48))
+
+            make_frame, duration = mock_encode.call_args[0][:2]
+            self.assertEqual(duration, 2.0)
+            # Local t=0 of the slice is frame 24 of the scene, i.e. t=1.0
+            expected = make_frame_source(scene, char_path)(1.0)
+            self.assertTrue((make_frame(0) == expected).all())
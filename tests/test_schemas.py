@@ -1,5 +1,5 @@
 
-from shared.schemas.schemas import JobRequest, JobStatus, SceneLayout
+from shared.schemas.schemas import JobRequest, JobStatus, SceneLayout, SceneLayoutPatch
 
 def test_job_request_schema():
     req = JobRequest(story="Test story", duration_seconds=60, style_pack="default")
@@ -26,3 +26,15 @@ def test_scene_layout_schema():
         music_mood="cheerful"
     )
     assert scene.duration == 5.0
+
+def test_job_request_render_options():
+    req = JobRequest(story="Test story")
+    assert req.render_mode == "final"
+    assert req.render_profile is None
+
+    req = JobRequest(story="Test story", render_mode="preview", render_profile="hd")
+    assert req.render_mode == "preview"
+
+def test_scene_layout_patch_only_sets_given_fields():
+    patch = SceneLayoutPatch(dialogue="Hi again!")
+    assert patch.model_dump(exclude_unset=True) == {"dialogue": "Hi again!"}
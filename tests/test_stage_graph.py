@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+import pytest
+
+from worker import stage_graph
+
+PIPELINE = {
+    "bible": [],
+    "character": ["bible"],
+    "scenes": ["bible"],
+    "continuity": ["scenes"],
+    "render": ["continuity", "character"],
+}
+
+
+def test_stages_start_once_their_dependencies_are_done():
+    with tempfile.TemporaryDirectory() as job_dir:
+        assert stage_graph.reset(job_dir, PIPELINE) == ["bible"]
+        assert sorted(stage_graph.complete(job_dir, "bible", PIPELINE)) == ["character", "scenes"]
+        assert stage_graph.complete(job_dir, "scenes", PIPELINE) == ["continuity"]
+        # Render joins on the character, which is still running
+        assert stage_graph.complete(job_dir, "continuity", PIPELINE) == []
+        assert stage_graph.complete(job_dir, "character", PIPELINE) == ["render"]
+        # Completing twice (e.g. two layout tasks racing to the join) launches nothing new
+        assert stage_graph.complete(job_dir, "character", PIPELINE) == []
+
+
+def test_nothing_starts_after_a_failure():
+    with tempfile.TemporaryDirectory() as job_dir:
+        stage_graph.reset(job_dir, PIPELINE)
+        stage_graph.complete(job_dir, "bible", PIPELINE)
+        stage_graph.fail(job_dir, "character")
+
+        assert stage_graph.complete(job_dir, "scenes", PIPELINE) == []
+
+
+def test_every_pipeline_stage_has_a_launcher():
+    from worker import tasks
+
+    roots = {stage for stage, needs in tasks.PIPELINE.items() if not needs}
+    assert set(tasks.PIPELINE) - roots == set(tasks.STAGE_LAUNCHERS)
+
+
+def test_character_message_never_moves_progress_back(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from worker import tasks
+    from shared import job_status
+
+    job_status.set_client(fakeredis.FakeRedis())
+    try:
+        with tempfile.TemporaryDirectory() as jobs_dir:
+            os.makedirs(os.path.join(jobs_dir, "j1"))
+            monkeypatch.setattr(tasks, "JOBS_DIR", jobs_dir)
+            # Scene planning moved on while the character image was being generated
+            tasks.update_job_status("j1", "planning", 60, "Continuity Supervisor reviewing...")
+            tasks.report_planning_message("j1", "Character created successfully")
+            assert tasks.read_job_status("j1")["progress_current"] == 60
+
+            tasks.update_job_status("j1", "rendering", 70, "Rendering scenes...")
+            tasks.report_planning_message("j1", "Character created successfully")
+            assert tasks.read_job_status("j1")["status"] == "rendering"
+    finally:
+        job_status.set_client(None)
@@ -0,0 +1,17 @@
+import os
+
+from worker.diagnostics import import_time_us
+
+# Cold-start budget for a worker process. Measured ~0.5s for `import tasks`
+# on one core; the slack covers slower CI hosts.
+IMPORT_BUDGET_MS = float(os.getenv("WORKER_IMPORT_BUDGET_MS", "1500"))
+# Loaded on first use only
+LAZY_MODULES = ["moviepy.editor", "google.generativeai"]
+
+
+def test_worker_import_time_within_budget():
+    times = import_time_us("tasks")
+
+    assert times["tasks"] / 1000 < IMPORT_BUDGET_MS
+    for module in LAZY_MODULES:
+        assert module not in times, f"{module} is imported at worker startup"
@@ -0,0 +1,35 @@
+from worker import subtitles
+
+LINE = "Hello there, this is a fairly long line of dialogue that has to wrap inside the subtitle box."
+
+
+def test_wrap_text_fits_box():
+    font = subtitles.load_font(subtitles.DEFAULT_FONT, 40)
+    lines = subtitles.wrap_text(LINE, font, 300)
+
+    assert len(lines) > 1
+    assert " ".join(lines) == LINE
+    assert all(subtitles._text_width(font, line) <= 300 for line in lines)
+
+
+def test_render_subtitle_overlay():
+    overlay = subtitles.render_subtitle("Hi!", box_width=1100)
+
+    assert overlay.shape[1] == 1100
+    assert overlay.shape[2] == 4
+    # Premultiplied: color never exceeds alpha, and something was drawn
+    assert (overlay[..., :3].max(axis=2) <= overlay[..., 3]).all()
+    assert overlay[..., 3].any()
+    # Centered in the box
+    cols = overlay[..., 3].any(axis=0).nonzero()[0]
+    assert abs((cols[0] + cols[-1]) / 2 - 550) < 10
+
+
+def test_repeated_lines_hit_cache():
+    subtitles.render_line.cache_clear()
+    subtitles.render_subtitle("Same line again", box_width=1100)
+    subtitles.render_subtitle("Same line again", box_width=1100)
+
+    info = subtitles.render_line.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
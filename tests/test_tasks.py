@@ -0,0 +1,161 @@
+import os
+import json
+import shutil
+
+import pytest
+
+from shared import job_status
+from shared.schemas.schemas import SceneLayout, SceneManifest, SeriesBible
+from worker import tasks
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_scene(scene_id, duration=2):
+    return SceneLayout(scene_id=scene_id, location="home", action="sitting", dialogue="Hi", camera="wide",
+                       duration=duration, emotion="happy", music_mood="calm")
+
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    job_status.set_client(fakeredis.FakeRedis())
+    monkeypatch.setattr(tasks, "JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(tasks.render_cache, "RENDER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(tasks.render_cache, "RENDER_CACHE_ENABLED", True)
+    monkeypatch.setattr(tasks, "RENDER_STRATEGY", "auto")
+    os.makedirs(tmp_path / "jobs" / "j1" / "scenes")
+    yield "j1"
+    job_status.set_client(None)
+
+
+# Cutting the episode into scenes and remuxing HLS segments shell out to ffmpeg
+@pytest.mark.skipif(shutil.which(tasks.hls.FFMPEG_BINARY) is None, reason="needs an ffmpeg binary (FFMPEG_BINARY)")
+def test_repeated_default_job_hits_render_cache(job, monkeypatch):
+    scenes = [make_scene(1), make_scene(2), make_scene(3)]
+    profile = tasks.get_profile("preview")
+    fanned_out = []
+    monkeypatch.setattr(tasks.render_episode_task, "delay", lambda *args: tasks.render_episode_task(*args))
+    monkeypatch.setattr(tasks, "dispatch_scene_renders", lambda job_id, scene_dicts, profile_dict=None: fanned_out.append(job_id))
+
+    # Short job: one episode pass, whose scenes still land in the cache
+    assert tasks.choose_render_strategy(scenes) == "episode"
+    tasks.start_final_render(job, scenes, profile)
+    assert tasks.read_job_status(job)["status"] == "completed"
+    assert fanned_out == []
+    # Its HLS playlist is published whole, once the single pass is done
+    with open(os.path.join(tasks.JOBS_DIR, job, "final", "index.m3u8")) as f:
+        playlist = f.read()
+    assert [line.split("-")[0] for line in playlist.splitlines() if line.endswith(".ts")] == [
+        "segments/001", "segments/002", "segments/003"]
+    assert playlist.rstrip().endswith("#EXT-X-ENDLIST")
+
+    # The retry finds them cached and links them under fan-out instead of encoding
+    tasks.start_final_render(job, scenes, profile)
+    assert fanned_out == [job]
+    hits = tasks.render_cache.stats()["hits"]
+    for scene in scenes:
+        tasks.render_scene_task(job, scene.model_dump(), profile.model_dump())
+    assert tasks.render_cache.stats()["hits"] == hits + 3
+
+
+def test_render_warms_assets_at_the_jobs_profile(job, monkeypatch):
+    job_dir = os.path.join(tasks.JOBS_DIR, job)
+    os.makedirs(os.path.join(job_dir, "assets"))
+    character_path = os.path.join(job_dir, "assets", "character.png")
+    open(character_path, "wb").close()
+    profile = tasks.get_profile("hd")
+    with open(os.path.join(job_dir, "render_plan.json"), "w") as f:
+        json.dump({"render_mode": "final", "final_profile": profile.model_dump()}, f)
+    warmed = []
+    monkeypatch.setattr(tasks, "warm_assets", lambda character_path=None, profile=None: warmed.append((character_path, profile)))
+    monkeypatch.setattr(tasks, "start_final_render", lambda job_id, scenes, profile: None)
+
+    tasks.launch_render(job)
+
+    assert warmed == [(character_path, profile), (None, profile)]
+
+
+def test_batched_layouts_start_while_the_director_streams(job, monkeypatch):
+    job_dir = os.path.join(tasks.JOBS_DIR, job)
+    with open(os.path.join(job_dir, "script.txt"), "w") as f:
+        f.write("SCRIPT")
+    bible = SeriesBible(character={"name": "Bolt", "outfit": "red scarf", "appearance_rules": []}, style={"rules": []},
+                        locations=["home"], props=[], motion_library=["idle"], camera_styles=["wide"])
+    with open(os.path.join(job_dir, "bible.json"), "w") as f:
+        f.write(bible.model_dump_json())
+    manifest = SceneManifest(total_duration=25, scenes=[
+        {"scene_id": i, "duration": 5, "location": "home", "beats": f"beat {i}"} for i in range(1, 6)
+    ])
+    events = []
+
+    def director(script, bible, on_scene=None):
+        for item in manifest.scenes:
+            events.append(("streamed", item.scene_id))
+            on_scene(item)
+        events.append(("director done", None))
+        return manifest
+
+    monkeypatch.setattr(tasks, "SCENE_LAYOUT_BATCH", True)
+    monkeypatch.setattr(tasks, "SCENE_LAYOUT_STREAM_BATCH", 4)
+    monkeypatch.setattr(tasks, "episode_director_agent", director)
+    monkeypatch.setattr(tasks.generate_scene_layout_batch, "delay",
+                        lambda job_id, items, bible_dict, script: events.append(("layouts", [item["scene_id"] for item in items])))
+    monkeypatch.setattr(tasks, "join_scene_layouts", lambda job_id: False)
+
+    tasks.plan_scenes(job)
+
+    assert events == [("streamed", 1), ("streamed", 2), ("streamed", 3), ("streamed", 4), ("layouts", [1, 2, 3, 4]),
+                      ("streamed", 5), ("director done", None), ("layouts", [5])]
+
+
+def save_layouts(job_id, scenes):
+    for scene in scenes:
+        tasks.save_scene_layout(job_id, scene)
+
+
+def test_first_assembly_waits_for_a_scene_edited_during_the_render(job, monkeypatch):
+    def fake_concat(cmd, check):
+        open(cmd[-1], "wb").close()
+    monkeypatch.setattr(tasks.subprocess, "run", fake_concat)
+    monkeypatch.setattr(tasks.hls, "finish", lambda job_dir, source_dir=None: None)
+    final_path = os.path.join(tasks.JOBS_DIR, job, "final", "final.mp4")
+    os.makedirs(os.path.dirname(final_path))
+    tasks.mark_scene_dirty(job, 2, "Re-rendering scene 2...")
+
+    tasks.assemble_video([tasks.scene_output_path(job, 1), tasks.scene_output_path(job, 2)], job)
+    status = tasks.read_job_status(job)
+    assert (status["status"], status["dirty_scenes"]) == ("rendering", [2])
+    assert not os.path.exists(final_path)
+
+    # The edit's own assembly publishes the video
+    tasks.assemble_video([], job, [1, 2], [2])
+    status = tasks.read_job_status(job)
+    assert status["status"] == "completed" and "dirty_scenes" not in status
+    assert os.listdir(os.path.dirname(final_path)) == ["final.mp4"]
+
+
+def test_episode_rendered_from_edited_layouts_is_dropped(job):
+    scenes = [make_scene(1), make_scene(2)]
+    save_layouts(job, [scenes[0], scenes[1].model_copy(update={"dialogue": "Edited"})])
+    tasks.mark_scene_dirty(job, 2, "Re-rendering scene 2...")
+
+    assert tasks.render_episode_task(job, [scene.model_dump() for scene in scenes], tasks.get_profile("preview").model_dump()) is None
+
+    status = tasks.read_job_status(job)
+    assert (status["status"], status["dirty_scenes"]) == ("rendering", [2])
+    assert os.listdir(os.path.join(tasks.JOBS_DIR, job, "final")) == []
+    assert sorted(os.listdir(os.path.join(tasks.JOBS_DIR, job, "scenes"))) == ["001.json", "002.json"]
+
+
+def test_scene_render_queued_before_an_edit_leaves_the_edits_file(job):
+    scene = make_scene(1)
+    save_layouts(job, [scene.model_copy(update={"dialogue": "Edited"})])
+    output_path = tasks.scene_output_path(job, 1)
+    with open(output_path, "wb") as f:
+        f.write(b"edited render")
+
+    tasks.render_scene_task(job, scene.model_dump(), tasks.get_profile("preview").model_dump())
+
+    with open(output_path, "rb") as f:
+        assert f.read() == b"edited render"
+    assert sorted(os.listdir(os.path.dirname(output_path))) == ["001.json", "001.mp4"]
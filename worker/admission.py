@@ -0,0 +1,178 @@
+import os
+import json
+import math
+import time
+import uuid
+import fcntl
+import logging
+import tempfile
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Renders on this host share one ledger of running reservations. It is host-local on
+# purpose (not under JOBS_DIR): memory and cores are per machine, not per volume.
+ADMISSION_FILE = os.getenv("RENDER_ADMISSION_FILE", os.path.join(tempfile.gettempdir(), "render_admission.json"))
+# 0 = derive from the machine/container memory limit
+MEMORY_BUDGET_MB = int(os.getenv("RENDER_MEMORY_BUDGET_MB", "0"))
+MEMORY_BUDGET_FRACTION = float(os.getenv("RENDER_MEMORY_BUDGET_FRACTION", "0.7"))
+MAX_THREADS = int(os.getenv("RENDER_MAX_THREADS", "16"))
+POLL_SECONDS = float(os.getenv("RENDER_ADMISSION_POLL", "0.5"))
+
+# Cost model. Deliberately coarse: it only has to rank renders and keep the sum
+# under the budget, not predict RSS to the megabyte.
+RENDER_OVERHEAD_BYTES = 80 * 1024 ** 2  # ffmpeg process, pipe buffers, numpy temporaries
+X264_FRAMES_PER_THREAD = 2              # frames x264 keeps in flight per frame thread
+X264_FIXED_FRAMES = 4                   # reference/lookahead frames independent of threads
+PIXELS_PER_CPU_SECOND = 150e6           # layer-pixels/s one core composites + encodes (ultrafast)
+MIN_CPU_SECONDS_PER_THREAD = 2.0        # don't spin up a thread for less work than this
+ROWS_PER_THREAD = 90                    # x264 frame threads stop helping below ~this many rows each
+
+
+def _cgroup_value(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def host_memory() -> int:
+    """Physical memory in bytes, or the container's cgroup limit if lower."""
+    total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    limit = _cgroup_value("/sys/fs/cgroup/memory.max")
+    if limit and limit[0].isdigit():
+        total = min(total, int(limit[0]))
+    return total
+
+
+def host_cores() -> int:
+    """Usable cores: CPU affinity, capped by the cgroup CPU quota if one is set."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    quota = _cgroup_value("/sys/fs/cgroup/cpu.max")
+    if quota and quota[0].isdigit():
+        cores = min(cores, max(1, int(quota[0]) // int(quota[1])))
+    return cores
+
+
+def memory_budget() -> int:
+    if MEMORY_BUDGET_MB > 0:
+        return MEMORY_BUDGET_MB * 1024 ** 2
+    return int(host_memory() * MEMORY_BUDGET_FRACTION)
+
+
+def scene_layers(scene) -> int:
+    """Background and character are always drawn; dialogue adds a subtitle layer."""
+    return 3 if scene.dialogue else 2
+
+
+def estimate_render(scenes, profile, character_height: int) -> dict:
+    """
+    Estimates a render's cost from resolution x duration x layer count.
+    Scenes are built one at a time, so memory is the worst scene; CPU adds up.
+    Returns {"pixels", "frames", "frame_memory", "cpu_seconds", "max_threads"}; x264's share of
+    memory depends on the thread count, see memory_for_threads().
+    """
+    pixels = profile.width * profile.height
+    layers = max(scene_layers(scene) for scene in scenes)
+    # Static layer + reused output buffer + one per layer; sprite is RGB + uint16 alpha
+    frame_memory = pixels * 3 * (2 + layers) + character_height ** 2 * 5
+    frames = sum(scene.duration * profile.fps for scene in scenes)
+    cpu_seconds = sum(scene.duration * profile.fps * pixels * scene_layers(scene) for scene in scenes) / PIXELS_PER_CPU_SECOND
+    max_threads = max(1, min(
+        MAX_THREADS,
+        profile.height // ROWS_PER_THREAD,
+        math.ceil(cpu_seconds / MIN_CPU_SECONDS_PER_THREAD),
+    ))
+    return {
+        "pixels": pixels,
+        "frames": frames,
+        "frame_memory": frame_memory,
+        "cpu_seconds": cpu_seconds,
+        "max_threads": max_threads,
+    }
+
+
+def memory_for_threads(cost: dict, threads: int) -> int:
+    # x264 works in yuv420p (1.5 bytes/pixel) and keeps padded + lowres planes (~2x)
+    x264 = cost["pixels"] * 3 * (X264_FIXED_FRAMES + X264_FRAMES_PER_THREAD * threads)
+    return RENDER_OVERHEAD_BYTES + cost["frame_memory"] + x264
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def _ledger():
+    """Yields the reservations dict under an exclusive host-wide lock and writes it back."""
+    with open(ADMISSION_FILE, "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        try:
+            reservations = json.loads(f.read() or "{}")
+        except ValueError:
+            reservations = {}
+        # A worker killed mid-render never releases; drop reservations of dead processes
+        reservations = {token: r for token, r in reservations.items() if _alive(r["pid"])}
+        yield reservations
+        f.seek(0)
+        f.truncate()
+        json.dump(reservations, f)
+
+
+def try_acquire(cost: dict, label: str = "render"):
+    """
+    Reserves memory and cores for one render if they fit. Returns
+    {"token", "threads", "memory"} or None when the host is full.
+    Threads come from the cores other renders aren't using; a render that
+    doesn't fit with many threads is retried with fewer before giving up.
+    """
+    budget = memory_budget()
+    with _ledger() as reservations:
+        used_memory = sum(r["memory"] for r in reservations.values())
+        used_threads = sum(r["threads"] for r in reservations.values())
+        free_cores = max(1, host_cores() - used_threads)
+
+        for threads in range(min(free_cores, cost["max_threads"]), 0, -1):
+            memory = memory_for_threads(cost, threads)
+            # Always admit onto an idle host, or an oversized render could never run
+            if used_memory + memory <= budget or not reservations:
+                if memory > budget:
+                    logger.warning(f"{label} needs ~{memory >> 20} MB, over the {budget >> 20} MB render budget; running it alone")
+                token = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+                reservations[token] = {"pid": os.getpid(), "memory": memory, "threads": threads, "label": label}
+                return {"token": token, "threads": threads, "memory": memory}
+    return None
+
+
+def release(token: str):
+    with _ledger() as reservations:
+        reservations.pop(token, None)
+
+
+@contextmanager
+def admit(cost: dict, label: str = "render"):
+    """Blocks until the render fits the host budget; yields the x264 thread count to use."""
+    start = time.perf_counter()
+    reservation = try_acquire(cost, label)
+    if reservation is None:
+        logger.info(f"{label} waiting for render capacity (~{memory_for_threads(cost, 1) >> 20} MB needed)")
+        while reservation is None:
+            time.sleep(POLL_SECONDS)
+            reservation = try_acquire(cost, label)
+    waited = time.perf_counter() - start
+    logger.info(f"{label} admitted: {reservation['threads']} threads, ~{reservation['memory'] >> 20} MB, ~{cost['cpu_seconds']:.1f} CPU s (waited {waited:.1f}s)")
+    try:
+        yield reservation["threads"]
+    finally:
+        release(reservation["token"])
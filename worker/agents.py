@@ -2,20 +2,23 @@ import os
 import json
 import logging
 import time
-import google.generativeai as genai
+from functools import lru_cache
 from typing import Type, TypeVar, Optional, List, Dict, Any
 from pydantic import BaseModel, ValidationError
 from shared.schemas.schemas import (
-    SeriesBible, SceneManifest, SceneLayout, SceneLayoutValidation, EditorPlan, JobRequest
+    SeriesBible, SceneManifest, SceneManifestItem, SceneLayout, SceneLayoutBatch, SceneLayoutValidation, EditorPlan, JobRequest
 )
+import llm_cache
+import rate_limiter
+import prompt_budget
+import json_stream
+import llm_client
+import metrics
 
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
 GENAI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GENAI_API_KEY:
-    genai.configure(api_key=GENAI_API_KEY)
-else:
+if not GENAI_API_KEY and llm_client.LLM_BACKEND != "replay":
     logger.warning("GEMINI_API_KEY not set. Agents will fail.")
 
 T = TypeVar("T", bound=BaseModel)
@@ -24,70 +27,185 @@ class AgentError(Exception):
     pass
 
 
-# Debug: List available models to stderr
-try:
-    print("Available Gemini Models:", flush=True)
-    for m in genai.list_models():
-        if 'generateContent' in m.supported_generation_methods:
-            print(f"- {m.name}", flush=True)
-except Exception as e:
-    logger.warning(f"Failed to list models: {e}")
+MODEL_NAME = 'gemini-2.0-flash'
 
-model = genai.GenerativeModel('gemini-2.0-flash')
+def list_models() -> List[str]:
+    """Names of the models the configured LLM backend can call generateContent on (a network call)."""
+    return llm_client.get_client().list_models()
+
+def generate_content(model_name: str, *args, **kwargs):
+    """generate_content behind the shared per-model rate limit; a 429 pauses every worker."""
+    rate_limiter.acquire(model_name)
+    try:
+        # Gemini, or the record/replay backends (LLM_BACKEND, see llm_client)
+        response = llm_client.get_client().generate_content(model_name, *args, **kwargs)
+    except Exception as e:
+        if rate_limiter.is_rate_limit_error(e):
+            rate_limiter.penalize(model_name, rate_limiter.retry_after_seconds(e))
+        raise
+    rate_limiter.record_success(model_name)
+    return response
+
+def parse_json_response(text: str, schema_cls: Type[T]) -> T:
+    """Extracts the JSON from a model response and validates it against schema_cls."""
+    # Clean up potential markdown code blocks and conversational text
+    start = text.find("{")
+    end = text.rfind("}") + 1
+    if start != -1 and end != -1:
+        text = text[start:end]
+    else:
+        # Fallback basics if braces not found (unlikely for valid JSON)
+        if text.startswith("```json"):
+            text = text[7:]
+        if text.startswith("```"):
+            text = text[3:]
+        if text.endswith("```"):
+            text = text[:-3]
+    text = text.strip()
+
+    data = json.loads(text)
+    
+    # Robustness: Handle list wrapping if we expect a single item
+    # If data is a list of 1 item, and schema_cls is likely a Model (not a List type hint), unwrap it.
+    if isinstance(data, list) and len(data) == 1:
+         # Be optimistic and try to unwrap if validation fails on the list itself, or just try to validate the item
+         try:
+             return schema_cls.model_validate(data[0])
+         except ValidationError:
+             # If unwrapping fails validation, maybe it WAS supposed to be a list, fall through to normal validation
+             pass
+    
+    return schema_cls.model_validate(data)
+
+@lru_cache(maxsize=None)
+def schema_prompt(schema_cls: Type[BaseModel]):
+    """JSON schema of a response model and its minified prompt text, built once per class."""
+    schema = schema_cls.model_json_schema()
+    return schema, json.dumps(schema, separators=(",", ":"))
+
+def json_prompt(prompt: str, schema_cls: Type[BaseModel]) -> str:
+    """The full prompt call_gemini_json sends for prompt and schema_cls."""
+    return f"{prompt}\n\nOutput strictly valid JSON obeying this schema:\n{schema_prompt(schema_cls)[1]}"
 
 def call_gemini_json(prompt: str, schema_cls: Type[T], retry_count: int = 2) -> T:
     """Calls Gemini and parses JSON output into a Pydantic model with retries."""
     
-    schema_json = json.dumps(schema_cls.model_json_schema(), indent=2)
-    full_prompt = f"{prompt}\n\nOutput strictly valid JSON obeying this schema:\n{schema_json}"
+    schema = schema_prompt(schema_cls)[0]
+    full_prompt = json_prompt(prompt, schema_cls)
+    generation_config = {"response_mime_type": "application/json"}
+    logger.info(f"{schema_cls.__name__} prompt: {len(full_prompt)} chars (~{prompt_budget.estimate_tokens(full_prompt)} tokens)")
+    
+    cache_key = llm_cache.make_key(MODEL_NAME, full_prompt, generation_config, schema)
+    started = time.perf_counter()
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        try:
+            result = parse_json_response(cached, schema_cls)
+            logger.info(f"LLM cache hit for {schema_cls.__name__} ({cache_key[:12]})")
+            metrics.observe_agent_call(schema_cls.__name__, time.perf_counter() - started, 0, len(full_prompt), len(cached), "cache_hit")
+            return result
+        except (json.JSONDecodeError, ValidationError) as e:
+            logger.warning(f"Discarding cached {schema_cls.__name__} response that no longer validates: {e}")
+            llm_cache.delete(cache_key)
     
+    text = None
     for attempt in range(retry_count + 1):
         try:
-            # Basic rate limiting to prevent 429 Resource Exhausted
-            time.sleep(2)
-            response = model.generate_content(full_prompt, generation_config={"response_mime_type": "application/json"})
+            response = generate_content(MODEL_NAME, full_prompt, generation_config=generation_config)
             text = response.text
-            
-            # Clean up potential markdown code blocks and conversational text
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            if start != -1 and end != -1:
-                text = text[start:end]
-            else:
-                # Fallback basics if braces not found (unlikely for valid JSON)
-                if text.startswith("```json"):
-                    text = text[7:]
-                if text.startswith("```"):
-                    text = text[3:]
-                if text.endswith("```"):
-                    text = text[:-3]
-            text = text.strip()
-
-            data = json.loads(text)
-            
-            # Robustness: Handle list wrapping if we expect a single item
-            # If data is a list of 1 item, and schema_cls is likely a Model (not a List type hint), unwrap it.
-            if isinstance(data, list) and len(data) == 1:
-                 # Be optimistic and try to unwrap if validation fails on the list itself, or just try to validate the item
-                 try:
-                     return schema_cls.model_validate(data[0])
-                 except ValidationError:
-                     # If unwrapping fails validation, maybe it WAS supposed to be a list, fall through to normal validation
-                     pass
-            
-            return schema_cls.model_validate(data)
+            result = parse_json_response(text, schema_cls)
+            # Only responses that validated are worth replaying
+            llm_cache.put(cache_key, text, MODEL_NAME)
+            metrics.observe_agent_call(schema_cls.__name__, time.perf_counter() - started, attempt + 1, len(full_prompt), len(text))
+            return result
         except (json.JSONDecodeError, ValidationError) as e:
             logger.warning(f"Attempt {attempt + 1}/{retry_count + 1} failed: {e}")
             if attempt == retry_count:
+                metrics.observe_agent_call(schema_cls.__name__, time.perf_counter() - started, attempt + 1, len(full_prompt),
+                                           len(text) if text is not None else None, "invalid")
                 raise AgentError(f"Failed to generate valid JSON for {schema_cls.__name__}: {e}")
         except Exception as e:
              logger.error(f"Gemini API error: {e}")
              if attempt == retry_count:
+                metrics.observe_agent_call(schema_cls.__name__, time.perf_counter() - started, attempt + 1, len(full_prompt), outcome="error")
                 raise AgentError(f"Gemini API failed: {e}")
-             time.sleep(1)
+             if not rate_limiter.is_rate_limit_error(e):
+                 time.sleep(1) # 429s already wait in the limiter
 
     raise AgentError("Unknown error in call_gemini_json")
 
+def call_gemini_json_stream(prompt: str, schema_cls: Type[T], field: str, item_cls: Type[BaseModel], on_item) -> T:
+    """
+    call_gemini_json with a streamed response: every item of the list `field` is
+    validated as item_cls and passed to on_item as soon as it is complete. If the
+    stream breaks or the whole response doesn't validate, the items already handed
+    over are kept and a regular call_gemini_json supplies the rest.
+    """
+    schema = schema_prompt(schema_cls)[0]
+    full_prompt = json_prompt(prompt, schema_cls)
+    generation_config = {"response_mime_type": "application/json"}
+    cache_key = llm_cache.make_key(MODEL_NAME, full_prompt, generation_config, schema)
+
+    emitted = []
+    result = None
+    started = time.perf_counter()
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        try:
+            result = parse_json_response(cached, schema_cls)
+            logger.info(f"LLM cache hit for {schema_cls.__name__} ({cache_key[:12]})")
+            metrics.observe_agent_call(schema_cls.__name__, time.perf_counter() - started, 0, len(full_prompt), len(cached), "cache_hit")
+        except (json.JSONDecodeError, ValidationError):
+            llm_cache.delete(cache_key)
+
+    if result is None:
+        logger.info(f"{schema_cls.__name__} prompt (streamed): {len(full_prompt)} chars (~{prompt_budget.estimate_tokens(full_prompt)} tokens)")
+        parser = json_stream.ArrayItemParser(field)
+        chunks = []
+        prefix_valid = True
+        stream = None
+        try:
+            stream = iter(generate_content(MODEL_NAME, full_prompt, generation_config=generation_config, stream=True))
+        except Exception as e:
+            logger.warning(f"Streaming {schema_cls.__name__} failed to start: {e}")
+        while stream is not None:
+            # Errors from the model or the parser fall back below; errors from on_item propagate
+            try:
+                chunk = next(stream, None)
+                if chunk is None:
+                    text = "".join(chunks)
+                    result = parse_json_response(text, schema_cls)
+                    llm_cache.put(cache_key, text, MODEL_NAME)
+                    metrics.observe_agent_call(schema_cls.__name__, time.perf_counter() - started, 1, len(full_prompt), len(text))
+                    break
+                chunks.append(chunk.text)
+                raw_items = parser.feed(chunk.text)
+            except Exception as e:
+                logger.warning(f"Streamed {schema_cls.__name__} failed after {len(emitted)} items: {e}")
+                break
+            for raw in raw_items:
+                if not prefix_valid:
+                    break
+                try:
+                    item = item_cls.model_validate(raw)
+                except ValidationError:
+                    # Emitted items must stay a prefix of the list; the rest waits for the full response
+                    prefix_valid = False
+                    break
+                emitted.append(item)
+                on_item(item)
+        if result is None:
+            metrics.observe_agent_call(schema_cls.__name__, time.perf_counter() - started, 1, len(full_prompt),
+                                       sum(len(c) for c in chunks), "stream_failed")
+            result = call_gemini_json(prompt, schema_cls)
+
+    # Items handed over are final; the response only adds the ones after them
+    items = getattr(result, field)
+    for item in items[len(emitted):]:
+        emitted.append(item)
+        on_item(item)
+    return result.model_copy(update={field: emitted})
+
 
 # --- Prompts ---
 
@@ -109,6 +227,8 @@ EPISODE_DIRECTOR_PROMPT = """You are an expert episode director. Split the scree
 
 SCENE_LAYOUT_PROMPT = """You are a senior layout artist. Generate one render-ready scene JSON. Output a SINGLE JSON object (not a list). Use only bible locations/actions/cameras. Dialogue must be 1–2 short lines."""
 
+SCENE_LAYOUT_BATCH_PROMPT = """You are a senior layout artist. Generate one render-ready scene JSON for EACH scene manifest item below, in the same order, keeping each item's scene_id. Output a JSON object {"scenes": [...]}. Use only bible locations/actions/cameras. Dialogue must be 1–2 short lines."""
+
 CONTINUITY_SUPERVISOR_PROMPT = """You are a continuity supervisor. Validate ALL scene JSONs against the bible. Fix illegal values and shorten long dialogue. Ensure total duration ~15s. Output ONLY JSON: {issues_found:[], fixed_scenes:[]}."""
 
 POST_PRODUCER_PROMPT = """You are a post-production producer. Create an assembly plan for stitching scenes. Output JSON with resolution=1920x1080 fps=30 format=mp4 subtitles=srt transitions disabled music disabled."""
@@ -120,13 +240,32 @@ Description: {description}
 Output ONLY the prompt text."""
 
 
+def call_gemini_text(prompt: str, label: str = "text") -> str:
+    """Plain-text generation through the LLM cache; empty responses are not cached."""
+    cache_key = llm_cache.make_key(MODEL_NAME, prompt)
+    started = time.perf_counter()
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"LLM cache hit for {label} ({cache_key[:12]})")
+        metrics.observe_agent_call(label, time.perf_counter() - started, 0, len(prompt), len(cached), "cache_hit")
+        return cached
+    try:
+        text = generate_content(MODEL_NAME, prompt).text
+    except Exception:
+        metrics.observe_agent_call(label, time.perf_counter() - started, 1, len(prompt), outcome="error")
+        raise
+    metrics.observe_agent_call(label, time.perf_counter() - started, 1, len(prompt), len(text or ""))
+    if text and text.strip():
+        llm_cache.put(cache_key, text, MODEL_NAME)
+    return text
+
+
 # --- Agents ---
 
 def head_writer_agent(story: str) -> str:
     # This one returns text, not JSON
     full_prompt = f"{HEAD_WRITER_PROMPT}\n\nSTORY:\n{story}"
-    response = model.generate_content(full_prompt)
-    return response.text
+    return call_gemini_text(full_prompt, "screenplay")
 
 def series_bible_agent(script: str) -> SeriesBible:
     prompt = f"{SERIES_BIBLE_PROMPT}\n\nSCRIPT:\n{script[:2000]}..." # Truncate for context window if needed, though 1.5 flash has large window
@@ -138,11 +277,12 @@ def generate_character_image(image_prompt: str, output_path: str) -> bool:
     image_prompt = image_prompt.replace("damaged", "weathered").replace("broken", "rustic")
     
     target_model = "gemini-2.0-flash-exp-image-generation"
+    started, attempts = time.perf_counter(), 0
     try:
         logging.info(f"Attempting image generation with {target_model}")
-        img_gen_model = genai.GenerativeModel(target_model)
         # Force image generation intent
-        response = img_gen_model.generate_content(f"Generate an image of {image_prompt}")
+        attempts += 1
+        response = generate_content(target_model, f"Generate an image of {image_prompt}")
         
         # Check for image parts
         if response.parts:
@@ -156,6 +296,7 @@ def generate_character_image(image_prompt: str, output_path: str) -> bool:
                     image = Image.open(io.BytesIO(image_bytes))
                     image.save(output_path)
                     logger.info(f"Character image saved to {output_path}")
+                    metrics.observe_agent_call("character_image", time.perf_counter() - started, attempts, len(image_prompt), len(image_bytes))
                     return True
         
         logger.warning(f"No image parts found in response from {target_model}. Response: {response}")
@@ -163,8 +304,8 @@ def generate_character_image(image_prompt: str, output_path: str) -> bool:
         # Fallback to gemini-2.5-flash-image (dedicated image model)
         logger.info("Falling back to gemini-2.5-flash-image...")
         fallback_model_name = "gemini-2.5-flash-image" 
-        fallback_model = genai.GenerativeModel(fallback_model_name)
-        response = fallback_model.generate_content(f"Generate an image of {image_prompt}")
+        attempts += 1
+        response = generate_content(fallback_model_name, f"Generate an image of {image_prompt}")
         if response.parts:
             for part in response.parts:
                  if part.inline_data:
@@ -174,12 +315,15 @@ def generate_character_image(image_prompt: str, output_path: str) -> bool:
                     image = Image.open(io.BytesIO(part.inline_data.data))
                     image.save(output_path)
                     logger.info(f"Character image saved with fallback model to {output_path}")
+                    metrics.observe_agent_call("character_image", time.perf_counter() - started, attempts, len(image_prompt),
+                                               len(part.inline_data.data))
                     return True
         
     except Exception as e:
         logger.error(f"Failed generation: {e}")
 
     # Fallback to programmatic generation if AI fails (e.g. safety filters)
+    metrics.observe_agent_call("character_image", time.perf_counter() - started, attempts, len(image_prompt), outcome="placeholder")
     try:
         logger.warning(f"Generating fallback placeholder character due to API failure/safety.")
         from PIL import Image, ImageDraw
@@ -202,8 +346,7 @@ def character_designer_agent(bible: SeriesBible, output_path: str) -> bool:
         # 1. Generate the Image Prompt
         description = f"Name: {bible.character.name}. Outfit: {bible.character.outfit}. Appearance: {', '.join(bible.character.appearance_rules)}."
         prompt_maker_prompt = CHARACTER_DESIGNER_PROMPT.format(description=description)
-        response = model.generate_content(prompt_maker_prompt) # Uses standard text model
-        image_prompt = response.text.strip()
+        image_prompt = call_gemini_text(prompt_maker_prompt, "image prompt").strip() # Uses standard text model
         
         logger.info(f"Generated Image Prompt: {image_prompt}")
 
@@ -213,22 +356,92 @@ def character_designer_agent(bible: SeriesBible, output_path: str) -> bool:
         logger.error(f"Character Designer Agent failed: {e}")
         return False
 
-def episode_director_agent(script: str, bible: SeriesBible) -> SceneManifest:
-    bible_ctx = bible.model_dump_json()
-    prompt = f"{EPISODE_DIRECTOR_PROMPT}\n\nBIBLE:\n{bible_ctx}\n\nSCRIPT:\n{script}"
-    return call_gemini_json(prompt, SceneManifest)
-
-def scene_layout_agent(scene_manifest_item: dict, bible: SeriesBible, script_context: str) -> SceneLayout:
-    bible_ctx = bible.model_dump_json()
-    scene_ctx = json.dumps(scene_manifest_item)
+# Bible fields each agent's prompt needs; style, props and appearance rules only matter
+# to the character designer and renderer.
+BIBLE_FIELDS = {
+    "episode_director": {"character": {"name"}, "locations": True, "motion_library": True},
+    "scene_layout": {"character": {"name"}, "locations": True, "motion_library": True, "camera_styles": True},
+    "continuity_supervisor": {"locations": True, "motion_library": True, "camera_styles": True},
+}
+
+def bible_context(bible: SeriesBible, agent: str) -> str:
+    """Minified bible JSON with only the fields `agent` uses."""
+    return bible.model_dump_json(include=BIBLE_FIELDS[agent])
+
+def episode_director_prompt(script: str, bible: SeriesBible) -> str:
+    return f"{EPISODE_DIRECTOR_PROMPT}\n\nBIBLE:\n{bible_context(bible, 'episode_director')}\n\nSCRIPT:\n{script}"
+
+def episode_director_agent(script: str, bible: SeriesBible, on_scene=None) -> SceneManifest:
+    """With on_scene, the manifest is streamed and each SceneManifestItem is passed to it once complete."""
+    prompt = episode_director_prompt(script, bible)
+    if on_scene is None:
+        return call_gemini_json(prompt, SceneManifest)
+    return call_gemini_json_stream(prompt, SceneManifest, "scenes", SceneManifestItem, on_scene)
+
+def scene_layout_prompt(scene_manifest_item: dict, bible: SeriesBible, script_context: str) -> str:
+    scene_ctx = json.dumps(scene_manifest_item, separators=(",", ":"))
     # We provide a bit of script context around the scene if possible, or just the whole script
-    prompt = f"{SCENE_LAYOUT_PROMPT}\n\nBIBLE:\n{bible_ctx}\n\nSCENE MANIFEST ITEM:\n{scene_ctx}\n\nCONTEXT:\n{script_context}"
-    return call_gemini_json(prompt, SceneLayout)
+    return f"{SCENE_LAYOUT_PROMPT}\n\nBIBLE:\n{bible_context(bible, 'scene_layout')}\n\nSCENE MANIFEST ITEM:\n{scene_ctx}\n\nCONTEXT:\n{script_context}"
 
-def continuity_supervisor_agent(scenes: List[SceneLayout], bible: SeriesBible) -> SceneLayoutValidation:
-    bible_ctx = bible.model_dump_json()
-    scenes_ctx = json.dumps([s.model_dump() for s in scenes])
-    prompt = f"{CONTINUITY_SUPERVISOR_PROMPT}\n\nBIBLE:\n{bible_ctx}\n\nSCENES:\n{scenes_ctx}"
+def scene_layout_agent(scene_manifest_item: dict, bible: SeriesBible, script_context: str) -> SceneLayout:
+    return call_gemini_json(scene_layout_prompt(scene_manifest_item, bible, script_context), SceneLayout)
+
+def scene_layout_batch_prompt(bible: SeriesBible, script_context: str) -> str:
+    """The part of a batched layout prompt shared by every chunk; manifest items are appended."""
+    scene_schema = schema_prompt(SceneLayout)[1]
+    return f"{SCENE_LAYOUT_BATCH_PROMPT}\n\nEach scene object must obey this schema:\n{scene_schema}\n\nBIBLE:\n{bible_context(bible, 'scene_layout')}\n\nCONTEXT:\n{script_context}"
+
+def scene_layout_batch_agent(scene_manifest_items: List[dict], bible: SeriesBible, script_context: str) -> List[SceneLayout]:
+    """
+    Layouts for many manifest items per call, chunked to the token budget. Items the
+    batch response gets wrong (missing or invalid) fall back to scene_layout_agent.
+    """
+    fixed = scene_layout_batch_prompt(bible, script_context)
+    item_texts = [json.dumps(item, separators=(",", ":")) for item in scene_manifest_items]
+    chunks = prompt_budget.chunk_by_budget(
+        list(range(len(scene_manifest_items))),
+        [prompt_budget.estimate_tokens(text) + 1 for text in item_texts],
+        prompt_budget.estimate_tokens(fixed),
+    )
+
+    layouts = {}
+    for chunk in chunks:
+        items_ctx = "[\n" + ",\n".join(item_texts[i] for i in chunk) + "\n]"
+        prompt = f"{fixed}\n\nSCENE MANIFEST ITEMS:\n{items_ctx}"
+        try:
+            raw_scenes = call_gemini_json(prompt, SceneLayoutBatch).scenes
+        except AgentError as e:
+            logger.warning(f"Batched layout for {len(chunk)} scenes failed, falling back per scene: {e}")
+            raw_scenes = []
+        by_id = {raw.get("scene_id"): raw for raw in raw_scenes if isinstance(raw, dict)}
+        for position, index in enumerate(chunk):
+            item = scene_manifest_items[index]
+            # Match by scene_id; fall back to position if the model renumbered
+            raw = by_id.get(item["scene_id"]) or (raw_scenes[position] if position < len(raw_scenes) else None)
+            try:
+                layouts[index] = SceneLayout.model_validate({**raw, "scene_id": item["scene_id"]})
+            except (TypeError, ValidationError) as e:
+                logger.warning(f"Batched layout for scene {item['scene_id']} invalid, regenerating alone: {e}")
+    
+    missing = [i for i in range(len(scene_manifest_items)) if i not in layouts]
+    for index in missing:
+        layout = scene_layout_agent(scene_manifest_items[index], bible, script_context)
+        # The model may renumber; layouts are saved by scene_id, so keep the manifest's
+        layout.scene_id = scene_manifest_items[index]["scene_id"]
+        layouts[index] = layout
+    logger.info(f"Scene layouts: {len(scene_manifest_items)} scenes in {len(chunks)} batched calls + {len(missing)} single calls")
+    return [layouts[i] for i in range(len(scene_manifest_items))]
+
+def continuity_supervisor_prompt(scenes: List[SceneLayout], bible: SeriesBible, problems: List[str] = None) -> str:
+    scenes_ctx = json.dumps([s.model_dump() for s in scenes], separators=(",", ":"))
+    prompt = f"{CONTINUITY_SUPERVISOR_PROMPT}\n\nBIBLE:\n{bible_context(bible, 'continuity_supervisor')}\n\nSCENES:\n{scenes_ctx}"
+    if problems:
+        prompt += "\n\nKNOWN PROBLEMS:\n" + "\n".join(f"- {p}" for p in problems)
+    return prompt
+
+def continuity_supervisor_agent(scenes: List[SceneLayout], bible: SeriesBible, problems: List[str] = None) -> SceneLayoutValidation:
+    """`problems` are the ones the local validator (continuity.py) could not fix."""
+    prompt = continuity_supervisor_prompt(scenes, bible, problems)
     # This might return a huge JSON, be careful with token limits. 
     # For MVP we assume 18-24 scenes fit in context.
     return call_gemini_json(prompt, SceneLayoutValidation)
@@ -0,0 +1,171 @@
+import os
+import re
+import hashlib
+import logging
+import tempfile
+from functools import lru_cache
+import numpy as np
+import PIL.Image
+
+logger = logging.getLogger(__name__)
+
+# Decoded assets live in a hidden folder next to the PNG they came from:
+#   backgrounds/home.png -> backgrounds/.rgba/home-<digest>-1280x720.npy
+CACHE_DIRNAME = ".rgba"
+# Longest side of the preview PNG written by write_thumbnail
+THUMBNAIL_MAX_SIDE = int(os.getenv("THUMBNAIL_MAX_SIDE", "128"))
+
+_digests = {}
+
+
+def file_digest(path: str) -> str:
+    """sha256 of the file bytes, memoized per (path, mtime, size)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _digests[key] = digest
+    return digest
+
+
+def premultiply(rgba: np.ndarray) -> np.ndarray:
+    """Straight-alpha uint8 RGBA -> premultiplied uint8 RGBA."""
+    a = rgba[..., 3:4].astype(np.uint16)
+    out = np.empty_like(rgba)
+    out[..., :3] = (rgba[..., :3].astype(np.uint16) * a + 127) // 255
+    out[..., 3:] = rgba[..., 3:]
+    return out
+
+
+def _target_size(image_size, size=None, height=None):
+    if size is not None:
+        return int(size[0]), int(size[1])
+    w, h = image_size
+    if height is not None:
+        return int(w * height / h), int(height)
+    return w, h
+
+
+def _decode(path: str, size=None, height=None) -> np.ndarray:
+    with PIL.Image.open(path) as img:
+        img = img.convert("RGBA")
+        target = _target_size(img.size, size, height)
+        if target != img.size:
+            # Resample in premultiplied space so transparent edges don't darken
+            img = img.convert("RGBa").resize(target, PIL.Image.LANCZOS).convert("RGBA")
+        return premultiply(np.asarray(img))
+
+
+def _cache_path(path: str, digest: str, target) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), CACHE_DIRNAME, f"{stem}-{digest[:16]}-{target[0]}x{target[1]}.npy")
+
+
+def _write_atomic(cache_path: str, array: np.ndarray):
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        # mkstemp creates 0600 files; other worker users need to map them too
+        os.chmod(tmp_path, 0o644)
+        # Concurrent workers may race to write the same file; os.replace keeps it whole
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Drop stale decodes of an older version of the same asset. Exactly one digest segment,
+    # so "home-<digest>-..." never matches another asset's "home-office-<digest>-..."
+    name = os.path.basename(cache_path)
+    stem, size = name.rsplit("-", 2)[0], name.rsplit("-", 1)[1]
+    pattern = re.compile(rf"{re.escape(stem)}-[0-9a-f]{{16}}-{re.escape(size)}")
+    for old in os.listdir(cache_dir):
+        if old != name and pattern.fullmatch(old):
+            try:
+                os.remove(os.path.join(cache_dir, old))
+            except OSError:
+                pass
+
+
+@lru_cache(maxsize=64)
+def _open(cache_path: str) -> np.ndarray:
+    return np.load(cache_path, mmap_mode="r")
+
+
+def load_image(path: str, size=None, height=None) -> np.ndarray:
+    """
+    Returns the asset as a read-only (H, W, 4) uint8 premultiplied RGBA array.
+    `size` forces (width, height); `height` keeps the aspect ratio.
+
+    The first caller decodes and resizes the PNG and saves the result next to it;
+    every other worker process maps that file instead of decoding again.
+    """
+    digest = file_digest(path)
+    if size is not None:
+        target = _target_size(None, size)
+    else:
+        with PIL.Image.open(path) as img:
+            target = _target_size(img.size, None, height)
+    cache_path = _cache_path(path, digest, target)
+
+    if os.path.exists(cache_path):
+        try:
+            return _open(cache_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable asset cache {cache_path}: {e}")
+
+    array = _decode(path, size, height)
+    try:
+        _write_atomic(cache_path, array)
+        return _open(cache_path)
+    except OSError as e:
+        # Read-only asset dirs still work, just without sharing
+        logger.warning(f"Could not cache decoded asset {path}: {e}")
+        array.setflags(write=False)
+        return array
+
+
+def warm(path: str, size=None, height=None) -> bool:
+    """Pre-builds the decoded cache for an asset. Returns False if it can't be read."""
+    try:
+        load_image(path, size=size, height=height)
+        return True
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to warm asset cache for {path}: {e}")
+        return False
+
+
+def thumbnail_path(path: str) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_thumb{ext}"
+
+
+def write_thumbnail(path: str, max_side: int = THUMBNAIL_MAX_SIDE) -> bool:
+    """Writes a small PNG next to the asset (character.png -> character_thumb.png) for the UI."""
+    thumb_path = thumbnail_path(path)
+    tmp_path = None
+    try:
+        if os.path.exists(thumb_path) and os.path.getmtime(thumb_path) >= os.path.getmtime(path):
+            return True
+        with PIL.Image.open(path) as img:
+            img.thumbnail((max_side, max_side), PIL.Image.LANCZOS)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(thumb_path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, format="PNG", optimize=True)
+        os.chmod(tmp_path, 0o644)
+        # The API serves this file; never let it see a partial write
+        os.replace(tmp_path, thumb_path)
+        return True
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to write thumbnail for {path}: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
@@ -0,0 +1,205 @@
+"""
+Renderer benchmark: synthetic scenes through the real render_scene + encoder.
+
+    cd worker && python bench_render.py run [--profile standard] [--duration 4] [--repeat 3] [--out bench.json]
+    cd worker && python bench_render.py compare baseline.json bench.json [--threshold 10]
+
+One case per CharacterLayer action branch (walk_in, walk_out, jump, idle), each
+with and without dialogue, on the generate_assets.py placeholder assets. Every
+case runs in a fresh process so peak RSS belongs to that case alone. `compare`
+exits non-zero when any case regresses by more than --threshold percent.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import queue as queue_module
+import resource
+import tempfile
+import multiprocessing
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, ".."))
+
+from shared.schemas.schemas import SceneLayout
+import renderer
+
+ACTIONS = ["walk_in", "walk_out", "jump", "idle"]
+DIALOGUE = "I have to get you home before the rain starts!"
+
+# A case that hasn't reported by then counts as failed (e.g. a hung encoder)
+CASE_TIMEOUT_SECONDS = float(os.getenv("BENCH_CASE_TIMEOUT", "300"))
+
+# metric -> True if higher is better
+METRICS = {
+    "fps": True,
+    "peak_rss_mb": False,
+    "ffmpeg_peak_rss_mb": False,
+    "output_bytes": False,
+}
+
+
+def make_cases(duration: int):
+    cases = {}
+    for i, action in enumerate(ACTIONS):
+        for with_dialogue in (False, True):
+            name = f"{action}_{'dialogue' if with_dialogue else 'silent'}"
+            cases[name] = SceneLayout(
+                scene_id=len(cases) + 1,
+                duration=duration,
+                location="home",
+                camera="wide",
+                action=action,
+                emotion="happy",
+                dialogue=DIALOGUE if with_dialogue else "",
+                music_mood="calm",
+            )
+    return cases
+
+
+def ensure_assets():
+    if os.path.exists(os.path.join(renderer.ASSETS_DIR, "backgrounds", "home.png")):
+        return
+    import generate_assets
+    generate_assets.create_assets()
+
+
+def _run_case(scene_dict, profile_dict, output_path, queue):
+    from shared.schemas.schemas import RenderProfile
+    start = time.perf_counter()
+    stats = renderer.render_scene(SceneLayout(**scene_dict), output_path, profile=RenderProfile(**profile_dict))
+    wall = time.perf_counter() - start
+    queue.put({
+        "ok": stats["ok"],
+        "frames": stats["frames"],
+        "wall_seconds": wall,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "ffmpeg_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    })
+
+
+def run_case(scene: SceneLayout, profile, workdir: str) -> dict:
+    output_path = os.path.join(workdir, f"{scene.scene_id:03d}.mp4")
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(scene.model_dump(), profile.model_dump(), output_path, queue))
+    proc.start()
+    # Poll, so a child that dies (OOM, missing ffmpeg) fails the case instead of hanging it
+    deadline = time.monotonic() + CASE_TIMEOUT_SECONDS
+    result = None
+    while result is None and time.monotonic() < deadline:
+        try:
+            result = queue.get(timeout=1)
+        except queue_module.Empty:
+            if not proc.is_alive():
+                try:
+                    result = queue.get(timeout=1)
+                except queue_module.Empty:
+                    pass
+                break
+    proc.join(timeout=10)
+    timed_out = proc.is_alive()
+    if timed_out:
+        proc.terminate()
+        proc.join()
+    if result is None or proc.exitcode != 0:
+        reason = f"no result after {CASE_TIMEOUT_SECONDS:.0f}s" if timed_out else f"exit code {proc.exitcode}"
+        raise RuntimeError(f"Scene {scene.scene_id} ({scene.action}) benchmark process failed ({reason})")
+    if not result["ok"]:
+        raise RuntimeError(f"Scene {scene.scene_id} ({scene.action}) rendered as an error clip")
+    result["output_bytes"] = os.path.getsize(output_path)
+    result["fps"] = result["frames"] / result["wall_seconds"]
+    return result
+
+
+def run(profile_name: str, duration: int, repeat: int) -> dict:
+    ensure_assets()
+    profile = renderer.get_profile(profile_name)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        # Warm the decoded-asset cache so the first case doesn't pay for it
+        renderer.warm_assets(profile=profile)
+        for name, scene in make_cases(duration).items():
+            runs = [run_case(scene, profile, workdir) for _ in range(repeat)]
+            # Fastest run for timings (least scheduler noise), worst run for memory
+            best = min(runs, key=lambda r: r["wall_seconds"])
+            best["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+            best["ffmpeg_peak_rss_mb"] = max(r["ffmpeg_peak_rss_mb"] for r in runs)
+            del best["ok"]
+            results[name] = best
+            print(f"{name:20s} {best['wall_seconds']:7.2f}s {best['fps']:7.1f} fps "
+                  f"{best['peak_rss_mb']:7.1f} MB (+{best['ffmpeg_peak_rss_mb']:.1f} MB ffmpeg) {best['output_bytes']:>9d} B")
+    return {
+        "meta": {
+            "profile": profile.model_dump(),
+            "duration": duration,
+            "repeat": repeat,
+            "encoder": renderer.RENDER_ENCODER,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    """Returns a list of regression messages; a case/metric counts when it is worse by more than threshold %."""
+    regressions = []
+    for name, base in baseline["cases"].items():
+        case = current["cases"].get(name)
+        if case is None:
+            regressions.append(f"{name}: missing from current results")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in base or metric not in case or not base[metric]:
+                continue
+            change = (case[metric] - base[metric]) / base[metric] * 100
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(f"{name}: {metric} {base[metric]:.1f} -> {case[metric]:.1f} ({change:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run")
+    run_parser.add_argument("--profile", default="standard")
+    run_parser.add_argument("--duration", type=int, default=4)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--out", default="bench.json")
+    cmp_parser = sub.add_parser("compare")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run(args.profile, args.duration, args.repeat)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.out}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["meta"].get("profile") != current["meta"].get("profile"):
+        print("warning: results were recorded with different render profiles")
+    regressions = compare(baseline, current, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        return 1
+    print(f"No regressions over {args.threshold:.0f}% across {len(baseline['cases'])} cases")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
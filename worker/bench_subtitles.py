@@ -0,0 +1,61 @@
+"""
+Micro-benchmark: Pillow subtitle rasterizer vs the old moviepy TextClip (ImageMagick) path.
+
+    cd worker && python bench_subtitles.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import subtitles
+
+LINES = [
+    "Where did you come from, little flower?",
+    "I have to get you home before the rain starts!",
+    "Wow!",
+    "This junkyard is full of surprises today, isn't it?",
+]
+
+
+def bench(label, fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(LINES[i % len(LINES)])
+    ms = (time.perf_counter() - start) * 1000 / iterations
+    print(f"{label:28s} {ms:9.3f} ms/subtitle")
+    return ms
+
+
+def textclip(text):
+    # The pre-rasterizer path: one ImageMagick process per call
+    from moviepy.editor import TextClip
+    clip = TextClip(text, fontsize=40, color='white', font='Liberation-Sans-Bold', stroke_color='black', stroke_width=2, size=(1100, None), method='caption')
+    clip.get_frame(0)
+    clip.mask.get_frame(0)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    def cold(text):
+        subtitles.render_line.cache_clear()
+        subtitles.render_subtitle(text)
+
+    cold_ms = bench("pillow (cold line cache)", cold, iterations)
+    subtitles.render_line.cache_clear()
+    warm_ms = bench("pillow (warm line cache)", subtitles.render_subtitle, iterations)
+    print(f"  {subtitles.render_line.cache_info()}")
+
+    try:
+        textclip(LINES[0])
+    except Exception as e:
+        print(f"{'moviepy TextClip':28s} unavailable ({type(e).__name__}: {str(e).splitlines()[0][:80]})")
+        return
+    clip_ms = bench("moviepy TextClip", textclip, max(1, iterations // 10))
+    print(f"speedup: {clip_ms / cold_ms:.0f}x cold, {clip_ms / warm_ms:.0f}x warm")
+
+
+if __name__ == "__main__":
+    main()
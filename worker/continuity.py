@@ -0,0 +1,114 @@
+import os
+import re
+import difflib
+import logging
+from typing import List, Tuple
+
+from shared.schemas.schemas import SeriesBible, SceneLayout, SceneLayoutValidation
+
+logger = logging.getLogger(__name__)
+
+# Deterministic version of the continuity supervisor's mechanical checks. Values are
+# only changed when the intended bible entry is unambiguous; anything else is reported
+# as unresolved for the LLM supervisor to decide.
+TARGET_DURATION_SECONDS = int(os.getenv("CONTINUITY_TARGET_SECONDS", "15"))
+DURATION_TOLERANCE_SECONDS = int(os.getenv("CONTINUITY_DURATION_TOLERANCE", "2"))
+DIALOGUE_MAX_WORDS = int(os.getenv("CONTINUITY_DIALOGUE_MAX_WORDS", "16"))
+DIALOGUE_MAX_SENTENCES = 2
+# difflib ratio above which a misspelled value counts as the bible entry
+MATCH_CUTOFF = 0.75
+
+
+def _normalize(value: str) -> str:
+    return re.sub(r"[\s\-]+", "_", value.strip().lower())
+
+
+def match_allowed(value: str, allowed: List[str]):
+    """The bible entry value means, or None when it can't be told without judgement."""
+    if value in allowed:
+        return value
+    normalized = {_normalize(a): a for a in allowed}
+    key = _normalize(value)
+    if key in normalized:
+        return normalized[key]
+    # "home_kitchen" -> "home", but only if exactly one entry fits
+    contained = [a for n, a in normalized.items() if n and (n in key.split("_") or key in n.split("_"))]
+    if len(contained) == 1:
+        return contained[0]
+    close = difflib.get_close_matches(key, list(normalized), n=2, cutoff=MATCH_CUTOFF)
+    if len(close) == 1:
+        return normalized[close[0]]
+    return None
+
+
+def shorten_dialogue(dialogue: str) -> str:
+    """Keeps whole sentences up to the word and sentence limits; a long first sentence is cut."""
+    text = " ".join(dialogue.split())
+    sentences = re.findall(r"[^.!?]+[.!?]*", text)
+    kept, words = [], 0
+    for sentence in sentences[:DIALOGUE_MAX_SENTENCES]:
+        n = len(sentence.split())
+        if kept and words + n > DIALOGUE_MAX_WORDS:
+            break
+        kept.append(sentence.strip())
+        words += n
+    short = " ".join(kept)
+    if len(short.split()) > DIALOGUE_MAX_WORDS:
+        short = " ".join(short.split()[:DIALOGUE_MAX_WORDS]).rstrip(",;:") + "..."
+    return short
+
+
+def fit_durations(durations: List[int], target: int) -> List[int]:
+    """Scales integer durations to sum to target, keeping proportions and every scene >= 1s."""
+    total = sum(durations)
+    # A malformed manifest can give every scene 0s; nothing to keep, so split evenly
+    exact = [d * target / total for d in durations] if total > 0 else [target / len(durations)] * len(durations)
+    fitted = [max(1, int(x)) for x in exact]
+    # Largest remainders get the leftover seconds; the longest scenes give up any excess
+    by_remainder = sorted(range(len(exact)), key=lambda i: exact[i] - int(exact[i]), reverse=True)
+    i = 0
+    while sum(fitted) < target:
+        fitted[by_remainder[i % len(fitted)]] += 1
+        i += 1
+    while sum(fitted) > target and max(fitted) > 1:
+        fitted[fitted.index(max(fitted))] -= 1
+    return fitted
+
+
+def validate(scenes: List[SceneLayout], bible: SeriesBible, target_duration: int = None) -> Tuple[SceneLayoutValidation, List[str]]:
+    """
+    Applies the supervisor's mechanical fixes: location, action and camera must be
+    bible values, dialogue is 1-2 short sentences, total duration stays near the
+    target. Returns the validation (issues fixed + fixed scenes) and the problems
+    left for the LLM supervisor.
+    """
+    target_duration = TARGET_DURATION_SECONDS if target_duration is None else target_duration
+    issues, unresolved, fixed = [], [], []
+    checks = [("location", bible.locations), ("action", bible.motion_library), ("camera", bible.camera_styles)]
+
+    for scene in scenes:
+        scene = scene.model_copy()
+        for field, allowed in checks:
+            value = getattr(scene, field)
+            if not allowed or value in allowed:
+                continue
+            match = match_allowed(value, allowed)
+            if match is None:
+                unresolved.append(f"Scene {scene.scene_id}: {field} '{value}' is not in the bible ({', '.join(allowed)})")
+                continue
+            setattr(scene, field, match)
+            issues.append(f"Scene {scene.scene_id}: {field} '{value}' -> '{match}'")
+
+        short = shorten_dialogue(scene.dialogue)
+        if short != " ".join(scene.dialogue.split()):
+            issues.append(f"Scene {scene.scene_id}: dialogue shortened to {len(short.split())} words")
+            scene.dialogue = short
+        fixed.append(scene)
+
+    total = sum(scene.duration for scene in fixed)
+    if fixed and abs(total - target_duration) > DURATION_TOLERANCE_SECONDS:
+        for scene, duration in zip(fixed, fit_durations([scene.duration for scene in fixed], target_duration)):
+            scene.duration = duration
+        issues.append(f"Total duration {total}s rescaled to {target_duration}s")
+
+    return SceneLayoutValidation(issues_found=issues, fixed_scenes=fixed), unresolved
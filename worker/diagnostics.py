@@ -0,0 +1,111 @@
+"""
+Worker diagnostics, run on demand (`models` is a network call, so nothing does it at import).
+
+    cd worker && python diagnostics.py models        # Gemini models this key can call
+    cd worker && python diagnostics.py imports       # cumulative import time of the worker entry module
+    cd worker && python diagnostics.py prompts /jobs/<job_id>   # prompt size per agent for a finished job
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from glob import glob
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, ".."))
+
+
+def import_time_us(module: str = "tasks") -> dict:
+    """
+    Imports module in a fresh interpreter under `python -X importtime` and returns
+    the cumulative microseconds per imported module.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (BASE_DIR, os.path.join(BASE_DIR, ".."), env.get("PYTHONPATH")) if p)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def prompt_sizes(job_dir: str) -> dict:
+    """
+    Rebuilds each agent's prompt from a job's saved inputs and outputs (no model
+    calls) and returns {agent: (chars, estimated tokens)}. Per-scene agents report
+    the sum over scenes.
+    """
+    import agents
+    import prompt_budget
+    from shared.schemas.schemas import SeriesBible, SceneManifest, SceneLayout, SceneLayoutValidation, EditorPlan
+
+    with open(os.path.join(job_dir, "input.json")) as f:
+        story = json.load(f)["story"]
+    with open(os.path.join(job_dir, "script.txt")) as f:
+        script = f.read()
+    with open(os.path.join(job_dir, "bible.json")) as f:
+        bible = SeriesBible.model_validate_json(f.read())
+    with open(os.path.join(job_dir, "scene_manifest.json")) as f:
+        items = [item.model_dump() for item in SceneManifest.model_validate_json(f.read()).scenes]
+    scenes = []
+    for path in sorted(glob(os.path.join(job_dir, "scenes", "*.json"))):
+        with open(path) as f:
+            scenes.append(SceneLayout.model_validate_json(f.read()))
+
+    batch_items = "[\n" + ",\n".join(json.dumps(item, separators=(",", ":")) for item in items) + "\n]"
+    prompts = {
+        "head_writer": [f"{agents.HEAD_WRITER_PROMPT}\n\nSTORY:\n{story}"],
+        "series_bible": [agents.json_prompt(f"{agents.SERIES_BIBLE_PROMPT}\n\nSCRIPT:\n{script[:2000]}...", SeriesBible)],
+        "episode_director": [agents.json_prompt(agents.episode_director_prompt(script, bible), SceneManifest)],
+        "scene_layout": [agents.json_prompt(agents.scene_layout_prompt(item, bible, script), SceneLayout) for item in items],
+        "scene_layout_batch": [agents.json_prompt(
+            f"{agents.scene_layout_batch_prompt(bible, script)}\n\nSCENE MANIFEST ITEMS:\n{batch_items}",
+            agents.SceneLayoutBatch)],
+        "continuity_supervisor": [agents.json_prompt(agents.continuity_supervisor_prompt(scenes, bible), SceneLayoutValidation)],
+        "post_producer": [agents.json_prompt(f"{agents.POST_PRODUCER_PROMPT}\n\nNumber of scenes: {len(scenes)}", EditorPlan)],
+    }
+    return {
+        agent: (sum(len(p) for p in texts), sum(prompt_budget.estimate_tokens(p) for p in texts))
+        for agent, texts in prompts.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("models")
+    imports_parser = sub.add_parser("imports")
+    imports_parser.add_argument("--module", default="tasks")
+    imports_parser.add_argument("--top", type=int, default=15)
+    prompts_parser = sub.add_parser("prompts")
+    prompts_parser.add_argument("job_dir")
+    args = parser.parse_args()
+
+    if args.command == "models":
+        import agents
+        for name in agents.list_models():
+            print(name)
+        return 0
+
+    if args.command == "prompts":
+        sizes = prompt_sizes(args.job_dir)
+        for agent, (chars, tokens) in sizes.items():
+            print(f"{agent:22s} {chars:8d} chars  ~{tokens:6d} tokens")
+        print(f"{'total':22s} {sum(c for c, _ in sizes.values()):8d} chars  ~{sum(t for _, t in sizes.values()):6d} tokens")
+        return 0
+
+    times = import_time_us(args.module)
+    for name, us in sorted(times.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{us / 1000:8.1f} ms  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import os
+import json
+import math
+import fcntl
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Progressive output for fan-out renders, all under <job>/final/ (single-pass episode
+# renders publish every segment at once when they finish):
+#   segments.json   every segment of the episode in play order (written at dispatch)
+#   segments/*.ts   finished scenes/slices, remuxed from their MP4 without re-encoding
+#   index.m3u8      the longest finished prefix; EXT-X-ENDLIST once the job completes
+PLAYLIST_NAME = "index.m3u8"
+MANIFEST_NAME = "segments.json"
+SEGMENTS_DIRNAME = "segments"
+LOCK_NAME = ".hls.lock"
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+HLS_ENABLED = os.getenv("HLS_ENABLED", "1") == "1"
+
+
+def segment_file(segment_id: str, key: str) -> str:
+    # Named after the render cache key, so a segment's content never changes under its URL
+    return f"{segment_id}-{key[:12]}.ts"
+
+
+def _final_dir(job_dir: str) -> str:
+    return os.path.join(job_dir, "final")
+
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _locked(job_dir: str):
+    final_dir = _final_dir(job_dir)
+    os.makedirs(os.path.join(final_dir, SEGMENTS_DIRNAME), exist_ok=True)
+    f = open(os.path.join(final_dir, LOCK_NAME), "a")
+    fcntl.flock(f, fcntl.LOCK_EX)
+    return f
+
+
+def _load_manifest(job_dir: str):
+    try:
+        with open(os.path.join(_final_dir(job_dir), MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_playlist(job_dir: str, manifest: dict, ended: bool = False):
+    final_dir = _final_dir(job_dir)
+    segments = manifest["segments"]
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        "#EXT-X-PLAYLIST-TYPE:EVENT",
+        f"#EXT-X-TARGETDURATION:{max([math.ceil(s['duration']) for s in segments] or [1])}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+    ]
+    # Players only accept appends, so list segments up to the first one still rendering
+    for segment in segments:
+        name = segment_file(segment["id"], segment["key"])
+        if not os.path.exists(os.path.join(final_dir, SEGMENTS_DIRNAME, name)):
+            break
+        lines.append(f"#EXTINF:{segment['duration']:.3f},")
+        lines.append(f"{SEGMENTS_DIRNAME}/{name}")
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    _write_atomic(os.path.join(final_dir, PLAYLIST_NAME), "\n".join(lines) + "\n")
+
+
+def start(job_dir: str, segments):
+    """
+    Declares the episode's segments in play order, as dicts with "id", "key"
+    (render cache key) and "duration" in seconds, and opens the playlist.
+    Segments already published under the same id and key are kept.
+    """
+    if not HLS_ENABLED:
+        return
+    offset = 0.0
+    for segment in segments:
+        segment["start"] = offset
+        offset += segment["duration"]
+    manifest = {"segments": segments}
+    with _locked(job_dir):
+        _write_atomic(os.path.join(_final_dir(job_dir), MANIFEST_NAME), json.dumps(manifest, indent=2))
+        keep = {segment_file(s["id"], s["key"]) for s in segments}
+        segments_dir = os.path.join(_final_dir(job_dir), SEGMENTS_DIRNAME)
+        for name in os.listdir(segments_dir):
+            if name not in keep:
+                os.remove(os.path.join(segments_dir, name))
+        _write_playlist(job_dir, manifest)
+
+
+def publish(job_dir: str, segment_id: str, key: str, mp4_path: str):
+    """Remuxes a finished scene/slice MP4 into its TS segment and extends the playlist."""
+    if not HLS_ENABLED:
+        return
+    manifest = _load_manifest(job_dir)
+    entry = next((s for s in (manifest or {}).get("segments", []) if s["id"] == segment_id and s["key"] == key), None)
+    if entry is None:
+        # Superseded by a newer edit of the scene, or a render outside the HLS plan
+        return
+    output_path = os.path.join(_final_dir(job_dir), SEGMENTS_DIRNAME, segment_file(segment_id, key))
+    tmp_path = f"{output_path}.tmp"
+    cmd = [
+        FFMPEG_BINARY, "-y",
+        "-loglevel", "error",
+        "-i", mp4_path,
+        "-c", "copy",
+        # Each scene was encoded from t=0; shift it to its place in the episode
+        "-output_ts_offset", f"{entry['start']:.6f}",
+        "-f", "mpegts",
+        tmp_path,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        os.replace(tmp_path, output_path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        logger.warning(f"Could not publish HLS segment {segment_id}: {e} {stderr.decode(errors='replace').strip()}")
+        return
+    with _locked(job_dir):
+        manifest = _load_manifest(job_dir)
+        if manifest:
+            _write_playlist(job_dir, manifest)
+
+
+def publish_missing(job_dir: str, source_dir: str):
+    """
+    Remuxes segments that were never published (e.g. rendered before the plan
+    existed) from `<source_dir>/<segment id>.mp4` when that file exists.
+    """
+    if not HLS_ENABLED:
+        return
+    manifest = _load_manifest(job_dir)
+    if not manifest:
+        return
+    for segment in manifest["segments"]:
+        published = os.path.join(_final_dir(job_dir), SEGMENTS_DIRNAME, segment_file(segment["id"], segment["key"]))
+        source = os.path.join(source_dir, f"{segment['id']}.mp4")
+        if not os.path.exists(published) and os.path.exists(source):
+            publish(job_dir, segment["id"], segment["key"], source)
+
+
+def finish(job_dir: str):
+    """Closes the playlist with EXT-X-ENDLIST."""
+    if not HLS_ENABLED:
+        return
+    with _locked(job_dir):
+        manifest = _load_manifest(job_dir)
+        if manifest:
+            _write_playlist(job_dir, manifest, ended=True)
@@ -0,0 +1,55 @@
+import json
+
+# Incremental parsing of a streamed JSON object of the form {..., "<field>": [{...}, {...}], ...}:
+# each object in the array is returned as soon as its closing brace arrives, long before
+# the whole response is valid JSON. Text around the object (e.g. ```json fences) is ignored.
+
+
+class ArrayItemParser:
+    def __init__(self, field: str):
+        self.field = field
+        self._chunks = []
+        self._offset = 0  # characters consumed so far
+        self._stack = []  # open containers, "{" or "["
+        self._in_string = False
+        self._escape = False
+        self._string = []  # characters of the top-level string being read
+        self._last_string = None  # most recent top-level string, i.e. the key before a ":"
+        self._key = None  # key whose value is open in the top-level object
+        self._item_start = None  # offset of the "{" of the array item being read
+
+    def _in_target_array(self) -> bool:
+        return self._stack == ["{", "["] and self._key == self.field
+
+    def feed(self, text: str) -> list:
+        """Consumes the next chunk of the response; returns the array items it completed."""
+        items = []
+        self._chunks.append(text)
+        for ch in text:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._string)
+                if self._in_string and len(self._stack) == 1:
+                    self._string.append(ch)
+            elif ch == '"':
+                self._in_string = True
+                self._string = []
+            elif ch == ":" and len(self._stack) == 1:
+                self._key = self._last_string
+            elif ch in "{[":
+                if ch == "{" and self._in_target_array():
+                    self._item_start = self._offset
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if ch == "}" and self._item_start is not None and self._in_target_array():
+                    text_so_far = "".join(self._chunks)
+                    items.append(json.loads(text_so_far[self._item_start:self._offset + 1]))
+                    self._item_start = None
+            self._offset += 1
+        return items
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import logging
+import tempfile
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Validated LLM responses, keyed by everything that determines them. Shared by all
+# workers on the jobs volume, like the render cache.
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(os.getenv("JOBS_DIR", "/jobs"), ".llm_cache"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 ** 2)))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+# Bump when prompt assembly or response parsing changes meaning
+CACHE_VERSION = 1
+
+# Running total of entry bytes, so a store only scans the cache once it is over the cap
+SIZE_FILE = "size.json"
+
+# Per-request bypass (JobRequest.bypass_llm_cache): skip lookups, still store fresh responses
+_bypass = ContextVar("llm_cache_bypass", default=False)
+
+
+def set_bypass(bypass: bool):
+    _bypass.set(bool(bypass))
+
+
+def make_key(model_name: str, prompt: str, generation_config: dict = None, schema: dict = None) -> str:
+    canonical = json.dumps({
+        "v": CACHE_VERSION,
+        "model": model_name,
+        "prompt": prompt,
+        "generation_config": generation_config or {},
+        "schema": schema,
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(LLM_CACHE_DIR, key[:2], f"{key}.json")
+
+
+def get(key: str):
+    """Returns the cached response text, or None on a miss, expiry or bypass."""
+    if not LLM_CACHE_ENABLED or _bypass.get():
+        return None
+    path = _entry_path(key)
+    try:
+        with open(path, "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("created", 0) > LLM_CACHE_TTL_SECONDS:
+        delete(key)
+        return None
+    try:
+        # mtime doubles as the LRU clock
+        os.utime(path)
+    except OSError:
+        pass
+    return entry["text"]
+
+
+def put(key: str, text: str, model_name: str = None):
+    """Stores a response that already passed validation, then evicts if the cache is over its size cap."""
+    if not LLM_CACHE_ENABLED:
+        return
+    path = _entry_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"created": time.time(), "model": model_name, "text": text}, f)
+        replaced = _size(path)
+        os.replace(tmp_path, path)
+        if _add_bytes(_size(path) - replaced) > LLM_CACHE_MAX_BYTES:
+            evict()
+    except OSError as e:
+        logger.warning(f"Could not store LLM response in cache: {e}")
+
+
+def delete(key: str):
+    path = _entry_path(key)
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        _add_bytes(-size)
+    except OSError:
+        pass
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _update_total(change) -> int:
+    """
+    Read-modify-write of the byte total shared by all worker processes: change(total)
+    returns the new total; total is None when there is no counter yet.
+    """
+    os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(LLM_CACHE_DIR, SIZE_FILE), "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        try:
+            total = json.loads(f.read())["bytes"]
+        except (ValueError, KeyError, TypeError):
+            total = None
+        total = max(0, change(total))
+        f.seek(0)
+        f.truncate()
+        json.dump({"bytes": total}, f)
+    return total
+
+
+def _add_bytes(delta: int) -> int:
+    # No counter yet (new cache, or one written before the counter existed): count once
+    return _update_total(lambda total: sum(size for _, size, _ in _entries()) if total is None else total + delta)
+
+
+def _entries():
+    if not os.path.isdir(LLM_CACHE_DIR):
+        return []
+    entries = []
+    for shard in os.scandir(LLM_CACHE_DIR):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(".json"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    return entries
+
+
+def evict(max_bytes: int = None):
+    """Removes least-recently-used entries until the cache fits in max_bytes."""
+    max_bytes = LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+    # Resyncs the running total with what is actually on disk
+    _update_total(lambda _: total)
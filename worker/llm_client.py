@@ -0,0 +1,291 @@
+"""
+LLM client backends behind agents.generate_content, selected with LLM_BACKEND:
+
+    gemini  the real google.generativeai models (default)
+    record  gemini, plus every prompt -> response pair appended to LLM_FIXTURES
+    replay  no network: serves responses from LLM_FIXTURES, or synthesizes valid ones
+
+Replay matches a prompt exactly first, then by template (the agent instruction and
+the response schema), so fixtures recorded from one story serve any story. Unmatched
+prompts get a synthesized response: an instance of the JSON schema embedded in the
+prompt, plain text, or a PNG for image models. LLM_REPLAY_LATENCY_MS ("800" or a
+"400-1200" range) and LLM_REPLAY_ERROR_RATE / LLM_REPLAY_ERROR_KIND ("429" or "500")
+make it behave like a loaded remote API for end-to-end load tests.
+"""
+import os
+import io
+import json
+import time
+import base64
+import fcntl
+import random
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_FIXTURES = os.getenv("LLM_FIXTURES", os.path.join(os.getenv("JOBS_DIR", "/jobs"), ".llm_fixtures.jsonl"))
+LLM_REPLAY_LATENCY_MS = os.getenv("LLM_REPLAY_LATENCY_MS", "0")
+LLM_REPLAY_ERROR_RATE = float(os.getenv("LLM_REPLAY_ERROR_RATE", "0"))
+LLM_REPLAY_ERROR_KIND = os.getenv("LLM_REPLAY_ERROR_KIND", "429")
+# Replayed streams arrive in chunks of this many characters
+REPLAY_CHUNK_CHARS = 64
+# Marker call_gemini_json puts before the response schema
+SCHEMA_MARKER = "obeying this schema:\n"
+
+
+def fixture_key(model_name: str, prompt: str, generation_config: dict = None) -> str:
+    canonical = json.dumps({"model": model_name, "prompt": prompt, "generation_config": generation_config or {}}, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def template_key(model_name: str, prompt: str) -> str:
+    """Same for every prompt an agent builds: its first line and its response schema."""
+    schema = prompt.split(SCHEMA_MARKER, 1)[1] if SCHEMA_MARKER in prompt else ""
+    return hashlib.sha256(f"{model_name}\n{prompt.splitlines()[0] if prompt else ''}\n{schema}".encode()).hexdigest()
+
+
+# --- Responses (the subset of the genai response API the agents use) ---
+
+class InlineData:
+    def __init__(self, data: bytes, mime_type: str = "image/png"):
+        self.data = data
+        self.mime_type = mime_type
+
+
+class Part:
+    def __init__(self, text: str = None, inline_data: InlineData = None):
+        self.text = text
+        self.inline_data = inline_data
+
+
+class Response:
+    def __init__(self, text: str = "", images=None):
+        self.text = text
+        self.parts = ([Part(text=text)] if text else []) + [Part(inline_data=InlineData(data)) for data in images or []]
+
+
+def _response_record(response) -> dict:
+    """Text and image parts of a real genai response."""
+    try:
+        text = response.text
+    except ValueError:
+        # Raised by genai when the response has no text parts (e.g. image only)
+        text = ""
+    images = [base64.b64encode(part.inline_data.data).decode() for part in (response.parts or []) if part.inline_data]
+    return {"text": text, "images": images}
+
+
+# --- Backends ---
+
+class GeminiClient:
+    """The real API. The SDK takes ~0.75s to import, so it loads on first use."""
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key
+        self._genai = None
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def genai(self):
+        with self._lock:
+            if self._genai is None:
+                import google.generativeai as genai
+                if self.api_key:
+                    genai.configure(api_key=self.api_key)
+                self._genai = genai
+        return self._genai
+
+    def model(self, model_name: str):
+        if model_name not in self._models:
+            self._models[model_name] = self.genai().GenerativeModel(model_name)
+        return self._models[model_name]
+
+    def generate_content(self, model_name: str, prompt: str, generation_config: dict = None, stream: bool = False):
+        kwargs = {"generation_config": generation_config} if generation_config else {}
+        return self.model(model_name).generate_content(prompt, stream=stream, **kwargs)
+
+    def list_models(self):
+        return [m.name for m in self.genai().list_models() if 'generateContent' in m.supported_generation_methods]
+
+
+class RecordingClient:
+    """Passes calls to `inner` and appends each prompt -> response pair to a JSONL fixture file."""
+
+    def __init__(self, inner, path: str):
+        self.inner = inner
+        self.path = path
+
+    def _record(self, model_name: str, prompt: str, generation_config: dict, response: dict):
+        entry = {
+            "key": fixture_key(model_name, prompt, generation_config),
+            "template": template_key(model_name, prompt),
+            "model": model_name,
+            "prompt": prompt,
+            "generation_config": generation_config or {},
+            **response,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Workers on one volume append to the same file
+        with open(self.path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(json.dumps(entry) + "\n")
+
+    def _recorded_stream(self, model_name, prompt, generation_config, chunks):
+        text = []
+        for chunk in chunks:
+            text.append(chunk.text)
+            yield chunk
+        self._record(model_name, prompt, generation_config, {"text": "".join(text), "images": []})
+
+    def generate_content(self, model_name: str, prompt: str, generation_config: dict = None, stream: bool = False):
+        response = self.inner.generate_content(model_name, prompt, generation_config=generation_config, stream=stream)
+        if stream:
+            return self._recorded_stream(model_name, prompt, generation_config, response)
+        self._record(model_name, prompt, generation_config, _response_record(response))
+        return response
+
+    def list_models(self):
+        return self.inner.list_models()
+
+
+class InjectedError(Exception):
+    """Error raised by the replayer on purpose; 429s look like the API's to rate_limiter."""
+
+    def __init__(self, code: int):
+        self.code = code
+        message = "429 Resource has been exhausted (injected)" if code == 429 else f"{code} Internal error (injected)"
+        super().__init__(message)
+
+
+class ReplayClient:
+    def __init__(self, path: str = None, latency_ms: str = "0", error_rate: float = 0.0, error_kind: str = "429", seed: int = None):
+        self.latency_ms = [float(x) for x in str(latency_ms).split("-")]
+        self.error_rate = error_rate
+        self.error_kind = int(error_kind)
+        self.random = random.Random(seed)
+        self.by_key, self.by_template = {}, {}
+        self._turns = {}
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.by_key[entry["key"]] = entry
+                        self.by_template.setdefault(entry["template"], []).append(entry)
+        logger.info(f"LLM replay: {len(self.by_key)} recorded responses from {path}")
+
+    def _latency(self) -> float:
+        low, high = self.latency_ms[0], self.latency_ms[-1]
+        return self.random.uniform(low, high) / 1000
+
+    def lookup(self, model_name: str, prompt: str, generation_config: dict = None):
+        entry = self.by_key.get(fixture_key(model_name, prompt, generation_config))
+        if entry:
+            return entry
+        # Rotate through the template's recordings so repeated calls don't all get the first one
+        candidates = self.by_template.get(template_key(model_name, prompt))
+        if candidates:
+            turn = self._turns.get(candidates[0]["template"], 0)
+            self._turns[candidates[0]["template"]] = turn + 1
+            return candidates[turn % len(candidates)]
+        return None
+
+    def generate_content(self, model_name: str, prompt: str, generation_config: dict = None, stream: bool = False):
+        delay = self._latency()
+        if self.error_rate and self.random.random() < self.error_rate:
+            time.sleep(delay / 4)
+            raise InjectedError(self.error_kind)
+        entry = self.lookup(model_name, prompt, generation_config)
+        if entry:
+            text, images = entry["text"], [base64.b64decode(data) for data in entry.get("images", [])]
+        else:
+            text, images = synthesize(model_name, prompt)
+        if stream:
+            return self._stream(text, delay)
+        time.sleep(delay)
+        return Response(text, images)
+
+    def _stream(self, text: str, delay: float):
+        pieces = [text[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(text), REPLAY_CHUNK_CHARS)] or [""]
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            yield Response(piece)
+
+    def list_models(self):
+        return sorted({entry["model"] for entry in self.by_key.values()})
+
+
+# --- Synthesized responses ---
+
+def _resolve(schema: dict, root: dict) -> dict:
+    while "$ref" in schema:
+        schema = root["$defs"][schema["$ref"].split("/")[-1]]
+    return schema
+
+
+def synthesize_instance(schema: dict, root: dict = None, name: str = "", index: int = 0):
+    """A minimal value valid against a pydantic-generated JSON schema."""
+    root = root or schema
+    schema = _resolve(schema, root)
+    if "default" in schema:
+        return schema["default"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"] or schema["anyOf"]
+        return synthesize_instance(options[0], root, name, index)
+    kind = schema.get("type", "object")
+    if kind == "object":
+        return {key: synthesize_instance(prop, root, key, index) for key, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [synthesize_instance(schema.get("items", {}), root, name, i) for i in range(3)]
+    if kind == "integer":
+        # Ids must differ between list items; other numbers just need to be sane
+        return index + 1 if name.endswith("id") else max(5, int(schema.get("minimum", 0)))
+    if kind == "number":
+        return float(max(5, schema.get("minimum", 0)))
+    if kind == "boolean":
+        return False
+    return name or "text"
+
+
+def synthesize(model_name: str, prompt: str):
+    """(text, images) for a prompt with no recording."""
+    if "image" in model_name:
+        from PIL import Image, ImageDraw
+        img = Image.new("RGBA", (512, 512), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle([150, 150, 362, 450], fill="blue", outline="black", width=5)
+        draw.ellipse([180, 50, 332, 200], fill="yellow", outline="black", width=5)
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        return "", [buffer.getvalue()]
+    if SCHEMA_MARKER in prompt:
+        schema = json.loads(prompt.split(SCHEMA_MARKER, 1)[1])
+        return json.dumps(synthesize_instance(schema)), []
+    return "Synthetic response.", []
+
+
+_client = None
+
+
+def get_client():
+    """The process-wide client for LLM_BACKEND."""
+    global _client
+    if _client is None:
+        if LLM_BACKEND == "replay":
+            _client = ReplayClient(LLM_FIXTURES, LLM_REPLAY_LATENCY_MS, LLM_REPLAY_ERROR_RATE, LLM_REPLAY_ERROR_KIND)
+        elif LLM_BACKEND == "record":
+            _client = RecordingClient(GeminiClient(os.getenv("GEMINI_API_KEY")), LLM_FIXTURES)
+        else:
+            _client = GeminiClient(os.getenv("GEMINI_API_KEY"))
+    return _client
+
+
+def set_client(client):
+    """Swaps the backend (tests, benchmarks)."""
+    global _client
+    _client = client
@@ -0,0 +1,103 @@
+import os
+import glob
+import time
+import logging
+
+from prometheus_client import Counter, Histogram, CollectorRegistry, REGISTRY, start_http_server, multiprocess
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics for the worker. Celery prefork runs tasks in child processes, so
+# with PROMETHEUS_MULTIPROC_DIR set (it must be set before prometheus_client is first
+# imported, i.e. in the environment) every child writes its samples to files there and
+# the exporter in the parent process sums them. Without it, metrics are per process.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9808"))
+if MULTIPROC_DIR:
+    # Unlabelled metrics open their sample files as soon as they are defined below
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160, 320)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+AGENT_SECONDS = Histogram(
+    "agent_call_seconds", "Wall time of one agent LLM call, retries and rate-limit waits included",
+    ["agent", "outcome"], buckets=SECONDS_BUCKETS,
+)
+AGENT_RETRIES = Histogram(
+    "agent_call_retries", "Extra attempts an agent call needed", ["agent"], buckets=(0, 1, 2, 3, 5),
+)
+AGENT_PROMPT_CHARS = Histogram("agent_prompt_chars", "Prompt size sent to the model", ["agent"], buckets=SIZE_BUCKETS)
+AGENT_RESPONSE_CHARS = Histogram("agent_response_chars", "Response size from the model", ["agent"], buckets=SIZE_BUCKETS)
+
+RENDER_FPS = Histogram(
+    "render_fps", "Frames per second of one render (frames / encode seconds)", ["kind"],
+    buckets=(5, 10, 20, 40, 60, 90, 120, 180, 240, 360),
+)
+RENDER_SECONDS = Histogram("render_encode_seconds", "Encode wall time of one render", ["kind"], buckets=SECONDS_BUCKETS)
+RENDER_BYTES = Histogram("render_output_bytes", "Size of one rendered MP4", ["kind"], buckets=SIZE_BUCKETS)
+RENDER_CACHE_HITS = Counter("render_cache_hits_total", "Renders served from the render cache", ["kind"])
+
+ASSEMBLE_SECONDS = Histogram("assemble_seconds", "ffmpeg concat time in assemble_video", buckets=SECONDS_BUCKETS)
+
+TASK_QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds", "Time from publish until a worker started the task", ["task"], buckets=SECONDS_BUCKETS,
+)
+TASK_SECONDS = Histogram("celery_task_seconds", "Task run time", ["task", "state"], buckets=SECONDS_BUCKETS)
+JOB_OUTCOMES = Counter("job_outcomes_total", "Jobs reaching a terminal status", ["outcome"])
+
+# Message header carrying the publish time, for queue wait
+SENT_AT_HEADER = "sent_at"
+
+
+def observe_agent_call(agent: str, seconds: float, attempts: int, prompt_chars: int, response_chars: int = None, outcome: str = "ok"):
+    AGENT_SECONDS.labels(agent, outcome).observe(seconds)
+    AGENT_RETRIES.labels(agent).observe(max(0, attempts - 1))
+    AGENT_PROMPT_CHARS.labels(agent).observe(prompt_chars)
+    if response_chars is not None:
+        AGENT_RESPONSE_CHARS.labels(agent).observe(response_chars)
+
+
+def observe_render(kind: str, stats: dict, output_path: str):
+    """kind is "scene", "slice" or "episode"; stats as returned by the renderer."""
+    if stats.get("seconds"):
+        RENDER_SECONDS.labels(kind).observe(stats["seconds"])
+        RENDER_FPS.labels(kind).observe(stats["fps"])
+    if output_path and os.path.exists(output_path):
+        RENDER_BYTES.labels(kind).observe(os.path.getsize(output_path))
+
+
+def observe_queue_wait(task_name: str, sent_at):
+    try:
+        TASK_QUEUE_WAIT.labels(task_name).observe(max(0.0, time.time() - float(sent_at)))
+    except (TypeError, ValueError):
+        pass
+
+
+def registry():
+    """The registry to export: the sum over all prefork children in multiprocess mode."""
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    collector_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collector_registry)
+    return collector_registry
+
+
+def start_exporter(port: int = None):
+    """Serves /metrics from the Celery parent process; call before the pool forks."""
+    port = WORKER_METRICS_PORT if port is None else port
+    if MULTIPROC_DIR:
+        # Files from a previous worker run would be summed with this one's
+        for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.db")):
+            os.remove(path)
+    try:
+        start_http_server(port, registry=registry())
+        logger.info(f"Worker metrics on :{port}/metrics")
+    except OSError as e:
+        logger.warning(f"Could not start worker metrics exporter on port {port}: {e}")
+
+
+def process_exited(pid: int):
+    """Lets the multiprocess collector drop live-only samples of a finished child."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,38 @@
+import os
+
+# Rough token accounting for prompt packing. ~4 characters per token holds well enough
+# for English prose and JSON to keep requests inside the model's limits.
+CHARS_PER_TOKEN = 4
+LAYOUT_BATCH_INPUT_TOKENS = int(os.getenv("LAYOUT_BATCH_INPUT_TOKENS", "24000"))
+# Gemini 2.0 Flash stops at 8192 output tokens; leave headroom
+LAYOUT_BATCH_OUTPUT_TOKENS = int(os.getenv("LAYOUT_BATCH_OUTPUT_TOKENS", "6000"))
+LAYOUT_TOKENS_PER_SCENE = int(os.getenv("LAYOUT_TOKENS_PER_SCENE", "200"))
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def chunk_by_budget(items, item_tokens, fixed_tokens: int, input_budget: int = None,
+                    output_budget: int = None, output_tokens_per_item: int = None):
+    """
+    Splits items into consecutive chunks whose prompt (fixed part + items) and
+    expected output both fit the budgets. `item_tokens[i]` is the prompt cost
+    of items[i]. A single oversized item still gets a chunk of its own.
+    """
+    input_budget = LAYOUT_BATCH_INPUT_TOKENS if input_budget is None else input_budget
+    output_budget = LAYOUT_BATCH_OUTPUT_TOKENS if output_budget is None else output_budget
+    output_tokens_per_item = LAYOUT_TOKENS_PER_SCENE if output_tokens_per_item is None else output_tokens_per_item
+
+    chunks, chunk = [], []
+    used_input, used_output = fixed_tokens, 0
+    for item, tokens in zip(items, item_tokens):
+        if chunk and (used_input + tokens > input_budget or used_output + output_tokens_per_item > output_budget):
+            chunks.append(chunk)
+            chunk, used_input, used_output = [], fixed_tokens, 0
+        chunk.append(item)
+        used_input += tokens
+        used_output += output_tokens_per_item
+    if chunk:
+        chunks.append(chunk)
+    return chunks
@@ -0,0 +1,189 @@
+import os
+import re
+import time
+import random
+import logging
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# One token bucket per model in Redis, shared by every worker process and host.
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0"))
+DEFAULT_RPM = int(os.getenv("GEMINI_RPM", "15"))
+# Per-model overrides, e.g. "gemini-2.0-flash=15,gemini-2.5-flash-image=10"
+RPM_OVERRIDES = {
+    name.strip(): int(rpm)
+    for name, _, rpm in (item.partition("=") for item in os.getenv("GEMINI_RPM_LIMITS", "").split(","))
+    if name.strip() and rpm.strip()
+}
+# Calls that may go out back to back before the steady rate applies
+BURST_FRACTION = float(os.getenv("GEMINI_BURST_FRACTION", "0.25"))
+BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE", "2"))
+BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX", "60"))
+KEY_PREFIX = "ratelimit:"
+
+# Refill, then take one token. Returns 0 when granted, else milliseconds to wait.
+# Uses the Redis clock so workers on different hosts agree on time.
+TOKEN_BUCKET_SCRIPT = """
+local bucket, blocked = KEYS[1], KEYS[2]
+local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local until_ms = tonumber(redis.call('GET', blocked) or '0')
+if until_ms > now then
+  return until_ms - now
+end
+
+local state = redis.call('HMGET', bucket, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', bucket, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', bucket, math.ceil(capacity * 1000 / rate) + 60000)
+return wait
+"""
+
+# Blocks the model until now + delay and drains its bucket, so waiters resume one by one.
+PENALIZE_SCRIPT = """
+local bucket, blocked = KEYS[1], KEYS[2]
+local delay_ms = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local until_ms = now + delay_ms
+if until_ms > tonumber(redis.call('GET', blocked) or '0') then
+  redis.call('SET', blocked, until_ms, 'PX', delay_ms)
+end
+redis.call('HSET', bucket, 'tokens', '0', 'ts', tostring(until_ms))
+return until_ms
+"""
+
+_client = None
+_scripts = {}
+# Used only while Redis is unreachable: per-process buckets, so limits are per worker
+_local_buckets = {}
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(RATE_LIMIT_REDIS_URL, socket_timeout=2)
+    return _client
+
+
+def set_client(client):
+    """Points the limiter at another Redis (tests use fakeredis)."""
+    global _client
+    _client = client
+    _scripts.clear()
+
+
+def _script(name, source):
+    if name not in _scripts:
+        _scripts[name] = get_client().register_script(source)
+    return _scripts[name]
+
+
+def rpm_for(model_name: str) -> int:
+    return RPM_OVERRIDES.get(model_name, DEFAULT_RPM)
+
+
+def _keys(model_name: str):
+    return [f"{KEY_PREFIX}{model_name}:bucket", f"{KEY_PREFIX}{model_name}:blocked"]
+
+
+def _local_try_acquire(model_name: str, rate: float, capacity: float) -> float:
+    now = time.monotonic()
+    tokens, ts = _local_buckets.get(model_name, (capacity, now))
+    tokens = min(capacity, tokens + (now - ts) * rate)
+    if tokens >= 1:
+        _local_buckets[model_name] = (tokens - 1, now)
+        return 0.0
+    _local_buckets[model_name] = (tokens, now)
+    return (1 - tokens) / rate
+
+
+def try_acquire(model_name: str) -> float:
+    """Takes a token for one request. Returns 0 if granted, else seconds to wait first."""
+    rpm = rpm_for(model_name)
+    rate = rpm / 60.0
+    capacity = max(1.0, rpm * BURST_FRACTION)
+    try:
+        wait_ms = _script("bucket", TOKEN_BUCKET_SCRIPT)(keys=_keys(model_name), args=[rate, capacity])
+        return wait_ms / 1000.0
+    except redis.RedisError as e:
+        logger.warning(f"Rate limiter Redis unavailable ({e}); limiting {model_name} per process")
+        return _local_try_acquire(model_name, rate, capacity)
+
+
+def acquire(model_name: str):
+    """Blocks until a request to model_name fits its requests-per-minute budget."""
+    waited = 0.0
+    while True:
+        wait = try_acquire(model_name)
+        if wait <= 0:
+            break
+        # Jitter so workers released together don't all hit the bucket at once
+        wait += random.uniform(0, min(0.25, wait / 4))
+        time.sleep(wait)
+        waited += wait
+    if waited:
+        logger.info(f"Rate limited {model_name}: waited {waited:.1f}s")
+
+
+def penalize(model_name: str, retry_after: float = None) -> float:
+    """
+    Records a 429. Honors the server's retry-after when given, otherwise backs off
+    exponentially with the number of 429s in a row. Returns the delay in seconds.
+    """
+    strikes_key = f"{KEY_PREFIX}{model_name}:strikes"
+    try:
+        client = get_client()
+        strikes = client.incr(strikes_key)
+        client.expire(strikes_key, int(BACKOFF_MAX_SECONDS * 2))
+        delay = retry_after if retry_after else min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (strikes - 1))
+        _script("penalize", PENALIZE_SCRIPT)(keys=_keys(model_name), args=[int(delay * 1000)])
+    except redis.RedisError as e:
+        delay = retry_after or BACKOFF_BASE_SECONDS
+        logger.warning(f"Rate limiter Redis unavailable ({e}); backing off {model_name} per process")
+        _local_buckets[model_name] = (0.0, time.monotonic() + delay)
+    logger.warning(f"{model_name} returned 429; pausing all workers for {delay:.1f}s")
+    return delay
+
+
+def record_success(model_name: str):
+    """Resets the 429 streak after a successful call."""
+    try:
+        get_client().delete(f"{KEY_PREFIX}{model_name}:strikes")
+    except redis.RedisError:
+        pass
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    code = getattr(exc, "code", None)
+    if code == 429 or type(exc).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    return "429" in str(exc) or "Resource has been exhausted" in str(exc)
+
+
+def retry_after_seconds(exc: Exception):
+    """Server-suggested delay from a 429: a Retry-After header or the gRPC RetryInfo."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("Retry-After"):
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", str(exc)) or re.search(r"retry in ([\d.]+)\s*s", str(exc), re.IGNORECASE)
+    if match:
+        return float(match.group(1))
+    return None
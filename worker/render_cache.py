@@ -0,0 +1,138 @@
+import os
+import json
+import fcntl
+import shutil
+import hashlib
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Finished scene MP4s, content-addressed and shared by every job on this volume.
+# Keep it on the same filesystem as JOBS_DIR so hits are hard links, not copies.
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join(os.getenv("JOBS_DIR", "/jobs"), ".render_cache"))
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+RENDER_CACHE_ENABLED = os.getenv("RENDER_CACHE_ENABLED", "1") == "1"
+# Bump when renderer output changes for the same inputs
+CACHE_VERSION = 2
+
+STATS_FILE = "stats.json"
+
+
+def make_key(fingerprint: dict) -> str:
+    """sha256 over the canonical JSON of everything that determines the output pixels."""
+    canonical = json.dumps({"v": CACHE_VERSION, **fingerprint}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(RENDER_CACHE_DIR, key[:2], f"{key}.mp4")
+
+
+def _link_or_copy(src: str, dst: str):
+    """Places src at dst atomically, as a hard link when the filesystem allows it."""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst), suffix=".tmp")
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def _record(field: str):
+    """Bumps a hit/miss counter shared by all worker processes; returns the totals."""
+    os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(RENDER_CACHE_DIR, STATS_FILE), "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        try:
+            stats = json.loads(f.read() or "{}")
+        except ValueError:
+            stats = {}
+        stats[field] = stats.get(field, 0) + 1
+        f.seek(0)
+        f.truncate()
+        json.dump(stats, f)
+    return stats
+
+
+def _entries():
+    if not os.path.isdir(RENDER_CACHE_DIR):
+        return []
+    entries = []
+    for shard in os.scandir(RENDER_CACHE_DIR):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(".mp4"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    return entries
+
+
+def stats() -> dict:
+    """Hit/miss counters plus current size of the cache."""
+    try:
+        with open(os.path.join(RENDER_CACHE_DIR, STATS_FILE), "r") as f:
+            counters = json.load(f)
+    except (OSError, ValueError):
+        counters = {}
+    entries = _entries()
+    return {
+        "hits": counters.get("hits", 0),
+        "misses": counters.get("misses", 0),
+        "entries": len(entries),
+        "bytes": sum(size for _, size, _ in entries),
+    }
+
+
+def fetch(key: str, output_path: str) -> bool:
+    """Links a cached render to output_path. Returns False on a miss."""
+    if not RENDER_CACHE_ENABLED:
+        return False
+    entry = _entry_path(key)
+    try:
+        _link_or_copy(entry, output_path)
+        # mtime doubles as the LRU clock
+        os.utime(entry)
+    except FileNotFoundError:
+        totals = _record("misses")
+        logger.info(f"Render cache miss {key[:12]} (hits={totals.get('hits', 0)} misses={totals['misses']})")
+        return False
+    totals = _record("hits")
+    logger.info(f"Render cache hit {key[:12]} -> {output_path} (hits={totals['hits']} misses={totals.get('misses', 0)})")
+    return True
+
+
+def contains(key: str) -> bool:
+    return RENDER_CACHE_ENABLED and os.path.exists(_entry_path(key))
+
+
+def store(key: str, rendered_path: str):
+    """Adds a finished render to the cache, then evicts least-recently-used entries over budget."""
+    if not RENDER_CACHE_ENABLED or not os.path.exists(rendered_path):
+        return
+    try:
+        _link_or_copy(rendered_path, _entry_path(key))
+        evict()
+    except OSError as e:
+        logger.warning(f"Could not store render {rendered_path} in cache: {e}")
+
+
+def evict(max_bytes: int = None):
+    """Removes least-recently-used entries until the cache fits in max_bytes."""
+    max_bytes = RENDER_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            # Jobs hold their own hard link, so this only frees the cache's reference
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
@@ -1,14 +1,18 @@
 import os
+import glob
 import math
+import bisect
+import time
+import tempfile
 import traceback
 import logging
-# Monkeypatch PIL.Image.ANTIALIAS for moviepy compatibility
+import subprocess
+from typing import List
+import numpy as np
 import PIL.Image
-if not hasattr(PIL.Image, 'ANTIALIAS'):
-    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
-
-from moviepy.editor import ColorClip, TextClip, CompositeVideoClip, ImageClip
-from shared.schemas.schemas import SceneLayout
+from shared.schemas.schemas import SceneLayout, RenderProfile, EditorPlan
+import asset_store
+import subtitles
 
 logger = logging.getLogger(__name__)
 
@@ -19,92 +23,556 @@ if os.path.exists(os.path.join(BASE_DIR, "shared", "assets")):
 else:
     ASSETS_DIR = os.path.join(BASE_DIR, "..", "shared", "assets")
 
-def render_scene(scene: SceneLayout, output_path: str, character_path: str = None):
+# Layout constants below are designed at 1280x720 and scaled to the profile height
+REFERENCE_HEIGHT = 720
+CHARACTER_HEIGHT = 500
+
+RENDER_PROFILES = {
+    "preview": RenderProfile(name="preview", width=426, height=240, fps=12, preset="ultrafast", crf=30),
+    "draft": RenderProfile(name="draft", width=854, height=480, fps=24, preset="ultrafast", crf=28),
+    "standard": RenderProfile(name="standard", width=1280, height=720, fps=24, preset="ultrafast", crf=23),
+    "hd": RenderProfile(name="hd", width=1920, height=1080, fps=30, preset="veryfast", crf=21),
+}
+DEFAULT_PROFILE = RENDER_PROFILES[os.getenv("RENDER_PROFILE", "standard")]
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+# "ffmpeg" streams raw frames into an ffmpeg pipe, "moviepy" uses write_videofile
+RENDER_ENCODER = os.getenv("RENDER_ENCODER", "ffmpeg")
+# Fixed keyframe interval, so time slices of a scene can start on a GOP boundary
+# and be stream-copied back together with the same structure as a serial encode
+GOP_SECONDS = int(os.getenv("RENDER_GOP_SECONDS", "2"))
+
+
+def get_profile(name: str = None) -> RenderProfile:
+    if not name:
+        return DEFAULT_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{name}'. Available: {', '.join(RENDER_PROFILES)}")
+    return RENDER_PROFILES[name]
+
+
+def profile_from_editor_plan(plan: EditorPlan, override: str = None) -> RenderProfile:
     """
-    Renders a single scene to an MP4 file.
+    Maps an EditorPlan onto a render profile: a named profile with the same
+    resolution and fps if there is one, otherwise a custom profile. The plan
+    only sets frame size and rate; x264 preset and CRF stay those of
+    DEFAULT_PROFILE. A named `override` (e.g. from the job request) wins over
+    the plan, encoder settings included.
     """
+    if override:
+        return get_profile(override)
     try:
-        duration = scene.duration
-        
-        # 1. Background
-        # Try to find a background image for the location, fallback to color
-        bg_path = os.path.join(ASSETS_DIR, "backgrounds", f"{scene.location}.png")
-        if os.path.exists(bg_path):
-            bg_clip = ImageClip(bg_path).set_duration(duration)
-            bg_clip = bg_clip.resize(newsize=(1280, 720))
-        else:
-            # Fallback color based on location name hash or simple logic
-            color = (100, 100, 100)
-            if "home" in scene.location: color = (200, 200, 220)
-            elif "street" in scene.location: color = (100, 120, 100)
-            elif "office" in scene.location: color = (220, 220, 250)
-            
-            bg_clip = ColorClip(size=(1280, 720), color=color, duration=duration)
-
-        # 2. Main Character
-        # Overlay character centered
-        
-        # Determine strict character path
-        if not character_path or not os.path.exists(character_path):
-             # Fallback to shared asset
-             character_path = os.path.join(ASSETS_DIR, "character", "main_character.png")
-
-        if os.path.exists(character_path):
-             char_clip = ImageClip(character_path).set_duration(duration)
-             char_clip = char_clip.resize(height=500)
-
-             # --- Basic Animation Logic ---
-             action = (scene.action or "").lower()
-             
-             if "walk_in" in action or "enter" in action:
-                 # Slide in from left
-                 char_clip = char_clip.set_position(lambda t: (min(1280/2 - 250, -250 + (1280/2 + 250) * (t/1.5)), "bottom"))
-             elif "walk_out" in action or "leave" in action:
-                 # Slide out to right
-                 char_clip = char_clip.set_position(lambda t: (1280/2 - 250 + 100 * t, "bottom"))
-             elif "jump" in action:
-                 # Simple jump (sin wave on Y)
-                # Simple jump (sin wave on Y)
-                 char_clip = char_clip.set_pos(lambda t: ("center", 1080 - 500 - abs(math.sin(t*5)*50)))
-             else:
-                 # Idle "Breathing" (Subtle Zoom)
-                 # Zoom from 1.0 to 1.05
-                 char_clip = char_clip.resize(lambda t: 1 + 0.02 * math.sin(t*2))
-                 char_clip = char_clip.set_pos(("center", "bottom"))
-
-             final_clip = CompositeVideoClip([bg_clip, char_clip])
+        width, height = (int(v) for v in plan.resolution.lower().split("x"))
+    except (AttributeError, ValueError):
+        logger.warning(f"Unparseable editor plan resolution {plan.resolution!r}, using {DEFAULT_PROFILE.name}")
+        return DEFAULT_PROFILE
+    # The post producer asks for 1080p30 on every job; "hd"'s slower preset is opt-in only
+    encoder = {"preset": DEFAULT_PROFILE.preset, "crf": DEFAULT_PROFILE.crf}
+    for profile in RENDER_PROFILES.values():
+        if (profile.width, profile.height, profile.fps) == (width, height, plan.fps):
+            return profile.model_copy(update=encoder)
+    # yuv420p needs even dimensions
+    return DEFAULT_PROFILE.model_copy(update={
+        "name": f"custom_{width}x{height}_{plan.fps}",
+        "width": width - width % 2,
+        "height": height - height % 2,
+        "fps": plan.fps,
+    })
+
+
+def _scale(profile: RenderProfile) -> float:
+    return profile.height / REFERENCE_HEIGHT
+
+
+def character_height(profile: RenderProfile) -> int:
+    return int(round(CHARACTER_HEIGHT * _scale(profile)))
+
+
+def gop_frames(profile: RenderProfile) -> int:
+    return max(1, GOP_SECONDS * profile.fps)
+
+
+def plan_slices(duration: float, profile: RenderProfile, slice_seconds: float):
+    """
+    Splits a scene's frames into GOP-aligned (first_frame, n_frames) ranges of
+    about `slice_seconds` each. Returns a single range if the scene is shorter.
+    """
+    total = _frame_count(duration, profile.fps)
+    gop = gop_frames(profile)
+    slice_frames = max(gop, int(slice_seconds * profile.fps) // gop * gop)
+    return [(first, min(slice_frames, total - first)) for first in range(0, total, slice_frames)]
+
+
+def _location_color(location: str):
+    """Fallback background color when no image exists for a location."""
+    color = (100, 100, 100)
+    if "home" in location: color = (200, 200, 220)
+    elif "street" in location: color = (100, 120, 100)
+    elif "office" in location: color = (220, 220, 250)
+    return color
+
+
+def make_sprite(rgba: np.ndarray):
+    """
+    Prepares a premultiplied uint8 RGBA overlay for repeated blending. The color
+    planes are used as-is (memmapped assets stay shared); only the inverse alpha
+    is materialized, as uint16 so the blend never overflows.
+    """
+    alpha = rgba[..., 3]
+    if alpha.min() == 255:
+        return {"rgb": rgba[..., :3], "inv_alpha": None}
+    return {"rgb": rgba[..., :3], "inv_alpha": (255 - alpha).astype(np.uint16)[..., None]}
+
+
+def blend_sprite(frame: np.ndarray, sprite: dict, x: int, y: int):
+    """Alpha-blends a sprite onto `frame` in place, clipped to the frame bounds."""
+    h, w = sprite["rgb"].shape[:2]
+    fh, fw = frame.shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(fw, x + w), min(fh, y + h)
+    if x0 >= x1 or y0 >= y1:
+        return frame
+
+    src = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+    roi = frame[y0:y1, x0:x1]
+    if sprite["inv_alpha"] is None:
+        roi[...] = sprite["rgb"][src]
+    else:
+        # out = src_premultiplied + dst * (1 - alpha), all in 0..255 integer space
+        roi[...] = sprite["rgb"][src] + (roi * sprite["inv_alpha"][src] + 127) // 255
+    return frame
+
+
+def _background_path(scene: SceneLayout):
+    """Background image for the scene's location, or None to use a flat color."""
+    bg_path = os.path.join(ASSETS_DIR, "backgrounds", f"{scene.location}.png")
+    return bg_path if os.path.exists(bg_path) else None
+
+
+def _character_path(character_path: str = None):
+    """The job's character if it exists, else the shared fallback, else None."""
+    # Determine strict character path
+    if not character_path or not os.path.exists(character_path):
+        # Fallback to shared asset
+        character_path = os.path.join(ASSETS_DIR, "character", "main_character.png")
+    return character_path if os.path.exists(character_path) else None
+
+
+def render_fingerprint(scene: SceneLayout, character_path: str = None, profile: RenderProfile = None) -> dict:
+    """
+    Everything that determines a scene's output pixels: the layout (minus its
+    position in the episode), the asset bytes, the profile and the subtitle font.
+    """
+    profile = profile or DEFAULT_PROFILE
+    bg_path = _background_path(scene)
+    character_path = _character_path(character_path)
+    return {
+        "scene": scene.model_dump(exclude={"scene_id"}),
+        "background": asset_store.file_digest(bg_path) if bg_path else None,
+        "character": asset_store.file_digest(character_path) if character_path else None,
+        "profile": profile.model_dump(),
+        "font": subtitles.DEFAULT_FONT,
+    }
+
+
+def _load_background(scene: SceneLayout, profile: RenderProfile) -> np.ndarray:
+    # Try to find a background image for the location, fallback to color
+    bg_path = _background_path(scene)
+    if bg_path:
+        return asset_store.load_image(bg_path, size=(profile.width, profile.height))[..., :3].copy()
+
+    frame = np.empty((profile.height, profile.width, 3), dtype=np.uint8)
+    frame[...] = _location_color(scene.location)
+    return frame
+
+
+def _subtitle_sprite(text: str, profile: RenderProfile):
+    """Rasterizes the dialogue once; returns a sprite or None on failure."""
+    scale = _scale(profile)
+    try:
+        return make_sprite(subtitles.render_subtitle(
+            text,
+            box_width=int(profile.width * 1100 / 1280),
+            size=max(8, int(round(40 * scale))),
+            stroke=max(1, int(round(2 * scale))),
+        ))
+    except Exception as e:
+        logger.error(f"Failed to render subtitle: {e}")
+        return None
+
+
+def build_static_layer(scene: SceneLayout, profile: RenderProfile = None) -> np.ndarray:
+    """
+    Bakes every time-invariant layer (background + subtitle) into a single
+    uint8 RGB frame so per-frame work is limited to the character.
+    """
+    profile = profile or DEFAULT_PROFILE
+    frame = _load_background(scene, profile)
+
+    if scene.dialogue:
+        sprite = _subtitle_sprite(scene.dialogue, profile)
+        if sprite is not None:
+            h, w = sprite["rgb"].shape[:2]
+            blend_sprite(frame, sprite, int((profile.width - w) / 2), int(profile.height * 0.85))
+
+    return frame
+
+
+class CharacterLayer:
+    """
+    The only moving layer in a scene. Sprites are cached per integer size, so
+    the idle "breathing" zoom only resizes ~20 distinct times per scene.
+    """
+
+    def __init__(self, character_path: str, action: str, profile: RenderProfile = None):
+        self.profile = profile or DEFAULT_PROFILE
+        self.rgba = asset_store.load_image(character_path, height=character_height(self.profile))
+        self.height, self.width = self.rgba.shape[:2]
+        self.action = (action or "").lower()
+        self._sprites = {}
+
+    def _sprite(self, w: int, h: int):
+        sprite = self._sprites.get((w, h))
+        if sprite is None:
+            rgba = self.rgba
+            if (w, h) != (self.width, self.height):
+                # Already premultiplied, so resample it as "RGBa" directly
+                img = PIL.Image.fromarray(np.ascontiguousarray(rgba), "RGBa").resize((w, h), PIL.Image.LANCZOS)
+                rgba = np.asarray(img)
+            sprite = make_sprite(rgba)
+            self._sprites[(w, h)] = sprite
+        return sprite
+
+    def place(self, t: float):
+        """Returns (sprite, x, y) for time t."""
+        # --- Basic Animation Logic ---
+        action = self.action
+        w, h = self.width, self.height
+        frame_w, frame_h = self.profile.width, self.profile.height
+        s = _scale(self.profile)
+
+        if "walk_in" in action or "enter" in action:
+            # Slide in from left
+            x, y = min(frame_w/2 - 250*s, -250*s + (frame_w/2 + 250*s) * (t/1.5)), frame_h - h
+        elif "walk_out" in action or "leave" in action:
+            # Slide out to right
+            x, y = frame_w/2 - 250*s + 100*s * t, frame_h - h
+        elif "jump" in action:
+            # Simple jump (sin wave on Y)
+            x, y = (frame_w - w) / 2, frame_h - h - abs(math.sin(t*5)*50*s)
         else:
-             # Fallback if no character asset
-             logger.warning(f"Character asset not found at {character_path}")
-             final_clip = bg_clip
-
-        # 3. Subtitles / Dialogue
-        if scene.dialogue:
-            # Ensure imagemagick is installed for TextClip
-            # On failures, we might skip text or use a basic font
-            try:
-                txt_clip = TextClip(scene.dialogue, fontsize=40, color='white', font='Liberation-Sans-Bold', stroke_color='black', stroke_width=2, size=(1100, None), method='caption')
-                txt_clip = txt_clip.set_position(('center', 0.85), relative=True).set_duration(duration)
-                final_clip = CompositeVideoClip([final_clip, txt_clip])
-            except Exception as e:
-                logger.error(f"Failed to generate TextClip: {e}")
-
-        final_clip.fps = 30
-        final_clip.write_videofile(
-            output_path, 
-            fps=24, # Lower FPS to save CPU
-            codec="libx264", 
-            audio=False, 
-            verbose=False, 
-            logger=None,
-            preset="ultrafast", # Faster encoding, less memory
-            threads=1 # Single thread to reduce memory peak
-        )
-        
+            # Idle "Breathing" (Subtle Zoom)
+            scale = 1 + 0.02 * math.sin(t*2)
+            w, h = int(self.width * scale), int(self.height * scale)
+            x, y = (frame_w - w) / 2, frame_h - h
+
+        return self._sprite(w, h), int(x), int(y)
+
+
+def warm_assets(character_path: str = None, profile: RenderProfile = None):
+    """
+    Pre-decodes assets into the shared asset store: a job's character when a
+    path is given, otherwise the shared backgrounds and fallback character.
+    """
+    profile = profile or DEFAULT_PROFILE
+    if character_path:
+        asset_store.warm(character_path, height=character_height(profile))
+        return
+    for bg_path in sorted(glob.glob(os.path.join(ASSETS_DIR, "backgrounds", "*.png"))):
+        asset_store.warm(bg_path, size=(profile.width, profile.height))
+    fallback_path = os.path.join(ASSETS_DIR, "character", "main_character.png")
+    if os.path.exists(fallback_path):
+        asset_store.warm(fallback_path, height=character_height(profile))
+
+
+def make_frame_source(scene: SceneLayout, character_path: str = None, profile: RenderProfile = None):
+    """
+    Returns make_frame(t) for the scene. Each call copies the pre-composited
+    static layer into a reused buffer and blends the character into its region.
+    """
+    profile = profile or DEFAULT_PROFILE
+    static = build_static_layer(scene, profile)
+
+    resolved_path = _character_path(character_path)
+    if not resolved_path:
+        # Fallback if no character asset
+        logger.warning(f"Character asset not found at {character_path}")
+        return lambda t: static
+    character_path = resolved_path
+
+    character = CharacterLayer(character_path, scene.action, profile)
+    buffer = np.empty_like(static)
+
+    def make_frame(t):
+        np.copyto(buffer, static)
+        sprite, x, y = character.place(t)
+        return blend_sprite(buffer, sprite, x, y)
+
+    return make_frame
+
+
+class EncoderError(Exception):
+    pass
+
+
+class FFmpegPipeEncoder:
+    """
+    Streams uint8 RGB frames straight into `ffmpeg -f rawvideo -pix_fmt rgb24`
+    over stdin. Frames are written from their own buffer without copies.
+    """
+
+    def __init__(self, output_path: str, profile: RenderProfile, threads: int = 1, keyframe_times=None):
+        self.output_path = output_path
+        self.frames = 0
+        self.broken = False
+        cmd = [
+            FFMPEG_BINARY, "-y",
+            "-loglevel", "error",
+            "-f", "rawvideo",
+            "-vcodec", "rawvideo",
+            "-s", f"{profile.width}x{profile.height}",
+            "-pix_fmt", "rgb24",
+            "-r", str(profile.fps),
+            "-an", "-i", "-",
+            "-vcodec", "libx264",
+            "-preset", profile.preset,
+            "-crf", str(profile.crf),
+            "-g", str(gop_frames(profile)),
+            *(["-force_key_frames", keyframe_times] if keyframe_times else []),
+            "-threads", str(threads),
+            "-pix_fmt", profile.pix_fmt,
+            output_path,
+        ]
+        self._stderr = tempfile.TemporaryFile()
+        self._start = time.perf_counter()
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._stderr)
+
+    def write(self, frame: np.ndarray) -> bool:
+        """Writes one frame. Returns False once ffmpeg has gone away."""
+        if self.broken:
+            return False
+        try:
+            self.proc.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        except (BrokenPipeError, OSError):
+            self.broken = True
+            return False
+        self.frames += 1
+        return True
+
+    def close(self) -> dict:
+        """Finishes the encode and returns timing stats; raises EncoderError on failure."""
+        try:
+            self.proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            self.broken = True
+        returncode = self.proc.wait()
+        seconds = time.perf_counter() - self._start
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode(errors="replace").strip()
+        self._stderr.close()
+
+        if returncode != 0 or self.broken:
+            raise EncoderError(f"ffmpeg exited with {returncode} after {self.frames} frames: {stderr}")
+        return {"frames": self.frames, "seconds": seconds, "fps": self.frames / seconds if seconds else 0.0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Abort: don't wait for ffmpeg to finish a partial file
+            self.proc.kill()
+            self.proc.wait()
+            self._stderr.close()
+            return False
+        return False
+
+
+def _frame_count(duration: float, fps: int) -> int:
+    return int(math.ceil(duration * fps - 1e-9))
+
+
+def _segment_cut_times(durations, fps: int) -> str:
+    """
+    Comma-separated start times of every segment after the first, half a frame
+    early so float rounding can't push a cut onto the next frame. A forced
+    keyframe restarts x264's GOP count, so each segment gets the same keyframes
+    as a standalone encode of it.
+    """
+    cuts = []
+    frames = 0
+    for duration in durations[:-1]:
+        frames += _frame_count(duration, fps)
+        cuts.append(f"{(frames - 0.5) / fps:.6f}")
+    return ",".join(cuts)
+
+
+def moviepy_video_clip():
+    """
+    moviepy.editor costs ~0.5s to import and is only needed by the fallback
+    encoder, so it loads on first use instead of in every worker process.
+    """
+    # Monkeypatch PIL.Image.ANTIALIAS for moviepy compatibility
+    if not hasattr(PIL.Image, 'ANTIALIAS'):
+        PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+    from moviepy.editor import VideoClip
+    return VideoClip
+
+
+def encode_segments(segments, output_path: str, profile: RenderProfile = None, encoder: str = None, threads: int = 1) -> dict:
+    """
+    Encodes consecutive segments into one H.264 MP4 with a single encoder.
+    `segments` is a list of (duration, factory); factory() returns make_frame(t)
+    with t local to the segment and is only called when that segment starts,
+    so one scene's layers are in memory at a time. `threads` is the x264
+    thread count (admission control picks it from the free cores). Every
+    segment starts on a keyframe, so split_episode can cut it back out.
+    Returns {"frames", "seconds", "fps"}.
+    """
+    profile = profile or DEFAULT_PROFILE
+    encoder = encoder or RENDER_ENCODER
+    fps = profile.fps
+    keyframe_times = _segment_cut_times([duration for duration, _ in segments], fps)
+
+    if encoder == "ffmpeg":
+        try:
+            with FFmpegPipeEncoder(output_path, profile, threads=threads, keyframe_times=keyframe_times) as pipe:
+                for duration, factory in segments:
+                    make_frame = factory()
+                    n_frames = _frame_count(duration, fps)
+                    for i in range(n_frames):
+                        if not pipe.write(make_frame(i / fps)):
+                            # ffmpeg died; stop producing frames, close() reports why
+                            logger.error(f"ffmpeg pipe closed early at frame {pipe.frames}")
+                            return pipe.close()
+                return pipe.close()
+        except FileNotFoundError:
+            logger.warning(f"{FFMPEG_BINARY} not found, falling back to moviepy encoder")
+
+    # moviepy needs one global make_frame(t); map t onto the segment it falls in
+    starts = [0.0]
+    for duration, _ in segments:
+        starts.append(starts[-1] + duration)
+    current = {"index": None, "make_frame": None}
+
+    def make_frame(t):
+        index = min(bisect.bisect_right(starts, t) - 1, len(segments) - 1)
+        if index != current["index"]:
+            current["index"], current["make_frame"] = index, segments[index][1]()
+        return current["make_frame"](t - starts[index])
+
+    n_frames = sum(_frame_count(duration, fps) for duration, _ in segments)
+    start = time.perf_counter()
+    clip = moviepy_video_clip()(make_frame, duration=starts[-1])
+    clip.write_videofile(
+        output_path,
+        fps=fps,
+        codec="libx264",
+        audio=False,
+        verbose=False,
+        logger=None,
+        preset=profile.preset,
+        ffmpeg_params=["-crf", str(profile.crf), "-g", str(gop_frames(profile))] + (["-force_key_frames", keyframe_times] if keyframe_times else []),
+        threads=threads
+    )
+    seconds = time.perf_counter() - start
+    return {"frames": n_frames, "seconds": seconds, "fps": n_frames / seconds if seconds else 0.0}
+
+
+def encode_frames(make_frame, duration: float, output_path: str, profile: RenderProfile = None, encoder: str = None, threads: int = 1) -> dict:
+    """Encodes make_frame(t) for t in [0, duration) to an H.264 MP4."""
+    return encode_segments([(duration, lambda: make_frame)], output_path, profile=profile, encoder=encoder, threads=threads)
+
+
+def _error_frame_source(profile: RenderProfile):
+    error_frame = np.empty((profile.height, profile.width, 3), dtype=np.uint8)
+    error_frame[...] = (255, 0, 0)
+    return lambda t: error_frame
+
+
+def _frame_range_source(make_frame, first_frame: int, fps: int):
+    # Slices see local t; evaluate the animation at the absolute frame time
+    return lambda t: make_frame((round(t * fps) + first_frame) / fps)
+
+
+def render_scene(scene: SceneLayout, output_path: str, character_path: str = None, profile: RenderProfile = None, threads: int = 1, frame_range=None) -> dict:
+    """
+    Renders a single scene to an MP4 file. Returns encoder stats.
+    `frame_range` = (first_frame, n_frames) renders just that time slice
+    (see plan_slices) with the animation at its absolute time.
+    """
+    profile = profile or DEFAULT_PROFILE
+    duration = scene.duration
+    first_frame = 0
+    if frame_range is not None:
+        first_frame, n_frames = frame_range
+        duration = n_frames / profile.fps
+    label = f"scene {scene.scene_id}" + (f" frames {first_frame}-{first_frame + n_frames - 1}" if frame_range else "")
+    try:
+        make_frame = make_frame_source(scene, character_path, profile)
+        if first_frame:
+            make_frame = _frame_range_source(make_frame, first_frame, profile.fps)
+        stats = encode_frames(make_frame, duration, output_path, profile, threads=threads)
+        logger.info(f"Rendered {label} [{profile.name}]: {stats['frames']} frames in {stats['seconds']:.2f}s ({stats['fps']:.1f} fps)")
+        return {**stats, "ok": True}
+
     except Exception as e:
-        logger.error(f"Error rendering scene {scene.scene_id}: {e}")
+        logger.error(f"Error rendering {label}: {e}")
         logger.error(traceback.format_exc())
         # Create a red error clip so pipeline doesn't break completely
-        error_clip = ColorClip(size=(1280, 720), color=(255, 0, 0), duration=scene.duration)
-        error_clip.fps = 24
-        error_clip.write_videofile(output_path, fps=24, codec="libx264", preset="ultrafast")
+        stats = encode_frames(_error_frame_source(profile), duration, output_path, profile, threads=threads)
+        return {**stats, "ok": False}
+
+
+def render_episode(scenes: List[SceneLayout], output_path: str, character_path: str = None, profile: RenderProfile = None, threads: int = 1) -> dict:
+    """
+    Renders all scenes, in order, through one encoder straight to the final MP4.
+    Skips the per-scene encoder start-up and the concat pass. Scenes whose
+    layers fail to build become red error frames, as in render_scene; their
+    ids are returned in stats["failed_scenes"].
+    """
+    profile = profile or DEFAULT_PROFILE
+    failed_scenes = []
+
+    def scene_factory(scene):
+        def factory():
+            try:
+                return make_frame_source(scene, character_path, profile)
+            except Exception as e:
+                logger.error(f"Error preparing scene {scene.scene_id}: {e}")
+                logger.error(traceback.format_exc())
+                failed_scenes.append(scene.scene_id)
+                return _error_frame_source(profile)
+        return factory
+
+    stats = encode_segments([(scene.duration, scene_factory(scene)) for scene in scenes], output_path, profile, threads=threads)
+    logger.info(f"Rendered episode ({len(scenes)} scenes) [{profile.name}]: {stats['frames']} frames in {stats['seconds']:.2f}s ({stats['fps']:.1f} fps)")
+    return {**stats, "failed_scenes": failed_scenes}
+
+
+def split_episode(episode_path: str, scenes: List[SceneLayout], output_paths: List[str], profile: RenderProfile = None):
+    """
+    Stream-copies an MP4 from render_episode back into one MP4 per scene, cutting
+    on the keyframes forced at each scene start. Raises CalledProcessError if
+    ffmpeg fails; no output path is touched unless every scene was cut.
+    """
+    profile = profile or DEFAULT_PROFILE
+    cut_times = _segment_cut_times([scene.duration for scene in scenes], profile.fps)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_paths[0])) as tmp_dir:
+        cmd = [
+            FFMPEG_BINARY, "-y",
+            "-loglevel", "error",
+            "-i", episode_path,
+            "-c", "copy",
+            "-f", "segment",
+            "-segment_format", "mp4",
+            "-reset_timestamps", "1",
+            *(["-segment_times", cut_times] if cut_times else []),
+            os.path.join(tmp_dir, "%03d.mp4"),
+        ]
+        subprocess.run(cmd, check=True, capture_output=True)
+        parts = [os.path.join(tmp_dir, f"{index:03d}.mp4") for index in range(len(scenes))]
+        if not all(os.path.exists(part) for part in parts):
+            raise subprocess.CalledProcessError(0, cmd, stderr=b"fewer segments than scenes")
+        for part, output_path in zip(parts, output_paths):
+            os.replace(part, output_path)
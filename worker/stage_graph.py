@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import fcntl
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-job ledger for a stage dependency graph ({stage: [stages it needs]}). Stages run as
+# separate tasks; whichever task finishes the last dependency of a stage gets it back from
+# complete() and launches it, so every stage starts exactly once and as early as possible.
+LEDGER_NAME = "stages.json"
+LOCK_NAME = ".stages.lock"
+
+
+def _locked(job_dir: str):
+    f = open(os.path.join(job_dir, LOCK_NAME), "a")
+    fcntl.flock(f, fcntl.LOCK_EX)
+    return f
+
+
+def _load(job_dir: str) -> dict:
+    try:
+        with open(os.path.join(job_dir, LEDGER_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"started": {}, "done": {}, "failed": None}
+
+
+def _save(job_dir: str, ledger: dict):
+    path = os.path.join(job_dir, LEDGER_NAME)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(ledger, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def _ready(graph: dict, ledger: dict):
+    return [
+        stage for stage, needs in graph.items()
+        if stage not in ledger["started"] and all(need in ledger["done"] for need in needs)
+    ]
+
+
+def reset(job_dir: str, graph: dict):
+    """Starts a fresh run; returns the stages with no dependencies, marked started."""
+    with _locked(job_dir):
+        ledger = {"started": {}, "done": {}, "failed": None}
+        ready = _ready(graph, ledger)
+        for stage in ready:
+            ledger["started"][stage] = time.time()
+        _save(job_dir, ledger)
+    return ready
+
+
+def complete(job_dir: str, stage: str, graph: dict):
+    """
+    Marks stage done and returns the stages that became runnable, already marked
+    started so no other caller gets them. Nothing runs after a stage has failed.
+    """
+    with _locked(job_dir):
+        ledger = _load(job_dir)
+        if stage in ledger["done"]:
+            return []
+        ledger["done"][stage] = time.time()
+        ready = [] if ledger["failed"] else _ready(graph, ledger)
+        for name in ready:
+            ledger["started"][name] = time.time()
+        _save(job_dir, ledger)
+    started = ledger["started"].get(stage)
+    if started:
+        logger.info(f"Stage {stage} done in {ledger['done'][stage] - started:.1f}s; starting {ready or 'nothing'}")
+    return ready
+
+
+def fail(job_dir: str, stage: str):
+    """Records the first failed stage; later complete() calls launch nothing."""
+    with _locked(job_dir):
+        ledger = _load(job_dir)
+        if not ledger["failed"]:
+            ledger["failed"] = stage
+            _save(job_dir, ledger)
@@ -0,0 +1,110 @@
+import os
+import logging
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Tried in order; SUBTITLE_FONT (a .ttf path or name) takes precedence
+FONT_CANDIDATES = [
+    "LiberationSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+    "DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+]
+DEFAULT_FONT = os.getenv("SUBTITLE_FONT", FONT_CANDIDATES[0])
+SUBTITLE_CACHE_SIZE = int(os.getenv("SUBTITLE_CACHE_SIZE", "512"))
+
+
+@lru_cache(maxsize=16)
+def load_font(font: str, size: int):
+    """Resolves a TrueType font, falling back loudly to Pillow's bitmap font."""
+    for candidate in [font] + [c for c in FONT_CANDIDATES if c != font]:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    logger.warning(f"No TrueType font found for subtitles (wanted {font}); using Pillow default font")
+    return ImageFont.load_default()
+
+
+def _text_width(font, text: str) -> int:
+    if hasattr(font, "getlength"):
+        return int(np.ceil(font.getlength(text)))
+    return font.getbbox(text)[2]
+
+
+def _line_height(font) -> int:
+    if isinstance(font, ImageFont.FreeTypeFont):
+        ascent, descent = font.getmetrics()
+        return ascent + descent
+    return font.getbbox("Ag")[3]
+
+
+def wrap_text(text: str, font, max_width: int):
+    """Greedy word wrap; words wider than the box are split by character."""
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if _text_width(font, candidate) <= max_width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            line = ""
+            for ch in word:
+                if line and _text_width(font, line + ch) > max_width:
+                    lines.append(line)
+                    line = ""
+                line += ch
+        lines.append(line)
+    return lines
+
+
+@lru_cache(maxsize=SUBTITLE_CACHE_SIZE)
+def render_line(text: str, font: str, size: int, stroke: int, color=(255, 255, 255), stroke_color=(0, 0, 0)) -> np.ndarray:
+    """
+    Rasterizes one line with stroke and fill. Returns a read-only premultiplied
+    RGBA array, cached by (text, font, size, stroke) with LRU eviction.
+    """
+    pil_font = load_font(font, size)
+    width = _text_width(pil_font, text) + 2 * stroke
+    height = _line_height(pil_font) + 2 * stroke
+    img = Image.new("RGBA", (max(width, 1), max(height, 1)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+
+    if isinstance(pil_font, ImageFont.FreeTypeFont):
+        draw.text((stroke, stroke), text, font=pil_font, fill=color + (255,), stroke_width=stroke, stroke_fill=stroke_color + (255,))
+    else:
+        # Bitmap fonts can't stroke; stamp the outline around the glyphs instead
+        for dx in range(-stroke, stroke + 1):
+            for dy in range(-stroke, stroke + 1):
+                if dx or dy:
+                    draw.text((stroke + dx, stroke + dy), text, font=pil_font, fill=stroke_color + (255,))
+        draw.text((stroke, stroke), text, font=pil_font, fill=color + (255,))
+
+    rgba = np.asarray(img.convert("RGBa")).copy()
+    rgba.setflags(write=False)
+    return rgba
+
+
+def render_subtitle(text: str, box_width: int = 1100, font: str = DEFAULT_FONT, size: int = 40, stroke: int = 2) -> np.ndarray:
+    """
+    Renders dialogue wrapped to `box_width`, each line centered, as a premultiplied
+    RGBA overlay of width `box_width` (same box the old TextClip caption used).
+    """
+    pil_font = load_font(font, size)
+    lines = [render_line(line, font, size, stroke) for line in wrap_text(text, pil_font, box_width - 2 * stroke)]
+
+    overlay = np.zeros((sum(l.shape[0] for l in lines), box_width, 4), dtype=np.uint8)
+    y = 0
+    for line in lines:
+        h, w = line.shape[:2]
+        w = min(w, box_width)
+        x = (box_width - w) // 2
+        overlay[y:y + h, x:x + w] = line[:, :w]
+        y += h
+    return overlay
@@ -1,14 +1,31 @@
 import os
 import json
 import logging
+from glob import glob
 from celery import chain, chord
+import time
+from celery.signals import worker_init, worker_process_shutdown, before_task_publish, task_prerun, task_postrun
 from celery_app import celery_app
 from agents import (
     head_writer_agent, series_bible_agent, episode_director_agent, 
-    scene_layout_agent, continuity_supervisor_agent, post_producer_agent
+    scene_layout_agent, scene_layout_batch_agent, continuity_supervisor_agent, post_producer_agent
 )
-from renderer import render_scene
-from shared.schemas.schemas import SceneLayout
+from renderer import (
+    render_scene, render_episode, split_episode, warm_assets, profile_from_editor_plan, get_profile, render_fingerprint,
+    character_height, plan_slices
+)
+import render_cache
+import asset_store
+import admission
+import hls
+import stage_graph
+import continuity
+import metrics
+import llm_cache
+from shared import job_status
+from shared.schemas.schemas import SeriesBible, SceneLayout, SceneManifest, SceneLayoutValidation, RenderProfile
+import math
+import tempfile
 import subprocess
 
 logger = logging.getLogger(__name__)
@@ -18,10 +35,32 @@ JOBS_DIR = os.getenv("JOBS_DIR", "/jobs")
 if not os.path.isabs(JOBS_DIR):
     JOBS_DIR = os.path.abspath(JOBS_DIR)
 
-def update_job_status(job_id, status, progress=0, message=None):
-    job_dir = os.path.join(JOBS_DIR, job_id)
-    status_file = os.path.join(job_dir, "status.json")
-    
+# How scenes are rendered: "fanout" (one task + encoder per scene, then concat),
+# "episode" (one encoder for the whole episode) or "auto" (episode for short jobs)
+RENDER_STRATEGY = os.getenv("RENDER_STRATEGY", "auto")
+EPISODE_MAX_SCENES = int(os.getenv("EPISODE_MAX_SCENES", "6"))
+EPISODE_MAX_SECONDS = int(os.getenv("EPISODE_MAX_SECONDS", "60"))
+# Scenes longer than this are split into GOP-aligned time slices rendered as separate tasks (0 = never)
+SLICE_SECONDS = int(os.getenv("RENDER_SLICE_SECONDS", "10"))
+# Lay out all scenes in a few batched LLM calls instead of one Celery task + call per scene
+SCENE_LAYOUT_BATCH = os.getenv("SCENE_LAYOUT_BATCH", "1") == "1"
+# Batched layouts start once this many manifest items have streamed in (fewer for the last group)
+SCENE_LAYOUT_STREAM_BATCH = int(os.getenv("SCENE_LAYOUT_STREAM_BATCH", "4"))
+# "local": rule-based continuity fixes, LLM supervisor only for what they can't fix; "llm": always the supervisor
+CONTINUITY_MODE = os.getenv("CONTINUITY_MODE", "local")
+
+# Planning pipeline: stage -> stages it needs. Each stage is its own task, launched the
+# moment its last dependency completes (see stage_graph), so character design overlaps
+# with the director and layouts, and the render waits for both.
+PIPELINE = {
+    "bible": [],                             # process_story: head writer + series bible
+    "character": ["bible"],                  # design_character
+    "scenes": ["bible"],                     # plan_scenes: episode director + scene layouts
+    "continuity": ["scenes"],                # continuity supervisor + post producer plan
+    "render": ["continuity", "character"],
+}
+
+def job_status_data(job_id, status, progress=0, message=None, dirty_scenes=None):
     data = {
         "job_id": job_id,
         "status": status,
@@ -29,9 +68,91 @@ def update_job_status(job_id, status, progress=0, message=None):
         "progress_total": 100, # Approximate
         "message": message or status
     }
-    
-    with open(status_file, "w") as f:
-        json.dump(data, f)
+    if dirty_scenes:
+        data["dirty_scenes"] = sorted(dirty_scenes)
+    return data
+
+def count_outcome(status):
+    if status in ("completed", "failed", "preview_ready"):
+        metrics.JOB_OUTCOMES.labels(status).inc()
+
+def update_job_status(job_id, status, progress=0, message=None, dirty_scenes=None):
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    # Redis first (pushes the change to /jobs/{id}/events), then the status.json snapshot
+    job_status.write(job_id, job_dir, job_status_data(job_id, status, progress, message, dirty_scenes))
+    count_outcome(status)
+
+def change_job_status(job_id, change):
+    """
+    Atomic read-modify-write of the status, for fields several tasks update concurrently
+    (dirty_scenes, progress). change(current) returns the new status dict or None.
+    """
+    data = job_status.update(job_id, os.path.join(JOBS_DIR, job_id), change)
+    if data:
+        count_outcome(data["status"])
+    return data
+
+def read_job_status(job_id):
+    return job_status.read(job_id, os.path.join(JOBS_DIR, job_id))
+
+def apply_llm_cache_policy(job_id, request_data=None):
+    # Celery reuses processes, so every agent task sets the flag from its own job
+    if request_data is None:
+        try:
+            with open(os.path.join(JOBS_DIR, job_id, "input.json"), "r") as f:
+                request_data = json.load(f)
+        except (OSError, ValueError):
+            request_data = {}
+    llm_cache.set_bypass(request_data.get("bypass_llm_cache", False))
+
+def scene_output_path(job_id, scene_id):
+    return os.path.join(JOBS_DIR, job_id, "scenes", f"{scene_id:03d}.mp4")
+
+def scene_slice_path(job_id, scene_id, index):
+    return os.path.join(JOBS_DIR, job_id, "scenes", f"{scene_id:03d}.part{index:03d}.mp4")
+
+def scene_files(job_id, scene_id):
+    """A scene's rendered files in play order: the whole-scene MP4, or its time slices."""
+    whole = scene_output_path(job_id, scene_id)
+    if os.path.exists(whole):
+        return [whole]
+    return sorted(glob(os.path.join(JOBS_DIR, job_id, "scenes", f"{scene_id:03d}.part*.mp4")))
+
+def clear_scene_outputs(job_id, scene_id):
+    # A scene is either whole or sliced; drop the other layout left by an earlier render
+    stale = [scene_output_path(job_id, scene_id)] + glob(os.path.join(JOBS_DIR, job_id, "scenes", f"{scene_id:03d}.part*.mp4"))
+    for path in stale:
+        if os.path.exists(path):
+            os.remove(path)
+
+@worker_init.connect
+def prepare_shared_assets(**kwargs):
+    # Runs once in the parent before prefork, so every child maps the same decoded files
+    warm_assets()
+    # The exporter sums every child's samples (multiprocess mode)
+    metrics.start_exporter()
+
+@worker_process_shutdown.connect
+def release_process_metrics(pid=None, **kwargs):
+    metrics.process_exited(pid or os.getpid())
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(metrics.SENT_AT_HEADER, time.time())
+
+_task_started = {}
+
+@task_prerun.connect
+def observe_task_start(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+    metrics.observe_queue_wait(task.name, task.request.get(metrics.SENT_AT_HEADER))
+
+@task_postrun.connect
+def observe_task_end(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
 
 @celery_app.task(name="tasks.generate_character_only")
 def generate_character_only(job_id, prompt):
@@ -44,6 +165,8 @@ def generate_character_only(job_id, prompt):
     
     from agents import generate_character_image
     if generate_character_image(prompt, character_path):
+        # Decoded at render size by the job that uses it (warm_job_assets)
+        asset_store.write_thumbnail(character_path)
         update_job_status(job_id, "completed", 100, "Character ready")
     else:
         update_job_status(job_id, "failed", 0, "Character generation failed")
@@ -53,10 +176,12 @@ def generate_character_only(job_id, prompt):
 @celery_app.task(name="tasks.process_story")
 def process_story(job_id, request_data):
     update_job_status(job_id, "planning", 10, "Head Writer creating script...")
+    apply_llm_cache_policy(job_id, request_data)
     
     job_dir = os.path.join(JOBS_DIR, job_id)
     
     try:
+        reset_planning(job_id)
         story = request_data.get("story")
         
         # 1. Head Writer
@@ -70,122 +195,610 @@ def process_story(job_id, request_data):
         bible = series_bible_agent(script)
         with open(os.path.join(job_dir, "bible.json"), "w") as f:
             f.write(bible.model_dump_json(indent=2))
-            
-        update_job_status(job_id, "planning", 25, "Checking character assets...")
         
-        # 2.5 Character Designer
-        # Ensure job assets dir exists
+        # Character design and scene planning both only need the bible
+        complete_stage(job_id, "bible")
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        fail_stage(job_id, "bible", str(e))
+        raise e
+
+def reset_planning(job_id):
+    """Forgets the stage ledger, manifest and layouts from an earlier run of the job's planning."""
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    stale = [os.path.join(job_dir, "scene_manifest.json")] + glob(os.path.join(job_dir, "scenes", "*.json"))
+    for path in stale:
+        if os.path.exists(path):
+            os.remove(path)
+    stage_graph.reset(job_dir, PIPELINE)
+
+def complete_stage(job_id, stage):
+    """Marks a pipeline stage done and launches every stage that was only waiting for it."""
+    for ready in stage_graph.complete(os.path.join(JOBS_DIR, job_id), stage, PIPELINE):
+        STAGE_LAUNCHERS[ready](job_id)
+
+def fail_stage(job_id, stage, message):
+    stage_graph.fail(os.path.join(JOBS_DIR, job_id), stage)
+    update_job_status(job_id, "failed", 0, message)
+
+def report_planning_message(job_id, message):
+    """
+    Message from a stage running alongside scene planning. Status and progress belong
+    to the planning branch, so they are kept as they are; once the job has moved past
+    planning the message is dropped.
+    """
+    def change(current):
+        if current.get("status", "planning") != "planning":
+            return None
+        return {**current, "status": "planning", "progress_current": current.get("progress_current", 30), "message": message}
+    change_job_status(job_id, change)
+
+@celery_app.task(name="tasks.design_character")
+def design_character(job_id):
+    """Pipeline stage "character": runs alongside scene planning, joins before render."""
+    apply_llm_cache_policy(job_id)
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    try:
         job_assets_dir = os.path.join(job_dir, "assets")
         os.makedirs(job_assets_dir, exist_ok=True)
         character_path = os.path.join(job_assets_dir, "character.png")
         
         # KEY CHANGE: Check if character already exists (from linked job)
         if os.path.exists(character_path):
-             logger.info("Using existing character asset from linked job.")
-             update_job_status(job_id, "planning", 30, "Using approved character")
+            logger.info("Using existing character asset from linked job.")
+            asset_store.write_thumbnail(character_path)
         else:
             # Generate from scratch if no pre-approved character
             from agents import character_designer_agent
+            with open(os.path.join(job_dir, "bible.json"), "r") as f:
+                bible = SeriesBible.model_validate_json(f.read())
             if character_designer_agent(bible, character_path):
-                 update_job_status(job_id, "planning", 30, "Character created successfully")
+                asset_store.write_thumbnail(character_path)
+                report_planning_message(job_id, "Character created successfully")
             else:
-                 logger.warning("Character generation failed, using fallback.")
-                 update_job_status(job_id, "planning", 30, "Character generation failed, using fallback")
-            
+                logger.warning("Character generation failed, using fallback.")
+                report_planning_message(job_id, "Character generation failed, using fallback")
+        complete_stage(job_id, "character")
+    except Exception as e:
+        logger.error(f"Character design failed for {job_id}: {e}")
+        fail_stage(job_id, "character", f"Error designing character: {str(e)}")
+        raise e
+
+@celery_app.task(name="tasks.plan_scenes")
+def plan_scenes(job_id):
+    """Pipeline stage "scenes": episode director, then scene layouts."""
+    apply_llm_cache_policy(job_id)
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    try:
+        with open(os.path.join(job_dir, "script.txt"), "r") as f:
+            script = f.read()
+        with open(os.path.join(job_dir, "bible.json"), "r") as f:
+            bible = SeriesBible.model_validate_json(f.read())
         update_job_status(job_id, "planning", 35, "Director planning scenes...")
         
-        # 3. Episode Director
-        manifest = episode_director_agent(script, bible)
+        # 3. Episode Director, streamed: layout tasks are queued as the manifest completes
+        # its items, and the last one to finish completes the stage
+        pending = []
+        def on_scene(scene_item):
+            if not SCENE_LAYOUT_BATCH:
+                # 4. Scene Layout (Parallel) - one call per scene
+                generate_scene_layout.delay(job_id, scene_item.model_dump(), bible.model_dump(), script)
+                return
+            # 4. Scene Layout (Batched) - one call per group of streamed items, per-scene retries only for bad items
+            pending.append(scene_item.model_dump())
+            if len(pending) >= SCENE_LAYOUT_STREAM_BATCH:
+                generate_scene_layout_batch.delay(job_id, list(pending), bible.model_dump(), script)
+                pending.clear()
+        manifest = episode_director_agent(script, bible, on_scene=on_scene)
         with open(os.path.join(job_dir, "scene_manifest.json"), "w") as f:
             f.write(manifest.model_dump_json(indent=2))
-            
-        # 4. Scene Layout (Parallel) - Prepare tasks
-        scene_tasks = []
-        for scene_item in manifest.scenes:
-            # We pass dicts to celery tasks to avoid serialization issues with custom objects if any
-            scene_tasks.append(generate_scene_layout.s(job_id, scene_item.model_dump(), bible.model_dump(), script))
-            
-        # Execute parallel layout generation, then continuity check
-        workflow = chord(scene_tasks)(continuity_check_and_render.s(job_id, bible.model_dump()))
+        if pending:
+            generate_scene_layout_batch.delay(job_id, pending, bible.model_dump(), script)
         
+        # Layouts may all have finished while the manifest was still streaming
+        join_scene_layouts(job_id)
     except Exception as e:
-        logger.error(f"Job {job_id} failed: {e}")
-        update_job_status(job_id, "failed", 0, str(e))
+        logger.error(f"Scene planning failed for {job_id}: {e}")
+        fail_stage(job_id, "scenes", str(e))
         raise e
 
 @celery_app.task(name="tasks.generate_scene_layout")
 def generate_scene_layout(job_id, scene_item_dict, bible_dict, script):
-    from shared.schemas.schemas import SeriesBible # Re-import inside task
     bible = SeriesBible(**bible_dict)
+    apply_llm_cache_policy(job_id)
     
-    layout = scene_layout_agent(scene_item_dict, bible, script)
+    try:
+        layout = scene_layout_agent(scene_item_dict, bible, script)
+    except Exception as e:
+        # Nothing else would notice: the stage only completes once every layout exists
+        logger.error(f"Scene layout {scene_item_dict.get('scene_id')} failed for {job_id}: {e}")
+        fail_stage(job_id, "scenes", f"Scene layout failed: {e}")
+        raise
+    # The join looks layouts up by the manifest's scene ids
+    layout.scene_id = scene_item_dict["scene_id"]
+    save_scene_layout(job_id, layout)
     
-    # Save individual scene layout for debugging
-    job_dir = os.path.join(JOBS_DIR, job_id)
-    scene_path = os.path.join(job_dir, "scenes", f"{layout.scene_id:03d}.json")
-    with open(scene_path, "w") as f:
-        f.write(layout.model_dump_json(indent=2))
-        
+    join_scene_layouts(job_id)
     return layout.model_dump()
 
+@celery_app.task(name="tasks.generate_scene_layout_batch")
+def generate_scene_layout_batch(job_id, scene_item_dicts, bible_dict, script):
+    bible = SeriesBible(**bible_dict)
+    apply_llm_cache_policy(job_id)
+    
+    try:
+        layouts = scene_layout_batch_agent(scene_item_dicts, bible, script)
+    except Exception as e:
+        scene_ids = [item.get("scene_id") for item in scene_item_dicts]
+        logger.error(f"Scene layouts {scene_ids} failed for {job_id}: {e}")
+        fail_stage(job_id, "scenes", f"Scene layout failed: {e}")
+        raise
+    for layout in layouts:
+        save_scene_layout(job_id, layout)
+    
+    join_scene_layouts(job_id)
+    return [layout.model_dump() for layout in layouts]
+
+def save_scene_layout(job_id, layout):
+    # Written whole so the join never reads a partial file
+    scene_path = os.path.join(JOBS_DIR, job_id, "scenes", f"{layout.scene_id:03d}.json")
+    with open(f"{scene_path}.tmp", "w") as f:
+        f.write(layout.model_dump_json(indent=2))
+    os.replace(f"{scene_path}.tmp", scene_path)
+
+def join_scene_layouts(job_id):
+    """
+    Completes the "scenes" stage for layout tasks dispatched while the manifest
+    streams: once scene_manifest.json exists and every scene in it has its layout
+    file. The stage ledger makes repeated or concurrent calls harmless.
+    """
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    try:
+        with open(os.path.join(job_dir, "scene_manifest.json"), "r") as f:
+            manifest = SceneManifest.model_validate_json(f.read())
+    except (OSError, ValueError):
+        return False
+    paths = [os.path.join(job_dir, "scenes", f"{item.scene_id:03d}.json") for item in manifest.scenes]
+    if not all(os.path.exists(path) for path in paths):
+        return False
+    complete_stage(job_id, "scenes")
+    return True
+
+def launch_continuity(job_id):
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    with open(os.path.join(job_dir, "bible.json"), "r") as f:
+        bible_dict = json.load(f)
+    try:
+        with open(os.path.join(job_dir, "input.json"), "r") as f:
+            request_data = json.load(f)
+    except (OSError, ValueError):
+        request_data = {}
+    layouts = [scene.model_dump() for scene in load_scene_layouts(job_id)]
+    continuity_check_and_render.delay(
+        layouts, job_id, bible_dict, request_data.get("render_profile"), request_data.get("render_mode", "final")
+    )
+
 @celery_app.task(name="tasks.continuity_check_and_render")
-def continuity_check_and_render(scene_layouts_dicts, job_id, bible_dict):
+def continuity_check_and_render(scene_layouts_dicts, job_id, bible_dict, render_profile=None, render_mode="final"):
     try:
         update_job_status(job_id, "planning", 50, "Continuity Supervisor checking...")
+        apply_llm_cache_policy(job_id)
         
-        from shared.schemas.schemas import SeriesBible, SceneLayout
         bible = SeriesBible(**bible_dict)
         scenes = [SceneLayout(**s) for s in scene_layouts_dicts]
         
-        # 5. Continuity Supervisor
-        validation = continuity_supervisor_agent(scenes, bible)
+        # 5. Continuity Supervisor - mechanical fixes locally, the LLM only for what's left
+        if CONTINUITY_MODE == "llm":
+            validation = continuity_supervisor_agent(scenes, bible)
+        else:
+            validation, unresolved = continuity.validate(scenes, bible)
+            if unresolved:
+                logger.info(f"Job {job_id}: {len(unresolved)} continuity problems need the supervisor: {unresolved}")
+                reviewed = continuity_supervisor_agent(validation.fixed_scenes, bible, unresolved)
+                # The supervisor's own output gets the same mechanical checks
+                rechecked, still_unresolved = continuity.validate(reviewed.fixed_scenes, bible)
+                if still_unresolved:
+                    logger.warning(f"Job {job_id}: continuity problems left after supervisor: {still_unresolved}")
+                validation = SceneLayoutValidation(
+                    issues_found=validation.issues_found + reviewed.issues_found + rechecked.issues_found,
+                    fixed_scenes=rechecked.fixed_scenes,
+                )
+            else:
+                logger.info(f"Job {job_id}: continuity fixed locally ({len(validation.issues_found)} issues), supervisor skipped")
         final_scenes = validation.fixed_scenes
         
         job_dir = os.path.join(JOBS_DIR, job_id)
         with open(os.path.join(job_dir, "debug_report.json"), "w") as f:
             f.write(validation.model_dump_json(indent=2))
+        
+        # Persist the approved layouts; promote/re-render reuse them without the agents
+        for stale in glob(os.path.join(job_dir, "scenes", "*.json")):
+            os.remove(stale)
+        for scene in final_scenes:
+            with open(os.path.join(job_dir, "scenes", f"{scene.scene_id:03d}.json"), "w") as f:
+                f.write(scene.model_dump_json(indent=2))
 
         # 6. Post Producer Plan
         editor_plan = post_producer_agent(final_scenes)
+        profile = profile_from_editor_plan(editor_plan, override=render_profile)
+        logger.info(f"Job {job_id} render profile: {profile.model_dump()}")
+        with open(os.path.join(job_dir, "render_plan.json"), "w") as f:
+            json.dump({"render_mode": render_mode, "final_profile": profile.model_dump()}, f, indent=2)
         
-        # 7. Render Scenes (Parallel)
-        render_tasks = []
-        for scene in final_scenes:
-            render_tasks.append(render_scene_task.s(job_id, scene.model_dump()))
-            
-        update_job_status(job_id, "rendering", 75, "Rendering scenes...")
-        
-        # Execute render, then assembly
-        workflow = chord(render_tasks)(assemble_video.s(job_id))
+        # 7. Render Scenes, as soon as the character is ready too
+        complete_stage(job_id, "continuity")
     except Exception as e:
         logger.error(f"Continuity/Render Setup failed for {job_id}: {e}")
-        update_job_status(job_id, "failed", 0, f"Error in production: {str(e)}")
+        fail_stage(job_id, "continuity", f"Error in production: {str(e)}")
+        raise e
+
+def launch_render(job_id):
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    try:
+        with open(os.path.join(job_dir, "render_plan.json"), "r") as f:
+            plan = json.load(f)
+        scenes = load_scene_layouts(job_id)
+        if plan["render_mode"] == "preview":
+            # One low-res pass; the final-quality render waits for promote_job
+            update_job_status(job_id, "rendering", 75, "Rendering preview...")
+            warm_job_assets(job_id, get_profile("preview"))
+            render_episode_task.delay(job_id, [scene.model_dump() for scene in scenes], get_profile("preview").model_dump(), "preview")
+        else:
+            update_job_status(job_id, "rendering", 75, "Rendering scenes...")
+            profile = RenderProfile(**plan["final_profile"])
+            warm_job_assets(job_id, profile)
+            start_final_render(job_id, scenes, profile)
+    except Exception as e:
+        logger.error(f"Render start failed for {job_id}: {e}")
+        fail_stage(job_id, "render", f"Error starting render: {str(e)}")
+        raise e
+
+def warm_job_assets(job_id, profile):
+    """
+    Decodes the character and backgrounds at the size the job renders at, once,
+    before its render tasks start. The profile is only known after continuity.
+    """
+    character_path = os.path.join(JOBS_DIR, job_id, "assets", "character.png")
+    if os.path.exists(character_path):
+        warm_assets(character_path, profile)
+    # Backgrounds and the fallback character; already-decoded sizes are just a lookup
+    warm_assets(profile=profile)
+
+STAGE_LAUNCHERS = {
+    "character": lambda job_id: design_character.delay(job_id),
+    "scenes": lambda job_id: plan_scenes.delay(job_id),
+    "continuity": launch_continuity,
+    "render": launch_render,
+}
+
+@celery_app.task(name="tasks.promote_job")
+def promote_job(job_id):
+    """Renders the final-quality video from an approved preview's saved layouts."""
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    try:
+        with open(os.path.join(job_dir, "render_plan.json"), "r") as f:
+            plan = json.load(f)
+        profile = RenderProfile(**plan["final_profile"])
+        scenes = load_scene_layouts(job_id)
+        if not scenes:
+            raise ValueError("No approved scene layouts found")
+        
+        update_job_status(job_id, "rendering", 75, "Rendering final quality...")
+        warm_job_assets(job_id, profile)
+        start_final_render(job_id, scenes, profile)
+    except Exception as e:
+        logger.error(f"Promote failed for {job_id}: {e}")
+        update_job_status(job_id, "failed", 0, f"Error promoting preview: {str(e)}")
         raise e
 
+def mark_scene_dirty(job_id, scene_id, message):
+    # Under the job's status lock, so edits landing together (or during assembly) all stay flagged
+    change_job_status(job_id, lambda current: job_status_data(
+        job_id, "rendering", 75, message, set(current.get("dirty_scenes") or []) | {scene_id}))
+
+@celery_app.task(name="tasks.rerender_scene")
+def rerender_scene(job_id, scene_id):
+    """Re-renders one edited scene (layout already saved by the API) and re-stitches the episode."""
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    try:
+        with open(os.path.join(job_dir, "render_plan.json"), "r") as f:
+            plan = json.load(f)
+        scenes = load_scene_layouts(job_id)
+        
+        if not os.path.exists(os.path.join(job_dir, "final", "final.mp4")) and plan.get("render_mode") == "preview":
+            # Nothing at final quality yet; the low-res preview pass is cheaper than per-scene encodes
+            mark_scene_dirty(job_id, scene_id, f"Re-rendering preview for scene {scene_id}...")
+            render_episode_task.delay(job_id, [scene.model_dump() for scene in scenes], get_profile("preview").model_dump(), "preview")
+            return
+        
+        profile = RenderProfile(**plan["final_profile"])
+        mark_scene_dirty(job_id, scene_id, f"Re-rendering scene {scene_id}...")
+        # Preview-only jobs never wrote per-scene files; render those once (usually cache hits later)
+        render_tasks = []
+        all_segments = []
+        for scene in scenes:
+            if scene.scene_id == scene_id or not scene_files(job_id, scene.scene_id):
+                segments = scene_segments(job_id, scene, profile)
+                render_tasks += scene_render_tasks(job_id, scene, profile, segments)
+            else:
+                # Unchanged scene: describe the files already on disk
+                sliced = not os.path.exists(scene_output_path(job_id, scene.scene_id))
+                segments = scene_segments(job_id, scene, profile, sliced=sliced)
+            all_segments += segments
+        hls.start(job_dir, all_segments)
+        chord(render_tasks)(assemble_video.s(job_id, [scene.scene_id for scene in scenes], [scene_id]))
+    except Exception as e:
+        logger.error(f"Re-render of scene {scene_id} failed for {job_id}: {e}")
+        update_job_status(job_id, "failed", 0, f"Error re-rendering scene {scene_id}: {str(e)}")
+        raise e
+
+def load_scene_layouts(job_id):
+    scenes_dir = os.path.join(JOBS_DIR, job_id, "scenes")
+    scenes = []
+    for path in sorted(glob(os.path.join(scenes_dir, "*.json"))):
+        with open(path, "r") as f:
+            scenes.append(SceneLayout.model_validate_json(f.read()))
+    return sorted(scenes, key=lambda s: s.scene_id)
+
+def scene_cache_key(job_id, scene, profile, frame_range=None):
+    character_path = os.path.join(JOBS_DIR, job_id, "assets", "character.png")
+    fingerprint = render_fingerprint(scene, character_path, profile)
+    if frame_range is not None:
+        fingerprint["frames"] = list(frame_range)
+    return render_cache.make_key(fingerprint)
+
+def start_final_render(job_id, scenes, profile):
+    scene_dicts = [scene.model_dump() for scene in scenes]
+    # Cached scenes are just links under fan-out, so prefer it whenever anything is cached
+    any_cached = any(render_cache.contains(scene_cache_key(job_id, scene, profile)) for scene in scenes)
+    if not any_cached and choose_render_strategy(scenes) == "episode":
+        # One encode, so the playlist fills in only once the episode is done
+        segments = [segment for scene in scenes for segment in scene_segments(job_id, scene, profile, sliced=False)]
+        hls.start(os.path.join(JOBS_DIR, job_id), segments)
+        render_episode_task.delay(job_id, scene_dicts, profile.model_dump())
+    else:
+        dispatch_scene_renders(job_id, scene_dicts, profile.model_dump())
+
+def render_cost(scenes, profile=None):
+    profile = profile or get_profile()
+    return admission.estimate_render(scenes, profile, character_height(profile))
+
+def choose_render_strategy(scenes):
+    """Single-pass for short episodes, where encoder start-up per scene dominates."""
+    if RENDER_STRATEGY in ("fanout", "episode"):
+        return RENDER_STRATEGY
+    if SLICE_SECONDS and any(scene.duration > SLICE_SECONDS for scene in scenes):
+        # A long scene would hold one core for its whole length; slice it across workers
+        return "fanout"
+    total_duration = sum(scene.duration for scene in scenes)
+    if len(scenes) <= EPISODE_MAX_SCENES and total_duration <= EPISODE_MAX_SECONDS:
+        return "episode"
+    return "fanout"
+
+def scene_segments(job_id, scene, profile, sliced=None):
+    """
+    How a scene is rendered, in play order: dicts with "id" (file stem under scenes/),
+    "key" (render cache key), "duration" and "frame_range" (None = whole scene).
+    Long scenes are sliced unless the whole scene is cached; `sliced` forces the choice.
+    """
+    slices = plan_slices(scene.duration, profile, SLICE_SECONDS or scene.duration)
+    if sliced is None:
+        sliced = bool(SLICE_SECONDS) and len(slices) > 1 and not render_cache.contains(scene_cache_key(job_id, scene, profile))
+    if not sliced:
+        n_frames = sum(n for _, n in slices)
+        return [{"id": f"{scene.scene_id:03d}", "key": scene_cache_key(job_id, scene, profile), "duration": n_frames / profile.fps, "frame_range": None}]
+    return [
+        {
+            "id": f"{scene.scene_id:03d}.part{index:03d}",
+            "key": scene_cache_key(job_id, scene, profile, (first_frame, n_frames)),
+            "duration": n_frames / profile.fps,
+            "frame_range": [first_frame, n_frames],
+        }
+        for index, (first_frame, n_frames) in enumerate(slices)
+    ]
+
+def scene_render_tasks(job_id, scene, profile, segments):
+    """One render task for a whole scene, or one per GOP-aligned time slice."""
+    clear_scene_outputs(job_id, scene.scene_id)
+    if segments[0]["frame_range"] is None:
+        return [render_scene_task.s(job_id, scene.model_dump(), profile.model_dump())]
+    return [
+        render_slice_task.s(job_id, scene.model_dump(), profile.model_dump(), index, *segment["frame_range"])
+        for index, segment in enumerate(segments)
+    ]
+
+def dispatch_scene_renders(job_id, scene_dicts, profile_dict=None):
+    # Render scenes (and slices of long scenes) in parallel, then assembly
+    profile = RenderProfile(**profile_dict) if profile_dict else get_profile()
+    render_tasks = []
+    all_segments = []
+    for scene_dict in scene_dicts:
+        scene = SceneLayout(**scene_dict)
+        segments = scene_segments(job_id, scene, profile)
+        render_tasks += scene_render_tasks(job_id, scene, profile, segments)
+        all_segments += segments
+    # Scenes join the HLS playlist as they finish, so playback starts before assembly
+    hls.start(os.path.join(JOBS_DIR, job_id), all_segments)
+    return chord(render_tasks)(assemble_video.s(job_id))
+
+@celery_app.task(name="tasks.render_episode_task")
+def render_episode_task(job_id, scene_dicts, profile_dict=None, render_mode="final"):
+    from shared.schemas.schemas import SceneLayout
+    scenes = [SceneLayout(**s) for s in scene_dicts]
+    profile = RenderProfile(**profile_dict) if profile_dict else None
+    
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    final_dir = os.path.join(job_dir, "final")
+    os.makedirs(final_dir, exist_ok=True)
+    name = "preview" if render_mode == "preview" else "final"
+    output_path = os.path.join(final_dir, f"{name}.mp4")
+    # Encode next to the target and rename, so /download never serves a partial file
+    tmp_path = render_tmp_path(output_path)
+    character_path = os.path.join(job_dir, "assets", "character.png")
+    
+    try:
+        with admission.admit(render_cost(scenes, profile), f"episode {job_id}") as threads:
+            stats = render_episode(scenes, tmp_path, character_path=character_path, profile=profile, threads=threads)
+        metrics.observe_render("episode", stats, tmp_path)
+    except Exception as e:
+        remove_quietly(tmp_path)
+        if render_mode == "preview":
+            logger.error(f"Preview render failed for {job_id}: {e}")
+            update_job_status(job_id, "failed", 0, f"Error rendering preview: {str(e)}")
+            raise e
+        logger.error(f"Episode render failed for {job_id}, falling back to per-scene render: {e}")
+        dispatch_scene_renders(job_id, scene_dicts, profile_dict)
+        return None
+    
+    parts = []
+    if render_mode != "preview":
+        parts = split_episode_scenes(job_id, scenes, profile, tmp_path, stats["failed_scenes"])
+        # Segments superseded by an edit meanwhile don't match its playlist and are ignored
+        for scene, part in zip(scenes, parts):
+            hls.publish(job_dir, f"{scene.scene_id:03d}", scene_cache_key(job_id, scene, profile), part)
+    
+    # Decided under the status lock, like assembly: an episode rendered from layouts that
+    # were edited meanwhile must not replace the edit's output or clear its dirty flag
+    def finish(current):
+        if layouts_changed(job_id, scenes):
+            return None
+        os.replace(tmp_path, output_path)
+        for scene, part in zip(scenes, parts):
+            clear_scene_outputs(job_id, scene.scene_id)
+            os.replace(part, scene_output_path(job_id, scene.scene_id))
+        if render_mode == "preview":
+            return job_status_data(job_id, "preview_ready", 100, "Preview ready")
+        return job_status_data(job_id, "completed", 100, "Ready to download")
+    if change_job_status(job_id, finish) is None:
+        logger.info(f"Scenes of {job_id} were edited during its episode render; leaving the output to the re-render")
+        for path in [tmp_path] + parts:
+            remove_quietly(path)
+        return None
+    if render_mode != "preview":
+        hls.finish(job_dir)
+    return output_path
+
+def split_episode_scenes(job_id, scenes, profile, episode_path, failed_scene_ids):
+    """
+    Cuts a final episode back into one temporary MP4 per scene and adds each to the
+    render cache, so retries, edits and jobs sharing scenes get hits as with fan-out.
+    Returns the files in scene order for the caller to move to scenes/, or [].
+    """
+    profile = profile or get_profile()
+    parts = [render_tmp_path(scene_output_path(job_id, scene.scene_id)) for scene in scenes]
+    try:
+        split_episode(episode_path, scenes, parts, profile)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        logger.warning(f"Could not split episode {job_id} into scenes: {e} {stderr.decode(errors='replace').strip()}")
+        for part in parts:
+            remove_quietly(part)
+        return []
+    for scene, part in zip(scenes, parts):
+        # Error frames must not be served to the next job with this scene
+        if scene.scene_id not in failed_scene_ids:
+            render_cache.store(scene_cache_key(job_id, scene, profile), part)
+    return parts
+
+def render_tmp_path(output_path):
+    # Unique per render: an edit's re-render can run alongside the render it supersedes.
+    # Hidden, so scene_files' globs never pick it up.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path), prefix=".", suffix=".mp4")
+    os.close(fd)
+    return tmp_path
+
+def remove_quietly(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def layouts_changed(job_id, scenes):
+    """Ids of the scenes whose saved layout differs from the one rendered (edited since dispatch)."""
+    current = {scene.scene_id: scene for scene in load_scene_layouts(job_id)}
+    return [scene.scene_id for scene in scenes if current.get(scene.scene_id, scene) != scene]
+
+def place_scene_output(job_id, scene, tmp_path, output_path):
+    """
+    Moves a finished scene (or slice) render to output_path, unless the scene was edited
+    after this render was queued: the edit's own re-render writes that file.
+    """
+    if layouts_changed(job_id, [scene]):
+        logger.info(f"Dropping render of scene {scene.scene_id} for {job_id}: edited since it was queued")
+        remove_quietly(tmp_path)
+        return False
+    # A rename, so an earlier file that is a hard link into the cache is never written over
+    os.replace(tmp_path, output_path)
+    return True
+
 @celery_app.task(name="tasks.render_scene_task")
-def render_scene_task(job_id, scene_dict):
+def render_scene_task(job_id, scene_dict, profile_dict=None):
     from shared.schemas.schemas import SceneLayout
     scene = SceneLayout(**scene_dict)
+    profile = RenderProfile(**profile_dict) if profile_dict else None
     
     job_dir = os.path.join(JOBS_DIR, job_id)
-    output_path = os.path.join(job_dir, "scenes", f"{scene.scene_id:03d}.mp4")
+    output_path = scene_output_path(job_id, scene.scene_id)
+    tmp_path = render_tmp_path(output_path)
     
     # Check for job-specific character asset
     character_path = os.path.join(job_dir, "assets", "character.png")
     
-    # Update status per scene? Might be too spammy. 
-    # Just do the work.
-    render_scene(scene, output_path, character_path=character_path)
+    cache_key = scene_cache_key(job_id, scene, profile)
+    if render_cache.fetch(cache_key, tmp_path):
+        metrics.RENDER_CACHE_HITS.labels("scene").inc()
+    else:
+        with admission.admit(render_cost([scene], profile), f"scene {job_id}/{scene.scene_id}") as threads:
+            stats = render_scene(scene, tmp_path, character_path=character_path, profile=profile, threads=threads)
+        if stats.get("ok"):
+            metrics.observe_render("scene", stats, tmp_path)
+            render_cache.store(cache_key, tmp_path)
+    if place_scene_output(job_id, scene, tmp_path, output_path):
+        hls.publish(job_dir, f"{scene.scene_id:03d}", cache_key, output_path)
+    return output_path
+
+@celery_app.task(name="tasks.render_slice_task")
+def render_slice_task(job_id, scene_dict, profile_dict, index, first_frame, n_frames):
+    """Renders frames [first_frame, first_frame + n_frames) of a scene; assemble_video stream-copies the slices."""
+    scene = SceneLayout(**scene_dict)
+    profile = RenderProfile(**profile_dict)
+    
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    output_path = scene_slice_path(job_id, scene.scene_id, index)
+    tmp_path = render_tmp_path(output_path)
+    character_path = os.path.join(job_dir, "assets", "character.png")
+    
+    frame_range = (first_frame, n_frames)
+    cache_key = scene_cache_key(job_id, scene, profile, frame_range)
+    segment_id = f"{scene.scene_id:03d}.part{index:03d}"
+    if render_cache.fetch(cache_key, tmp_path):
+        metrics.RENDER_CACHE_HITS.labels("slice").inc()
+    else:
+        slice_scene = scene.model_copy(update={"duration": math.ceil(n_frames / profile.fps)})
+        with admission.admit(render_cost([slice_scene], profile), f"scene {job_id}/{scene.scene_id} slice {index}") as threads:
+            stats = render_scene(scene, tmp_path, character_path=character_path, profile=profile, threads=threads, frame_range=frame_range)
+        if stats.get("ok"):
+            metrics.observe_render("slice", stats, tmp_path)
+            render_cache.store(cache_key, tmp_path)
+    if place_scene_output(job_id, scene, tmp_path, output_path):
+        hls.publish(job_dir, segment_id, cache_key, output_path)
     return output_path
 
 @celery_app.task(name="tasks.assemble_video")
-def assemble_video(scene_paths, job_id):
-    update_job_status(job_id, "assembling", 90, "Stitching final video...")
+def assemble_video(scene_paths, job_id, scene_ids=None, edited_scene_ids=None):
+    # Keep dirty_scenes: edits marked while scenes rendered must survive until the check below
+    change_job_status(job_id, lambda current: job_status_data(
+        job_id, "assembling", 90, "Stitching final video...", current.get("dirty_scenes")))
     
     job_dir = os.path.join(JOBS_DIR, job_id)
     final_dir = os.path.join(job_dir, "final")
-    list_path = os.path.join(final_dir, "list.txt")
     output_path = os.path.join(final_dir, "final.mp4")
+    # Concat next to the target and rename, so /download never serves a partial file.
+    # The first assembly and an edit's can run at once; each gets its own files.
+    tmp_path = render_tmp_path(output_path)
+    list_path = f"{tmp_path}.txt"
+    
+    if scene_ids is not None:
+        # After an edit only some scenes were re-rendered; stitch the whole episode
+        scene_paths = [path for scene_id in scene_ids for path in scene_files(job_id, scene_id)]
     
     # Sort paths just in case
     scene_paths.sort()
@@ -203,10 +816,29 @@ def assemble_video(scene_paths, job_id):
         "-safe", "0", 
         "-i", list_path, 
         "-c", "copy", 
-        output_path
+        tmp_path
     ]
     
-    subprocess.run(cmd, check=True)
+    with metrics.ASSEMBLE_SECONDS.time():
+        subprocess.run(cmd, check=True)
     
-    update_job_status(job_id, "completed", 100, "Ready to download")
+    # Edits may have landed while this ran, on the first render as well as on a re-render;
+    # only our own scenes are cleared. Decided under the status lock, so an edit marked
+    # meanwhile can't be overwritten by "completed". While other edited scenes are still
+    # re-rendering (their rerender_scene is already queued) the video isn't published:
+    # the last of those assemblies does it.
+    def finish_or_wait(current):
+        dirty = set(current.get("dirty_scenes") or []) - set(edited_scene_ids or [])
+        if dirty:
+            return job_status_data(job_id, "rendering", 90, f"Waiting for edited scenes {sorted(dirty)}...", dirty)
+        os.replace(tmp_path, output_path)
+        return job_status_data(job_id, "completed", 100, "Ready to download")
+    # The remuxes run before taking the status lock, which only covers the decision above
+    hls.publish_missing(job_dir, os.path.join(job_dir, "scenes"))
+    written = change_job_status(job_id, finish_or_wait)
+    remove_quietly(list_path)
+    if written["status"] == "completed":
+        hls.finish(job_dir)
+    else:
+        remove_quietly(tmp_path)
     return output_path